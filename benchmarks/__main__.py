@@ -0,0 +1,56 @@
+import argparse
+import json
+import sys
+
+from benchmarks.workloads import workloads
+from benchmarks.runner import Modes, measure, report, compare, load, save
+
+"""
+Usage:
+
+    python -m benchmarks                              # print JSON results
+    python -m benchmarks --save-baseline base.json    # record a baseline
+    python -m benchmarks --baseline base.json         # exit 1 on a regression
+"""
+
+def main(argv: list=None) -> int:
+    parser = argparse.ArgumentParser(prog="benchmarks", description="EVM interpreter throughput benchmarks")
+    parser.add_argument("--iterations", type=int, default=2000, help="loop iterations of the opcode and synthetic workloads")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per workload and mode, the best is kept")
+    parser.add_argument("--only", nargs="*", help="workload names or groups to run")
+    parser.add_argument("--modes", nargs="*", choices=list(Modes), default=list(Modes))
+    parser.add_argument("--output", help="write the JSON results to this file")
+    parser.add_argument("--baseline", help="compare against a saved baseline")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="allowed ns/op slowdown against the baseline")
+    parser.add_argument("--save-baseline", help="write the results as a new baseline")
+    args = parser.parse_args(argv)
+
+    suite = workloads(args.iterations)
+    if args.only:
+        suite = [w for w in suite if w.name in args.only or w.group in args.only]
+
+    results = measure(suite, {mode: Modes[mode] for mode in args.modes}, args.repeat)
+    data = report(results, iterations=args.iterations, repeat=args.repeat)
+
+    if args.output:
+        save(data, args.output)
+    else:
+        json.dump(data, sys.stdout, indent=2, sort_keys=True)
+        print()
+
+    if args.save_baseline:
+        save(data, args.save_baseline)
+
+    if args.baseline:
+        regressions = compare(data, load(args.baseline), args.tolerance)
+
+        for name, mode, before, after in regressions:
+            print(f"REGRESSION {name} [{mode}]: {before:.1f} -> {after:.1f} ns/op", file=sys.stderr)
+
+        if regressions:
+            return 1
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,117 @@
+import json
+import platform
+import time
+
+from vm.tracer import Tracer
+from vm.keccak import BACKEND
+from benchmarks.workloads import Workload
+
+"""
+Benchmark measurement.
+
+Each workload's instruction count is taken once from a traced run (every
+executed instruction, sub calls included). Each mode is then timed as the best
+of `repeat` runs, which is the least noisy estimate of what the interpreter
+itself costs, and reported as ns per instruction and instructions per second.
+"""
+
+Modes: dict = {
+    "fused": {},
+    "decoded": {"fuse": False},
+    "compiled": {"compile_blocks": True},
+}
+
+class CountingTracer(Tracer):
+    def __init__(self):
+        self.steps = 0
+
+    def capture_state(self, pc: int, op: int, ctx):
+        self.steps += 1
+
+
+def count_instructions(workload: Workload) -> int:
+    tracer = CountingTracer()
+    run = workload.prepare(tracer=tracer)
+
+    ## token workloads also trace their deployment, so only count the measured run
+    tracer.steps = 0
+    run()
+
+    return tracer.steps
+
+def time_run(run, repeat: int) -> int:
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter_ns()
+        run()
+        elapsed = time.perf_counter_ns() - start
+
+        if best is None or elapsed < best:
+            best = elapsed
+
+    return best
+
+def measure(workloads: list, modes: dict=Modes, repeat: int=5) -> dict:
+    results: dict = {}
+
+    for workload in workloads:
+        instructions = count_instructions(workload)
+        entry = {"group": workload.group, "instructions": instructions, "modes": {}}
+
+        for mode, options in modes.items():
+            run = workload.prepare(**options)
+            run() ## warm up the analysis and decode caches
+
+            elapsed = time_run(run, repeat)
+            entry["modes"][mode] = {
+                "ns": elapsed,
+                "ns_per_op": elapsed / instructions,
+                "ops_per_sec": instructions * 1e9 / elapsed,
+            }
+
+        results[workload.name] = entry
+
+    return results
+
+def report(results: dict, **meta) -> dict:
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "platform": platform.platform(),
+            "keccak": BACKEND,
+            **meta,
+        },
+        "results": results,
+    }
+
+def compare(current: dict, baseline: dict, tolerance: float=0.10) -> list:
+    """
+    Returns (workload, mode, baseline ns/op, current ns/op) for every
+    measurement more than `tolerance` slower than the baseline
+    """
+    regressions: list = []
+
+    for name, entry in current["results"].items():
+        previous = baseline["results"].get(name)
+        if previous is None:
+            continue
+
+        for mode, timing in entry["modes"].items():
+            before = previous["modes"].get(mode)
+            if before is None:
+                continue
+
+            if timing["ns_per_op"] > before["ns_per_op"] * (1 + tolerance):
+                regressions.append((name, mode, before["ns_per_op"], timing["ns_per_op"]))
+
+    return regressions
+
+def load(path: str) -> dict:
+    with open(path) as f:
+        return json.load(f)
+
+def save(data: dict, path: str):
+    with open(path, "w") as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+        f.write("\n")
@@ -0,0 +1,107 @@
+import os
+
+from vm.interpreter import EVMInterpreter
+from vm.contract import Contract
+from vm.state import Account
+from vm.keccak import keccak256
+
+"""
+Benchmark workloads.
+
+Every workload is a fixed program with fixed inputs so instruction counts are
+identical from run to run. `Workload.prepare(**mode)` returns a zero argument
+callable performing one complete run in the given interpreter mode, with any
+one-off setup (such as deploying a contract) already done.
+
+Opcode family and synthetic workloads are loops of the form
+
+    <prefix> PUSH2 iterations JUMPDEST <body> PUSH1 1 SWAP1 SUB DUP1 PUSH1 <loop> JUMPI STOP
+
+where the body leaves the stack as it found it (the counter on top).
+"""
+
+CONTRACTS = os.path.join(os.path.dirname(__file__), "contracts")
+
+OWNER, TOKEN, RECIPIENT = 0x1000, 0x2000, 0x3000
+
+
+def loop(body: str, iterations: int, prefix: str="") -> bytes:
+    prefix = bytes.fromhex(prefix.replace(" ", ""))
+    start = len(prefix) + 3
+
+    ## bodies refer to pc (body start + i) as {at<i>}, for jump targets
+    body = bytes.fromhex(body.replace(" ", "").format(**{f"at{i}": f"{start + 1 + i:04X}" for i in range(64)}))
+
+    return (
+        prefix
+        + bytes([0x61]) + iterations.to_bytes(2, "big") + b"\x5b"
+        + body
+        + bytes.fromhex("6001 90 03 80 60".replace(" ", "")) + bytes([start]) + b"\x57\x50\x00"
+    )
+
+
+class Workload():
+    def __init__(self, name: str, group: str, code: bytes, calldata: bytes=None):
+        self.name = name
+        self.group = group
+        self.code = code
+        self.calldata = calldata
+
+    def prepare(self, **mode):
+        interpreter = EVMInterpreter(**mode)
+        contract = Contract(self.code, self.calldata)
+
+        return lambda: interpreter.run(contract)
+
+
+class TokenWorkload(Workload):
+    """ Calls into the compiled ERC-20 token after deploying it with the whole supply on OWNER """
+
+    def __init__(self, name: str, signature: str, *args):
+        selector = keccak256(signature.encode())[:4]
+        super().__init__(name, "contract", None, selector + b"".join(a.to_bytes(32, "big") for a in args))
+
+    def prepare(self, **mode):
+        accounts: dict = {}
+        interpreter = EVMInterpreter(accounts=accounts, **mode)
+
+        with open(os.path.join(CONTRACTS, "ERC20.bin")) as f:
+            init = bytes.fromhex(f.read().strip())
+
+        deployed = interpreter.run(Contract(init + (10 ** 27).to_bytes(32, "big"), None, address=TOKEN, caller=OWNER))
+        accounts[TOKEN] = Account(code=bytes(deployed.data))
+
+        contract = Contract(accounts[TOKEN].code, self.calldata, address=TOKEN, caller=OWNER)
+        return lambda: interpreter.run(contract)
+
+
+## one body per opcode family, each balanced on the stack
+FamilyBodies: dict = {
+    "arithmetic": "6003 6005 01 6007 02 6009 03 6002 04 6011 06 50", # ADD MUL SUB DIV MOD
+    "comparison": "6003 6005 10 6007 11 6009 14 15 50", # LT GT EQ ISZERO
+    "bitwise": "60F0 600F 16 60AA 17 6055 18 19 6004 1B 6002 1C 50", # AND OR XOR NOT SHL SHR
+    "stack": "6001 6002 80 81 90 91 50 50 50 50", # DUP1 DUP2 SWAP1 SWAP2 POP
+    "push": "7F" + "AB" * 32 + " 50 63DEADBEEF 50 6001 50", # PUSH32 PUSH4 PUSH1
+    "memory": "6001 6000 52 6000 51 6020 52 6040 51 50", # MSTORE MLOAD
+    "jumps": "61{at4} 56 5B 6001 61{at11} 57 5B", # JUMP JUMPI JUMPDEST
+    "sha3": "6020 6000 20 50", # SHA3 of one word
+    "storage": "6001 6000 55 6000 54 50", # SSTORE SLOAD
+}
+
+def workloads(iterations: int=2000) -> list:
+    suite = [Workload(name, "opcode", loop(body, iterations)) for name, body in FamilyBodies.items()]
+
+    suite += [
+        Workload("counting_loop", "synthetic", loop("", iterations)),
+        Workload("fibonacci", "synthetic", loop("91 81 01 90 91", iterations, prefix="6000 6001")),
+        Workload("keccak_loop", "synthetic", loop("90 6000 52 6020 6000 20 90", iterations, prefix="6000")),
+        Workload("memory_copy", "synthetic", loop("610100 6000 6000 39 6000 51 60A0 52", iterations)),
+    ]
+
+    suite += [
+        TokenWorkload("erc20_transfer", "transfer(address,uint256)", RECIPIENT, 1),
+        TokenWorkload("erc20_approve", "approve(address,uint256)", RECIPIENT, 1000),
+        TokenWorkload("erc20_balance_of", "balanceOf(address)", OWNER),
+    ]
+
+    return suite
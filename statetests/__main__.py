@@ -0,0 +1,113 @@
+import argparse
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from statetests.runner import cases, load, run_case
+
+"""
+Runs Ethereum GeneralStateTests / VMTests fixtures through the interpreter:
+
+    python -m statetests path/to/GeneralStateTests --fork Istanbul --output results.json
+
+Fixture files are spread over worker processes. The summary lists pass/fail
+counts per fork and per opcode (a test counts towards every opcode in its
+code) and the slowest tests; `--output` keeps every per-test record,
+execution time included. Exits 1 when any test fails.
+"""
+
+def fixture_files(root: str) -> list:
+    if os.path.isfile(root):
+        return [root]
+
+    return sorted(
+        os.path.join(directory, name)
+        for directory, _, names in os.walk(root)
+        for name in names if name.endswith(".json")
+    )
+
+def run_file(path: str, forks: set, options: dict) -> list:
+    try:
+        found = cases(load(path), forks)
+    except (ValueError, KeyError, AttributeError) as e:
+        return [{"file": path, "name": None, "fork": None, "index": 0, "passed": False, "error": f"unreadable fixture: {e}", "ns": 0, "opcodes": []}]
+
+    return [dict(run_case(case, options), file=path) for case in found]
+
+def run_all(files: list, forks: set=None, workers: int=None, **options) -> list:
+    workers = workers or os.cpu_count() or 1
+
+    if workers == 1 or len(files) <= 1:
+        return [record for path in files for record in run_file(path, forks, options)]
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = pool.map(run_file, files, [forks] * len(files), [options] * len(files))
+        return [record for records in results for record in records]
+
+
+def tally(records: list, key) -> dict:
+    counts: dict = {}
+    for record in records:
+        for name in key(record):
+            passed, failed = counts.get(name, (0, 0))
+            counts[name] = (passed + 1, failed) if record["passed"] else (passed, failed + 1)
+
+    return counts
+
+def summary(records: list, slowest: int=10) -> str:
+    lines: list = []
+
+    for title, counts in (
+        ("fork", tally(records, lambda record: [record["fork"]])),
+        ("opcode", tally(records, lambda record: record["opcodes"])),
+    ):
+        lines.append(f"{title:<16} {'passed':>8} {'failed':>8}")
+        for name, (passed, failed) in sorted(counts.items(), key=lambda item: (-item[1][1], str(item[0]))):
+            lines.append(f"{str(name):<16} {passed:>8} {failed:>8}")
+        lines.append("")
+
+    lines.append("slowest")
+    for record in sorted(records, key=lambda record: record["ns"], reverse=True)[:slowest]:
+        lines.append(f"{record['ns'] / 1e6:>10.3f} ms  {record['name']} [{record['fork']}:{record['index']}]")
+
+    failed = [record for record in records if not record["passed"]]
+    lines.append("")
+    lines.append(f"{len(records) - len(failed)} passed, {len(failed)} failed")
+
+    return "\n".join(lines)
+
+def main(argv: list=None) -> int:
+    parser = argparse.ArgumentParser(prog="statetests", description="Run Ethereum state test fixtures against the interpreter")
+    parser.add_argument("fixtures", help="fixture file or directory searched recursively for .json files")
+    parser.add_argument("--fork", nargs="*", help="forks to run (VMTests for the legacy VM test format)")
+    parser.add_argument("--workers", type=int, help="worker processes, defaults to the CPU count")
+    parser.add_argument("--output", help="write every per-test record as JSON")
+    parser.add_argument("--failures", action="store_true", help="list each failing test and why")
+    parser.add_argument("--compile-blocks", action="store_true", help="run in compiled block mode")
+    parser.add_argument("--no-fuse", action="store_true", help="run without superinstruction fusion")
+    args = parser.parse_args(argv)
+
+    records = run_all(
+        fixture_files(args.fixtures),
+        set(args.fork) if args.fork else None,
+        args.workers,
+        compile_blocks=args.compile_blocks,
+        fuse=not args.no_fuse,
+    )
+
+    print(summary(records))
+
+    if args.failures:
+        for record in records:
+            if not record["passed"]:
+                print(f"FAIL {record['file']} {record['name']} [{record['fork']}:{record['index']}]: {record['error']}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(records, f, indent=2)
+
+    return 0 if all(record["passed"] for record in records) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
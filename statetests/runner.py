@@ -0,0 +1,365 @@
+import json
+import time
+
+from vm.interpreter import EVMInterpreter
+from vm.contract import Contract
+from vm.opcode import Opcode
+from vm.storage import MemoryStorage
+from vm.state import Account
+from vm.frames import create_address
+from vm.gas import CREATE_DATA_GAS
+from vm.keccak import keccak256
+from vm.constants import MAX_CODE_SIZE, ReturnCode
+from vm.decoder import ImmediateSizes
+from statetests.trie import state_root, logs_hash
+
+"""
+Execution of Ethereum test fixtures.
+
+Two fixture formats are understood:
+
+    * VMTests: one `exec` message run against `pre`, checked on the returned
+      data, the gas left and the storage of every `post` account (no `post`
+      means the run must halt exceptionally)
+    * GeneralStateTests: one transaction per `post[fork][i]` entry, with the
+      data/gas/value picked by its `indexes`, checked on the state root and
+      the logs hash
+
+Transactions are applied with the interpreter's own gas schedule. Block
+environment opcodes and EIP-2929 access lists are not modelled, so fixtures
+depending on them fail and show up as such in the per opcode report.
+"""
+
+TX_GAS = 21000
+TX_CREATE_GAS = 32000
+TX_DATA_ZERO_GAS = 4
+TX_DATA_NONZERO_GAS = 16
+TX_ACCESS_ADDRESS_GAS = 2400
+TX_ACCESS_SLOT_GAS = 1900
+INITCODE_WORD_GAS = 2
+
+## forks from which a rule applies
+LondonForks = frozenset(["London", "ArrowGlacier", "GrayGlacier", "Merge", "Paris", "Shanghai", "Cancun", "Prague"])
+ShanghaiForks = frozenset(["Shanghai", "Cancun", "Prague"])
+
+
+class Case():
+    """ One fixture run: a (test, fork, post index) triple, or a whole VM test """
+    __slots__ = ("name", "fork", "index", "test")
+
+    def __init__(self, name: str, fork: str, index: int, test: dict):
+        self.name = name
+        self.fork = fork
+        self.index = index
+        self.test = test
+
+
+def cases(fixtures: dict, forks: set=None) -> list:
+    """ Expands a loaded fixture file into its cases, keeping only `forks` when given """
+    found: list = []
+
+    for name, test in fixtures.items():
+        if "exec" in test:
+            if forks is None or "VMTests" in forks:
+                found.append(Case(name, "VMTests", 0, test))
+            continue
+
+        for fork, entries in test.get("post", {}).items():
+            if forks is None or fork in forks:
+                found += [Case(name, fork, index, test) for index in range(len(entries))]
+
+    return found
+
+def load(path: str) -> dict:
+    with open(path) as f:
+        return json.load(f)
+
+
+##              ##
+#   parsing      #
+##              ##
+
+def number(value) -> int:
+    if isinstance(value, int):
+        return value
+    return int(value, 16) if value.startswith("0x") else int(value or "0")
+
+def data(value: str) -> bytes:
+    ## filled fixtures may carry a ":raw" style prefix on data
+    if value.startswith(":raw "):
+        value = value[5:]
+    return bytes.fromhex(value[2:] if value.startswith("0x") else value)
+
+def prestate(pre: dict) -> tuple:
+    accounts, storage = {}, MemoryStorage()
+
+    for address, fields in pre.items():
+        address = number(address)
+        accounts[address] = Account(number(fields["balance"]), number(fields["nonce"]), data(fields["code"]))
+
+        for slot, value in fields.get("storage", {}).items():
+            if number(value):
+                storage.slots[(address, number(slot))] = number(value)
+
+    return accounts, storage
+
+def storage_of(storage: MemoryStorage) -> dict:
+    slots: dict = {}
+    for (address, slot), value in storage.slots.items():
+        slots.setdefault(address, {})[slot] = value
+
+    return slots
+
+def opcodes(code: bytes) -> set:
+    """ Names of the opcodes in `code`, skipping PUSH data """
+    names, pc = set(), 0
+    while pc < len(code):
+        op = code[pc]
+        names.add(Opcode(op).name if op in Opcode._value2member_map_ else f"{op:#04x}")
+        pc += 1 + ImmediateSizes[op]
+
+    return names
+
+
+##                          ##
+#   secp256k1 sender keys    #
+##                          ##
+
+P = 2**256 - 2**32 - 977
+G = (
+    0x79BE667EF9DCBBAC55A06295CE870B07029BFCDB2DCE28D959F2815B16F81798,
+    0x483ADA7726A3C4655DA4FBFC0E1108A8FD17B448A68554199C47D08FFB10D4B8,
+)
+
+def point_add(a: tuple, b: tuple) -> tuple:
+    if a is None:
+        return b
+    if b is None:
+        return a
+    if a[0] == b[0] and (a[1] + b[1]) % P == 0:
+        return None
+
+    if a == b:
+        slope = 3 * a[0] * a[0] * pow(2 * a[1], -1, P)
+    else:
+        slope = (b[1] - a[1]) * pow(b[0] - a[0], -1, P)
+
+    x = (slope * slope - a[0] - b[0]) % P
+    return x, (slope * (a[0] - x) - a[1]) % P
+
+def private_key_address(key: int) -> int:
+    point, addend = None, G
+    while key:
+        if key & 1:
+            point = point_add(point, addend)
+        addend = point_add(addend, addend)
+        key >>= 1
+
+    public = point[0].to_bytes(32, "big") + point[1].to_bytes(32, "big")
+    return int.from_bytes(keccak256(public)[12:], "big")
+
+
+##              ##
+#   VM tests     #
+##              ##
+
+def run_vm_test(test: dict, options: dict) -> str:
+    """ Returns None when the test passes, otherwise what went wrong """
+    accounts, storage = prestate(test["pre"])
+    interpreter = EVMInterpreter(storage=storage, accounts=accounts, **options)
+
+    message = test["exec"]
+    contract = Contract(
+        data(message["code"]),
+        data(message["data"]),
+        value=number(message["value"]),
+        gas=number(message["gas"]),
+        address=number(message["address"]),
+        caller=number(message["caller"]),
+    )
+
+    ctx = interpreter.pool.acquire(contract, contract.gas, origin=number(message["origin"]))
+    result = interpreter.execute(ctx)
+    interpreter.pool.release(ctx)
+
+    if "post" not in test:
+        return None if result.code != ReturnCode.STOPPED else "expected an exceptional halt"
+
+    if result.code != ReturnCode.STOPPED:
+        return f"halted with {result.code.name}"
+
+    output = bytes(result.data) if result.data is not None else b""
+    if output != data(test.get("out", "0x")):
+        return f"output 0x{output.hex()} != {test['out']}"
+
+    if "gas" in test and result.gas_left != number(test["gas"]):
+        return f"gas left {result.gas_left} != {number(test['gas'])}"
+
+    slots = storage_of(storage)
+    for address, fields in test["post"].items():
+        expected = {number(slot): number(value) for slot, value in fields.get("storage", {}).items() if number(value)}
+        if slots.get(number(address), {}) != expected:
+            return f"storage of {address} differs"
+
+    return None
+
+
+##                  ##
+#   state tests      #
+##                  ##
+
+def intrinsic_gas(payload: bytes, create: bool, access_list: list, fork: str) -> int:
+    zeros = payload.count(0)
+    gas = TX_GAS + TX_DATA_ZERO_GAS * zeros + TX_DATA_NONZERO_GAS * (len(payload) - zeros)
+
+    if create:
+        gas += TX_CREATE_GAS
+        if fork in ShanghaiForks:
+            gas += INITCODE_WORD_GAS * ((len(payload) + 31) // 32)
+
+    for entry in access_list:
+        gas += TX_ACCESS_ADDRESS_GAS + TX_ACCESS_SLOT_GAS * len(entry["storageKeys"])
+
+    return gas
+
+def apply_transaction(interpreter: EVMInterpreter, env: dict, tx: dict, indexes: dict, fork: str) -> tuple:
+    """ Applies one transaction and returns (logs, error), error is None for a valid transaction """
+    state = interpreter.state
+
+    payload = data(tx["data"][indexes["data"]])
+    gas_limit = number(tx["gasLimit"][indexes["gas"]])
+    value = number(tx["value"][indexes["value"]])
+    access_lists = tx.get("accessLists")
+    access_list = (access_lists[indexes["data"]] or []) if access_lists else tx.get("accessList", [])
+
+    sender = number(tx["sender"]) if "sender" in tx else private_key_address(number(tx["secretKey"]))
+    create = not tx.get("to")
+    coinbase = number(env["currentCoinbase"])
+
+    base_fee = number(env.get("currentBaseFee", "0"))
+    if "gasPrice" in tx:
+        gas_price = number(tx["gasPrice"])
+    else:
+        gas_price = min(number(tx["maxFeePerGas"]), base_fee + number(tx["maxPriorityFeePerGas"]))
+
+    intrinsic = intrinsic_gas(payload, create, access_list, fork)
+    nonce = state.nonce(sender)
+
+    if (
+        intrinsic > gas_limit
+        or nonce != number(tx["nonce"])
+        or state.balance(sender) < gas_limit * gas_price + value
+        or gas_price < base_fee
+    ):
+        return [], "invalid transaction"
+
+    state.set_nonce(sender, nonce + 1)
+    state.set_balance(sender, state.balance(sender) - gas_limit * gas_price)
+
+    snapshot = state.snapshot()
+    gas = gas_limit - intrinsic
+
+    if create:
+        address = create_address(sender, nonce)
+        state.set_nonce(address, 1)
+        code = payload
+    else:
+        address = number(tx["to"])
+        code = state.code(address)
+
+    state.transfer(sender, address, value)
+
+    contract = Contract(code, None if create else payload, value=value, gas=gas, address=address, caller=sender)
+    ctx = interpreter.pool.acquire(contract, gas, state=state, origin=sender)
+    result = interpreter.execute(ctx)
+    interpreter.pool.release(ctx)
+
+    gas_left = result.gas_left
+    success = result.code == ReturnCode.STOPPED
+
+    if create and success:
+        deployed = bytes(result.data) if result.data is not None else b""
+        deposit = CREATE_DATA_GAS * len(deployed)
+
+        if len(deployed) > MAX_CODE_SIZE or deposit > gas_left:
+            success, gas_left = False, 0
+        else:
+            gas_left -= deposit
+            state.set_code(address, deployed)
+
+    if not success:
+        state.revert(snapshot)
+
+    gas_used = gas_limit - gas_left
+    refund = min(state.refund, gas_used // (5 if fork in LondonForks else 2)) if success else 0
+    gas_used -= refund
+
+    state.set_balance(sender, state.balance(sender) + (gas_limit - gas_used) * gas_price)
+
+    tip = gas_price - base_fee if fork in LondonForks else gas_price
+    state.set_balance(coinbase, state.balance(coinbase) + gas_used * tip)
+
+    logs = state.logs if success else []
+    state.commit()
+
+    ## EIP-161: touched accounts left empty are removed
+    for touched in (sender, address, coinbase):
+        account = interpreter.accounts.get(touched)
+        if account is not None and not (account.balance or account.nonce or account.code):
+            del interpreter.accounts[touched]
+
+    return logs, None
+
+def run_state_test(test: dict, fork: str, index: int, options: dict) -> str:
+    """ Returns None when the post state matches, otherwise what went wrong """
+    accounts, storage = prestate(test["pre"])
+    interpreter = EVMInterpreter(storage=storage, accounts=accounts, **options)
+
+    expected = test["post"][fork][index]
+    logs, error = apply_transaction(interpreter, test["env"], test["transaction"], expected["indexes"], fork)
+
+    if error is not None:
+        return None if "expectException" in expected else error
+
+    if "expectException" in expected:
+        return f"expected exception {expected['expectException']}"
+
+    root = state_root(accounts, storage_of(storage))
+    if root != data(expected["hash"]):
+        return f"state root 0x{root.hex()} != {expected['hash']}"
+
+    if "logs" in expected and logs_hash(logs) != data(expected["logs"]):
+        return "logs hash differs"
+
+    return None
+
+
+def run_case(case: Case, options: dict) -> dict:
+    """ Runs a case and returns its result record, timing only the execution """
+    test = case.test
+    codes = [data(account["code"]) for account in test["pre"].values()]
+
+    if case.fork == "VMTests":
+        codes.append(data(test["exec"]["code"]))
+        run = lambda: run_vm_test(test, options)
+    else:
+        if not test["transaction"].get("to"):
+            codes.append(data(test["transaction"]["data"][test["post"][case.fork][case.index]["indexes"]["data"]]))
+        run = lambda: run_state_test(test, case.fork, case.index, options)
+
+    start = time.perf_counter_ns()
+    try:
+        error = run()
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    elapsed = time.perf_counter_ns() - start
+
+    return {
+        "name": case.name,
+        "fork": case.fork,
+        "index": case.index,
+        "passed": error is None,
+        "error": error,
+        "ns": elapsed,
+        "opcodes": sorted(set().union(*map(opcodes, codes))),
+    }
@@ -0,0 +1,116 @@
+from vm.keccak import keccak256
+
+"""
+RLP and Merkle Patricia trie roots, for comparing post states against the
+`hash` and `logs` fields of state test fixtures.
+
+Only roots are needed, so a trie is built in one pass from all of its
+(key, value) pairs instead of node by node.
+"""
+
+def rlp_encode(item) -> bytes:
+    if isinstance(item, (bytes, bytearray)):
+        if len(item) == 1 and item[0] < 0x80:
+            return bytes(item)
+        return rlp_length(len(item), 0x80) + bytes(item)
+
+    payload = b"".join(rlp_encode(child) for child in item)
+    return rlp_length(len(payload), 0xC0) + payload
+
+def rlp_length(length: int, offset: int) -> bytes:
+    if length < 56:
+        return bytes([offset + length])
+
+    encoded = length.to_bytes((length.bit_length() + 7) // 8, "big")
+    return bytes([offset + 55 + len(encoded)]) + encoded
+
+def int_bytes(value: int) -> bytes:
+    """ Minimal big endian encoding, zero is empty """
+    return value.to_bytes((value.bit_length() + 7) // 8, "big")
+
+
+##          ##
+#   tries    #
+##          ##
+
+def nibbles(key: bytes) -> tuple:
+    return tuple(n for byte in key for n in (byte >> 4, byte & 0x0F))
+
+def hex_prefix(path: tuple, leaf: bool) -> bytes:
+    flag = 2 if leaf else 0
+    if len(path) % 2:
+        path = (flag + 1,) + path
+    else:
+        path = (flag, 0) + path
+
+    return bytes(path[i] << 4 | path[i + 1] for i in range(0, len(path), 2))
+
+def reference(node) -> object:
+    """ Nodes shorter than 32 bytes are embedded in their parent, longer ones by hash """
+    encoded = rlp_encode(node)
+    return node if len(encoded) < 32 else keccak256(encoded)
+
+def build(pairs: list, depth: int):
+    if len(pairs) == 1:
+        path, value = pairs[0]
+        return [hex_prefix(path[depth:], True), value]
+
+    ## extension over the nibbles every key shares
+    first, shortest = pairs[0][0], min(len(path) for path, _ in pairs)
+    shared = depth
+    while shared < shortest and all(path[shared] == first[shared] for path, _ in pairs):
+        shared += 1
+
+    if shared > depth:
+        return [hex_prefix(first[depth:shared], False), reference(build(pairs, shared))]
+
+    branch: list = [b""] * 17
+    children: dict = {}
+    for path, value in pairs:
+        if len(path) == depth:
+            branch[16] = value
+        else:
+            children.setdefault(path[depth], []).append((path, value))
+
+    for nibble, child in children.items():
+        branch[nibble] = reference(build(child, depth + 1))
+
+    return branch
+
+def trie_root(items: dict) -> bytes:
+    """ Root hash of a trie holding {key: value} (both bytes) """
+    if not items:
+        return keccak256(rlp_encode(b""))
+
+    pairs = sorted((nibbles(key), value) for key, value in items.items())
+    return keccak256(rlp_encode(build(pairs, 0)))
+
+
+##                  ##
+#   Ethereum state   #
+##                  ##
+
+def storage_root(slots: dict) -> bytes:
+    """ Root of an account's storage trie from {slot: value} """
+    return trie_root({
+        keccak256(slot.to_bytes(32, "big")): rlp_encode(int_bytes(value))
+        for slot, value in slots.items() if value
+    })
+
+def state_root(accounts: dict, storage: dict) -> bytes:
+    """ Root of the state trie from {address: Account} and {address: {slot: value}} """
+    return trie_root({
+        keccak256(address.to_bytes(20, "big")): rlp_encode([
+            int_bytes(account.nonce),
+            int_bytes(account.balance),
+            storage_root(storage.get(address, {})),
+            keccak256(account.code),
+        ])
+        for address, account in accounts.items()
+    })
+
+def logs_hash(logs: list) -> bytes:
+    return keccak256(rlp_encode([
+        [log.address.to_bytes(20, "big"), [topic.to_bytes(32, "big") for topic in log.topics], bytes(log.data)]
+        for log in logs
+    ]))
@@ -0,0 +1,148 @@
+from vm.interpreter import EVMInterpreter
+from vm.contract import Contract
+from vm.stack import StackError
+from vm.tracer import Tracer
+from vm.profiler import Profiler
+from vm.constants import ReturnCode as rc
+
+import random
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from vm.batch import BatchInterpreter, int_to_limbs, limbs_to_ints, add, sub, mul, lt, shift_left, shift_right
+
+"""
+NOTE: Batch results are validated differentially against the scalar interpreter
+"""
+
+M = 2 ** 256 - 1
+
+Modes = [
+    dict(),
+    dict(fuse=False),
+    dict(compile_blocks=True),
+    dict(tracer=Tracer()),
+    dict(profiler=Profiler()),
+    ]
+
+## selector dispatch: 0x11111111 returns arg + 1, 0x22222222 returns arg * arg, anything else reverts
+DISPATCH = (
+    "6000 35 60E0 1C"
+    "80 6311111111 14 601F 57"
+    "80 6322222222 14 602E 57"
+    "6000 6000 FD"
+    "5B 6004 35 6001 01 6000 52 6020 6000 F3"
+    "5B 6004 35 80 02 6000 52 6020 6000 F3"
+)
+
+def calls(count: int) -> list:
+    rng = random.Random(count)
+    inputs = [b"", bytes.fromhex("11111111"), bytes.fromhex("22222222") + M.to_bytes(32, "big")]
+
+    while len(inputs) < count:
+        selector = rng.choice(["11111111", "22222222", "33333333"])
+        inputs.append(bytes.fromhex(selector) + rng.getrandbits(256).to_bytes(32, "big"))
+
+    return inputs
+
+def scalar(bytecode: str, calldata: list, gas: int) -> list:
+    code = bytearray.fromhex(bytecode)
+    return [EVMInterpreter().run(Contract(code, data, gas=gas)) for data in calldata]
+
+def batched(bytecode: str, calldata: list, gas: int, min_lanes: int) -> list:
+    return BatchInterpreter(min_lanes=min_lanes).run(Contract(bytearray.fromhex(bytecode), None, gas=gas), calldata)
+
+@pytest.mark.parametrize("bytecode", [
+    DISPATCH,
+    "6000 35 6003 90 04 6000 52 6020 6000 F3", # DIV has no vector handler
+    "6000 35 6020 35 03 6000 35 19 17 6000 35 60FF 1B 18 6000 52 6020 6000 F3", # SUB #NOT #OR #SHL #XOR
+    "6000 35 6020 35 10 6000 35 6020 35 11 6000 52 6020 52 6040 6000 F3", # LT #GT
+    "6000 35 56", # dynamic jump
+    "6000 35 6006 57 00 5B 6001 6000 53 6001 6000 F3", # JUMPI to an invalid destination #MSTORE8
+    "6003 56 5B 00", # static invalid jump
+    ])
+@pytest.mark.parametrize("min_lanes", [1, 1000])
+@pytest.mark.parametrize("gas", [1000000, 30])
+def test_batch_matches_interpreter(bytecode, min_lanes, gas):
+    inputs = calls(40)
+
+    expected = scalar(bytecode, inputs, gas)
+    actual = batched(bytecode, inputs, gas, min_lanes)
+
+    for e, a in zip(expected, actual):
+        assert (e.code, e.data, e.gas_left) == (a.code, a.data, a.gas_left)
+
+def test_batch_dispatch_results():
+    arg = (5).to_bytes(32, "big")
+    inputs = [bytes.fromhex("11111111") + arg, bytes.fromhex("22222222") + arg, bytes.fromhex("33333333") + arg]
+
+    results = batched(DISPATCH, inputs, 1000000, 1)
+
+    assert [r.code for r in results] == [rc.STOPPED, rc.STOPPED, rc.REVERTED]
+    assert results[0].data == (6).to_bytes(32, "big")
+    assert results[1].data == (25).to_bytes(32, "big")
+
+def test_batch_fallback_mid_block_checks_stack():
+    ## SLOAD has no vector handler, so the lanes resume on the scalar interpreter right before it
+    code = bytearray.fromhex("6001 54 01 00 00") # PUSH1 #SLOAD #ADD (underflows) #STOP
+
+    with pytest.raises(StackError):
+        EVMInterpreter().run(Contract(code, b""))
+
+    with pytest.raises(StackError):
+        BatchInterpreter(min_lanes=1).run(Contract(code, b""), [b""] * 2)
+
+@pytest.mark.parametrize("mode", Modes)
+@pytest.mark.parametrize("gas", [1000000, 30])
+def test_batch_fallback_mid_block_gas(mode, gas):
+    ## lanes fall back on the wrapped interpreter at SLOAD, in the middle of the first block
+    code = bytearray.fromhex("6001 6002 54 01 6000 52 6020 6000 F3") # PUSH1 #PUSH1 #SLOAD #ADD #MSTORE #RETURN
+
+    expected = EVMInterpreter(**mode).run(Contract(code, b"", gas=gas))
+    actual = BatchInterpreter(EVMInterpreter(**mode), min_lanes=1).run(Contract(code, b"", gas=gas), [b""] * 2)
+
+    for result in actual:
+        assert (result.code, result.data, result.gas_left) == (expected.code, expected.data, expected.gas_left)
+
+def test_batch_fallback_keeps_call_context():
+    ## SLOAD #POP #ADDRESS #MSTORE #CALLER #MSTORE #ORIGIN #MSTORE #RETURN, falling back at SLOAD
+    code = bytearray.fromhex("6000 54 50 30 6000 52 33 6020 52 32 6040 52 6060 6000 F3")
+
+    expected = EVMInterpreter().run(Contract(code, b"", address=0xAA, caller=0xBB))
+    actual = BatchInterpreter(min_lanes=1).run(Contract(code, None, address=0xAA, caller=0xBB), [b""] * 2)
+
+    for result in actual:
+        assert (result.code, result.data, result.gas_left) == (expected.code, expected.data, expected.gas_left)
+
+def test_batch_lanes_do_not_see_each_other():
+    ## returns SLOAD(0) after SSTOREing its first calldata word there
+    code = bytearray.fromhex("6000 54 6000 35 6000 55 6000 52 6020 6000 F3")
+    interpreter = EVMInterpreter()
+    inputs = [(i + 1).to_bytes(32, "big") for i in range(4)]
+
+    results = BatchInterpreter(interpreter, min_lanes=1).run(Contract(code, None), inputs)
+
+    assert [r.code for r in results] == [rc.STOPPED] * 4
+    assert [r.data for r in results] == [bytes(32)] * 4
+    assert len(interpreter.storage) == 0
+
+def test_batch_empty():
+    assert BatchInterpreter().run(Contract(bytearray.fromhex("00"), None), []) == []
+
+def test_limb_arithmetic():
+    rng = random.Random(7)
+    a_ints = [0, 1, M, 2 ** 128] + [rng.getrandbits(256) for _ in range(60)]
+    b_ints = [M, M, 1, 2 ** 128] + [rng.getrandbits(rng.choice([8, 64, 256])) for _ in range(60)]
+
+    a = np.stack([int_to_limbs(v) for v in a_ints])
+    b = np.stack([int_to_limbs(v) for v in b_ints])
+
+    assert limbs_to_ints(add(a, b)) == [(x + y) & M for x, y in zip(a_ints, b_ints)]
+    assert limbs_to_ints(sub(a, b)) == [(x - y) & M for x, y in zip(a_ints, b_ints)]
+    assert limbs_to_ints(mul(a, b)) == [(x * y) & M for x, y in zip(a_ints, b_ints)]
+    assert list(lt(a, b)) == [x < y for x, y in zip(a_ints, b_ints)]
+
+    for shift in [0, 1, 31, 32, 33, 100, 255, 256]:
+        assert limbs_to_ints(shift_left(a, shift)) == [(x << shift) & M for x in a_ints]
+        assert limbs_to_ints(shift_right(a, shift)) == [x >> shift for x in a_ints]
@@ -0,0 +1,34 @@
+from benchmarks.workloads import workloads
+from benchmarks.runner import Modes, measure, report, compare
+from vm.constants import ReturnCode as rc
+
+import pytest
+
+"""
+NOTE: Smoke tests only, every workload has to run to completion in every mode
+"""
+
+@pytest.mark.parametrize("mode", list(Modes))
+def test_workloads_complete(mode):
+    for workload in workloads(iterations=3):
+        result = workload.prepare(**Modes[mode])()
+        assert result.code == rc.STOPPED, workload.name
+
+def test_erc20_transfer_moves_balance():
+    transfer = [w for w in workloads() if w.name == "erc20_transfer"][0]
+    result = transfer.prepare()()
+
+    assert result.code == rc.STOPPED
+    assert int.from_bytes(bytes(result.data), "big") == 1 # returns true
+    assert len(result.logs) == 1 # Transfer event
+
+def test_compare_flags_slowdowns():
+    suite = [w for w in workloads(iterations=3) if w.name == "counting_loop"]
+    baseline = report(measure(suite, {"fused": {}}, repeat=1))
+
+    current = report(measure(suite, {"fused": {}}, repeat=1))
+    current["results"]["counting_loop"]["modes"]["fused"]["ns_per_op"] = baseline["results"]["counting_loop"]["modes"]["fused"]["ns_per_op"] * 2
+
+    assert current["results"]["counting_loop"]["instructions"] == 3 * 7 + 3
+    assert compare(current, baseline) == [("counting_loop", "fused", baseline["results"]["counting_loop"]["modes"]["fused"]["ns_per_op"], current["results"]["counting_loop"]["modes"]["fused"]["ns_per_op"])]
+    assert compare(baseline, baseline) == []
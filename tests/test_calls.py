@@ -0,0 +1,142 @@
+from vm.interpreter import EVMInterpreter
+from vm.contract import Contract
+from vm.tracer import Tracer
+from vm.profiler import Profiler
+from vm.storage import MemoryStorage
+from vm.state import Account
+from vm.frames import create_address, create2_address
+from vm.constants import ReturnCode as rc
+
+import pytest
+
+Modes = [
+    dict(),
+    dict(fuse=False),
+    dict(compile_blocks=True),
+    dict(tracer=Tracer()),
+    dict(profiler=Profiler()),
+    ]
+
+CALLER, CALLEE = 0xAA, 0xCC
+
+RETURNS_42 = "602A 6000 52 6020 6000 F3"
+## SSTORE CALLER at slot 0, then REVERT with 1 byte of data
+STORES_AND_REVERTS = "33 6000 55 6001 6000 FD"
+## SSTORE CALLER at slot 0 and STOP
+STORES_CALLER = "33 6000 55 00"
+
+def execute(bytecode: str, callee: str, mode: dict, gas: int=1000000, value: int=0):
+    backend = MemoryStorage()
+    accounts = {CALLEE: Account(code=bytes.fromhex(callee.replace(" ", "")))}
+    interpreter = EVMInterpreter(storage=backend, accounts=accounts, **mode)
+
+    contract = Contract(bytearray.fromhex(bytecode), None, value=value, gas=gas, address=CALLER, caller=0x11)
+    result = interpreter.run(contract)
+    stack = interpreter.scope_ctx.stack
+
+    return result, stack.stack[:stack.count], backend, accounts, interpreter
+
+def call(opcode: str, value: bool=True) -> str:
+    """ Calls CALLEE with no input and a 32 byte output buffer at 0 """
+    return "6020 6000 6000 6000" + (" 6000" if value else "") + " 60CC 5A " + opcode
+
+@pytest.mark.parametrize("mode", Modes)
+def test_call_returns_data(mode):
+    result, stack, *_ = execute(call("F1") + " 6000 51 3D 00", RETURNS_42, mode) # CALL #MLOAD #RETURNDATASIZE
+
+    assert result.code == rc.STOPPED
+    assert stack == [1, 42, 32]
+
+@pytest.mark.parametrize("mode", Modes)
+def test_call_revert_rolls_back(mode):
+    result, stack, backend, *_ = execute(call("F1") + " 3D 00", STORES_AND_REVERTS, mode)
+
+    assert result.code == rc.STOPPED
+    assert stack == [0, 1]
+    assert len(backend) == 0
+
+@pytest.mark.parametrize("mode", Modes)
+def test_call_writes_callee_storage(mode):
+    _, stack, backend, *_ = execute(call("F1") + " 00", STORES_CALLER, mode)
+
+    assert stack == [1]
+    assert backend.get(CALLEE, 0) == CALLER
+
+@pytest.mark.parametrize("mode", Modes)
+def test_delegatecall_uses_caller_context(mode):
+    _, stack, backend, *_ = execute(call("F4", value=False) + " 00", STORES_CALLER, mode)
+
+    assert stack == [1]
+    assert backend.get(CALLER, 0) == 0x11; "Ensuring storage and CALLER are the delegating frame's"
+    assert backend.get(CALLEE, 0) == 0
+
+    ## the inherited value moves no wei, so an unfunded caller can still delegate
+    _, stack, backend, *_ = execute(call("F4", value=False) + " 00", STORES_CALLER, mode, value=100)
+
+    assert stack == [1]
+    assert backend.get(CALLER, 0) == 0x11
+
+@pytest.mark.parametrize("mode", Modes)
+def test_staticcall_forbids_writes(mode):
+    _, stack, backend, *_ = execute(call("FA", value=False) + " 00", STORES_CALLER, mode)
+    assert stack == [0]
+    assert len(backend) == 0
+
+    _, stack, *_ = execute(call("FA", value=False) + " 6000 51 00", RETURNS_42, mode)
+    assert stack == [1, 42]
+
+@pytest.mark.parametrize("mode", Modes)
+def test_call_transfers_value(mode):
+    accounts = {CALLER: Account(balance=100), CALLEE: Account()}
+    interpreter = EVMInterpreter(accounts=accounts, **mode)
+
+    ## CALL CALLEE with 30 wei, then try 1000 wei
+    code = "6000 6000 6000 6000 601E 60CC 5A F1 6000 6000 6000 6000 6103E8 60CC 5A F1 00"
+    result = interpreter.run(Contract(bytearray.fromhex(code), None, address=CALLER))
+    stack = interpreter.scope_ctx.stack
+
+    assert result.code == rc.STOPPED
+    assert stack.stack[:stack.count] == [1, 0]
+    assert accounts[CALLER].balance == 70 and accounts[CALLEE].balance == 30
+
+@pytest.mark.parametrize("mode", Modes)
+def test_create(mode):
+    runtime = RETURNS_42.replace(" ", "")
+    init = f"69{runtime}" + "6000 52 600A 6016 F3".replace(" ", "") # MSTORE the 10 byte runtime code and RETURN it
+
+    ## MSTORE the 19 byte init code right aligned at 0, CREATE2 from it with salt 7, then CREATE
+    bytecode = f"72{init} 6000 52 6007 6013 600D 6000 F5 6013 600D 6000 F0 00"
+    result, stack, _, accounts, _ = execute(bytecode, "", mode)
+
+    assert result.code == rc.STOPPED
+    created2, created = stack
+    assert created2 == create2_address(CALLER, 7, bytes.fromhex(init))
+    assert created == create_address(CALLER, 1)
+    assert accounts[created].code == bytes.fromhex(runtime) and accounts[created].nonce == 1
+    assert accounts[CALLER].nonce == 2
+
+@pytest.mark.parametrize("mode", Modes)
+def test_call_depth_limit(mode):
+    ## increments slot 0 then CALLs itself with all available gas
+    code = bytes.fromhex("6000 54 6001 01 6000 55 6000 6000 6000 6000 6000 30 5A F1 00".replace(" ", ""))
+    backend = MemoryStorage()
+    interpreter = EVMInterpreter(storage=backend, accounts={CALLER: Account(code=code)}, **mode)
+
+    result = interpreter.run(Contract(code, None, gas=10 ** 30, address=CALLER))
+
+    assert result.code == rc.STOPPED
+    assert backend.get(CALLER, 0) == 1025; "Ensuring the root frame plus 1024 nested frames ran"
+
+@pytest.mark.parametrize("mode", Modes)
+def test_frames_reused(mode):
+    ## ten sequential calls share one pooled context
+    _, stack, _, _, interpreter = execute(" ".join([call("F1")] * 10) + " 00", RETURNS_42, mode)
+
+    assert stack == [1] * 10
+    assert interpreter.pool.allocations == 2
+
+@pytest.mark.parametrize("mode", Modes)
+def test_subcall_stack_underflow_fails_call(mode):
+    _, stack, *_ = execute(call("F1") + " 00", "01", mode) # callee runs ADD on an empty stack
+
+    assert stack == [0]
@@ -0,0 +1,142 @@
+from vm.interpreter import EVMInterpreter
+from vm.contract import Contract
+from vm.analysis import CodeCache, CodeAnalysis, use_code_cache
+from vm.codestore import CodeStore, Header
+from vm.keccak import keccak256
+from vm.parallel import run_many
+import vm.analysis
+
+import os
+import threading
+import time
+import pytest
+
+## counting loop from 10 down to 0, then returns the GAS left as a word
+LOOP = bytes.fromhex("600A 5B 6001 90 03 80 6002 57 5A 6000 52 6020 6000 F3".replace(" ", ""))
+
+@pytest.fixture
+def cache():
+    previous = vm.analysis.AnalysisCache
+    yield
+    use_code_cache(previous)
+
+def test_lru_eviction():
+    lru = CodeCache(capacity=2)
+    codes = [bytes([0x60, i, 0x00]) for i in range(3)]
+
+    for code in codes[:2]:
+        lru.get(keccak256(code), code)
+    lru.get(keccak256(codes[0]), codes[0]) ## codes[1] is now the least recently used
+    lru.get(keccak256(codes[2]), codes[2])
+
+    assert keccak256(codes[0]) in lru and keccak256(codes[2]) in lru
+    assert keccak256(codes[1]) not in lru
+    assert (lru.hits, lru.misses) == (1, 3)
+
+def test_store_round_trip(tmp_path):
+    path = str(tmp_path / "codes.bin")
+    code_hash = keccak256(LOOP)
+
+    store = CodeStore(path)
+    fresh = CodeCache(store=store).get(code_hash, LOOP)
+    store.close()
+
+    restored = CodeStore(path).load(code_hash, LOOP)
+    expected = CodeAnalysis(code_hash, LOOP)
+
+    assert fresh.block_gas is not None
+    assert restored.blocks == expected.blocks
+    assert bytes(restored.jumpdests) == bytes(expected.jumpdests)
+    assert restored.block_gas == fresh.block_gas
+    assert restored.valid_jumpdest(2) and not restored.valid_jumpdest(3)
+
+    ## a different code with a colliding hash entry (wrong size) is never trusted
+    assert CodeStore(path).load(code_hash, LOOP + b"\x00") is None
+
+@pytest.mark.parametrize("mode", [dict(), dict(fuse=False), dict(compile_blocks=True)])
+def test_warm_start_executes_identically(tmp_path, cache, mode):
+    path = str(tmp_path / "codes.bin")
+    expected = EVMInterpreter(**mode).run(Contract(bytearray(LOOP), None))
+
+    use_code_cache(CodeCache(store=CodeStore(path)))
+    EVMInterpreter(**mode).run(Contract(bytearray(LOOP), None))
+
+    ## a restarted process: empty memory cache, analyses come from disk
+    store = CodeStore(path)
+    use_code_cache(CodeCache(store=store))
+    contract = Contract(bytearray(LOOP), None)
+    result = EVMInterpreter(**mode).run(contract)
+
+    assert len(store) == 1
+    assert isinstance(contract.analysis.jumpdests, memoryview)
+    assert (result.code, bytes(result.data)) == (expected.code, bytes(expected.data))
+
+def test_truncated_record_is_dropped(tmp_path):
+    path = str(tmp_path / "codes.bin")
+    other = bytes.fromhex("6001600201 00".replace(" ", ""))
+
+    store = CodeStore(path)
+    store.save(CodeAnalysis(keccak256(LOOP), LOOP), LOOP)
+    store.close()
+
+    with open(path, "ab") as f:
+        f.write(Header.pack(keccak256(other), len(other), 1, 5, 5)) ## header without a body
+
+    store = CodeStore(path)
+    assert len(store) == 1
+
+    store.save(CodeAnalysis(keccak256(other), other), other)
+    store.close()
+
+    assert len(CodeStore(path)) == 2
+    assert CodeStore(path).load(keccak256(other), other) is not None
+
+def test_open_waits_for_appends_in_progress(tmp_path):
+    path = str(tmp_path / "codes.bin")
+    CodeStore(path).close()
+
+    ## a peer process halfway through appending a record, holding the store's lock
+    peer = CodeStore(path)
+    analysis = CodeAnalysis(keccak256(LOOP), LOOP)
+    record = Header.pack(analysis.code_hash, len(LOOP), len(analysis.jumpdests), 0, 0) + bytes(analysis.jumpdests)
+
+    opened: list = []
+    with peer.locked():
+        os.write(peer.fd, record[:10])
+
+        opener = threading.Thread(target=lambda: opened.append(CodeStore(path)))
+        opener.start()
+        time.sleep(0.05)
+        assert opener.is_alive()
+
+        os.write(peer.fd, record[10:])
+
+    opener.join()
+    assert opened[0].load(analysis.code_hash, LOOP) is not None
+
+def test_appends_become_visible_on_lookup(tmp_path):
+    path = str(tmp_path / "codes.bin")
+    reader, writer = CodeStore(path), CodeStore(path)
+    code_hash = keccak256(LOOP)
+
+    writer.save(CodeAnalysis(code_hash, LOOP), LOOP)
+
+    assert code_hash not in reader
+    assert reader.load(code_hash, LOOP) is not None
+    assert writer.load(code_hash, LOOP) is not None
+
+def test_rejects_foreign_files(tmp_path):
+    path = tmp_path / "other.bin"
+    path.write_bytes(b"not a code store")
+
+    with pytest.raises(ValueError):
+        CodeStore(str(path))
+
+def test_workers_share_the_store(tmp_path):
+    path = str(tmp_path / "codes.bin")
+    calls = [(LOOP, None)] * 4
+
+    results = run_many(calls, workers=2, code_store=path)
+
+    assert len(CodeStore(path)) == 1
+    assert len({(r.code, bytes(r.data)) for r in results}) == 1
@@ -0,0 +1,55 @@
+from vm.interpreter import EVMInterpreter
+from vm.contract import Contract
+from vm.compiler import compiled
+from vm.constants import ReturnCode as rc
+
+import pytest
+
+"""
+NOTE: Compiled blocks are validated differentially against the decoded interpreter
+"""
+
+def execute(bytecode: str, compile_blocks: bool, calldata: str=""):
+    contract = Contract(bytearray.fromhex(bytecode), bytes.fromhex(calldata))
+    interpreter = EVMInterpreter(compile_blocks=compile_blocks)
+
+    result = interpreter.run(contract)
+    stack = interpreter.scope_ctx.stack
+
+    return result, stack.stack[:stack.count]
+
+@pytest.mark.parametrize("bytecode,calldata", [
+    ("6080 6040 01 00", ""), # PUSH1 0x80 #PUSH1 0x40 #ADD #STOP
+    ("6001 6001 01 6002 03 00", ""), # (1+1) - 2
+    ("6050 60A0 16 6050 60A0 17 6050 60A0 18 6050 19 00", ""), # AND #OR #XOR #NOT
+    ("600A 5B 6001 90 03 80 6002 57 00", ""), # counting loop from 10 down to 0
+    ("6001 6002 6003 6004 82 91 50 80 00", ""), # DUP3 #SWAP2 #POP #DUP1
+    ("6000 35 6000 35 14 6010 57 6001 00 5B 6002 00", "00000000000000000000000000000000000000000000000000000000000000AA"), # CALLDATALOAD #EQ #JUMPI
+    ("6042 6000 52 6000 51 6001 01 00", ""), # MSTORE #MLOAD #ADD (handler calls inside a block)
+    ("6003 6004 6008 56 01 5b 02 00", ""), # jump over ADD
+    ("6004 56 605B 00", ""), # constant invalid jump destination
+    ("6000 35 56 00", ""), # dynamic invalid jump destination
+    ("600A 6000 52 6000 51 56 00 5B 6001 00", ""), # dynamic JUMP right after a handler call
+    ("6001 6000 0C", ""), # unassigned opcode
+    ("58 6003 58 00", ""), # PC
+    ])
+def test_compiled_matches_interpreter(bytecode, calldata):
+    expected_result, expected_stack = execute(bytecode, False, calldata)
+    actual_result, actual_stack = execute(bytecode, True, calldata)
+
+    assert expected_result.code == actual_result.code
+    assert expected_stack == actual_stack
+
+def test_compiled_stack_underflow():
+    from vm.stack import StackError
+
+    with pytest.raises(StackError):
+        execute("6001 01 00", True) # PUSH1 0x01 #ADD
+
+def test_compiled_stream_cached():
+    code = bytearray.fromhex("600A 5B 6001 90 03 80 6002 57 00")
+
+    stream = compiled(Contract(code, None))
+
+    assert compiled(Contract(bytearray(code), None)) is stream
+    assert stream[0][2] == 2 and stream[2][2] == 11; "Ensuring block leaders map to their block end"
@@ -0,0 +1,54 @@
+from vm.interpreter import EVMInterpreter
+from vm.contract import Contract
+from vm.decoder import metered, sequence_profile
+
+import pytest
+
+"""
+NOTE: Fused streams are validated differentially against the unfused interpreter
+"""
+
+def execute(bytecode: str, fuse: bool, calldata: str=""):
+    contract = Contract(bytearray.fromhex(bytecode), bytes.fromhex(calldata))
+    interpreter = EVMInterpreter(fuse=fuse)
+
+    result = interpreter.run(contract)
+    stack = interpreter.scope_ctx.stack
+
+    return result, stack.stack[:stack.count]
+
+@pytest.mark.parametrize("bytecode,calldata", [
+    ("6001 6002 01 00", ""), # PUSH PUSH ADD
+    ("6001 6002 6003 01 00", ""), # PUSH (PUSH PUSH ADD)
+    ("6005 6001 01 6002 01 00", ""), # PUSH PUSH ADD PUSH ADD
+    ("6001 6002 6003 6004 6009 92 50 00", ""), # PUSH SWAP3 POP
+    ("6001 6002 6003 91 50 00", ""), # SWAP2 POP
+    ("6004 56 00 5B 6007 00", ""), # PUSH JUMP
+    ("6005 56 00 5B 6007 00", ""), # PUSH JUMP (invalid destination)
+    ("6001 6006 57 00 00 00 5B 00", ""), # PUSH JUMPI (taken)
+    ("6000 6006 57 00 00 00 5B 00", ""), # PUSH JUMPI (not taken)
+    ("6000 15 6007 57 00 00 5B 00", ""), # ISZERO PUSH JUMPI
+    ("6000 6000 81 15 6009 57 00 5B 00", ""), # DUP2 ISZERO PUSH JUMPI
+    ("6000 35 80 15 6009 57 00 5B 00", "01"), # CALLDATALOAD DUP1 ISZERO PUSH JUMPI (not taken)
+    ("600A 5B 6001 90 03 80 6002 57 00", ""), # counting loop
+    ])
+def test_fused_matches_unfused(bytecode, calldata):
+    expected_result, expected_stack = execute(bytecode, False, calldata)
+    actual_result, actual_stack = execute(bytecode, True, calldata)
+
+    assert expected_result.code == actual_result.code
+    assert expected_stack == actual_stack
+
+def test_fused_stream():
+    contract = Contract(bytearray.fromhex("6001 6002 01 5B 6003 01 00"), None)
+    stream = metered(contract)
+
+    assert stream[0][2] == 5; "Ensuring PUSH PUSH ADD dispatches once"
+    assert stream[2][2] == 4; "Ensuring fused interior entries are kept"
+    assert stream[6][2] == 9; "Ensuring fusion does not cross a JUMPDEST"
+
+def test_sequence_profile():
+    counts = sequence_profile([bytes.fromhex("6001 6002 01 6003 01 00".replace(" ", ""))], 2)
+
+    assert counts[("PUSH", "ADD")] == 2
+    assert counts[("PUSH", "PUSH")] == 1
@@ -0,0 +1,73 @@
+from vm.interpreter import EVMInterpreter
+from vm.contract import Contract
+from vm.tracer import Tracer
+from vm.profiler import Profiler
+from vm.constants import ReturnCode as rc
+from vm.gas import sstore_gas
+
+import pytest
+
+"""
+NOTE: Every case is executed in each interpreter mode, which must agree on gas
+"""
+
+Modes = [
+    dict(),
+    dict(fuse=False),
+    dict(compile_blocks=True),
+    dict(tracer=Tracer()),
+    dict(profiler=Profiler()),
+    ]
+
+def execute(bytecode: str, gas: int, **mode):
+    contract = Contract(bytearray.fromhex(bytecode), None, gas=gas)
+    interpreter = EVMInterpreter(**mode)
+
+    return interpreter.run(contract), interpreter
+
+@pytest.mark.parametrize("mode", Modes)
+@pytest.mark.parametrize("bytecode,gas_used", [
+    ("6001 6002 01 00", 9), # PUSH1 #PUSH1 #ADD #STOP
+    ("6001 6000 52 00", 12), # PUSH1 #PUSH1 #MSTORE (1 word of memory) #STOP
+    ("6001 6040 52 00", 18), # PUSH1 #PUSH1 #MSTORE (3 words of memory) #STOP
+    ("6002 6003 0A 00", 66), # PUSH1 #PUSH1 #EXP (1 byte exponent) #STOP
+    ("6040 6000 20 00", 54), # PUSH1 #PUSH1 #SHA3 (2 words) #STOP
+    ("6003 56 5B 00", 12), # PUSH1 #JUMP #JUMPDEST #STOP
+    ("6000 6000 FD", 6), # PUSH1 #PUSH1 #REVERT
+    ])
+def test_gas_used(bytecode, gas_used, mode):
+    result, _ = execute(bytecode, 1000, **mode)
+
+    assert result.gas_left == 1000 - gas_used
+
+@pytest.mark.parametrize("mode", Modes)
+@pytest.mark.parametrize("bytecode,gas", [
+    ("6001 6002 01 00", 8), # static cost exceeds gas
+    ("6001 6040 52 00", 17), # memory expansion exceeds gas
+    ("7FFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFF 51 00", 1000000), # MLOAD at 2**256-1
+    ("600A 5B 6001 90 03 80 6002 57 00", 100), # loop runs out of gas
+    ])
+def test_out_of_gas(bytecode, gas, mode):
+    result, _ = execute(bytecode, gas, **mode)
+
+    assert result.code == rc.OUT_OF_GAS
+    assert result.gas_left == 0
+
+@pytest.mark.parametrize("mode", Modes)
+def test_gas_opcode(mode):
+    _, interpreter = execute("6001 5A 6001 00", 100, **mode) # PUSH1 #GAS #PUSH1 #STOP
+
+    interpreter.scope_ctx.stack.pop()
+    assert interpreter.scope_ctx.stack.pop() == 100 - 3 - 2
+
+@pytest.mark.parametrize("original,current,new,expected", [
+    (0, 0, 0, (800, 0)), # no-op
+    (0, 0, 1, (20000, 0)), # fresh slot
+    (1, 1, 2, (5000, 0)), # fresh update
+    (1, 1, 0, (5000, 15000)), # fresh clear
+    (1, 2, 1, (800, 4200)), # dirty reset to original
+    (0, 1, 0, (800, 19200)), # dirty set then cleared
+    (1, 0, 2, (800, -15000)), # dirty cleared then re-set
+    ])
+def test_sstore_gas(original, current, new, expected):
+    assert sstore_gas(original, current, new) == expected
@@ -1,6 +1,8 @@
 from vm.interpreter import EVMInterpreter
 from vm.contract import Contract
 from vm.constants import ReturnCode as rc
+from vm.tracer import Tracer
+from vm.decoder import decoded
 
 import pytest
 
@@ -87,17 +89,17 @@ def test_interpreter_arithmetic_2():
         #16 MULMOD
         #18 STOP
     """
-    #NOTE: ADDMOD(2,3,2) -> EXP (x, 6) -> MULMOD(x,4,3) -> DIV(x,2) = 1/2
+    #NOTE: ADDMOD(2,3,2) -> EXP (x, 6) -> MULMOD(x,4,3) -> DIV(x,2) = 0 (integer division)
     result = bytearray.fromhex("6002 6003 6004 6006 6002 6003 6002 08 0A 09 04 00")
     
     contract = Contract(result, None)
     interpreter = EVMInterpreter()
     interpreter.run(contract)
 
-    expected = (1/2)
+    expected = 0
     actual = interpreter.scope_ctx.stack.pop()
 
-    assert expected == actual; "Ensuring resultant stack value is (1/2)"
+    assert expected == actual; "Ensuring resultant stack value is 0"
 def test_interpreter_arithmetic_2():
     """
     ASSEMBLY VIEW:
@@ -113,14 +115,14 @@ def test_interpreter_arithmetic_2():
         #16 MULMOD
         #18 STOP
     """
-    #NOTE: ADDMOD(2,3,2) -> EXP (x, 6) -> MULMOD(x,4,3) -> DIV(x,2) = 1/2
+    #NOTE: ADDMOD(2,3,2) -> EXP (x, 6) -> MULMOD(x,4,3) -> DIV(x,2) = 0 (integer division)
     result = bytearray.fromhex("6002 6003 6004 6006 6002 6003 6002 08 0A 09 04 00")
     
     contract = Contract(result, None)
     interpreter = EVMInterpreter()
     interpreter.run(contract)
 
-    assert interpreter.scope_ctx.stack.pop() == (1/2); "Ensuring resultant stack value is (1/2)"
+    assert interpreter.scope_ctx.stack.pop() == 0; "Ensuring resultant stack value is 0"
 
 @pytest.mark.parametrize("opcode,expected", [
     ("16", 0b00000000), # AND
@@ -153,7 +155,7 @@ def test_bitwise(opcode, expected):
     ## SAR ##
     ("60FF 6002 1D", 0x3F), #PUSH1 0xFF #PUSH1 0x02 #SAR #STOP
     ("7F9d10a14bbcf24a02577408aadba99177cd90328457cb54f402384c7f0fe45e3860021D00", 0xe7442852ef3c928095dd022ab6ea645df3640ca115f2d53d008e131fc3f9178e), #PUSH32 VAL #PUSH1 0x02 #SAR #STOP
-    # ("7F 9d10a14bbcf24a02577408aadba99177cd90328457cb54f402384c7f0fe45e38 7F FFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFF 1D 00", 0xffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffff), #PUSH32 VAL #PUSH32 MAX #SHL STOP
+    ("7F 9d10a14bbcf24a02577408aadba99177cd90328457cb54f402384c7f0fe45e38 7F FFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFF 1D 00", 0xffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffff), #PUSH32 VAL #PUSH32 MAX #SAR STOP
    
 
     ## SHR ##
@@ -161,6 +163,21 @@ def test_bitwise(opcode, expected):
     ("7F9d10a14bbcf24a02577408aadba99177cd90328457cb54f402384c7f0fe45e3860021C00", 0x27442852ef3c928095dd022ab6ea645df3640ca115f2d53d008e131fc3f9178e),
 
     ## BYTE ##
+    ("61ABCD 601E 1A 00", 0xAB), #PUSH2 0xABCD #PUSH1 30 #BYTE #STOP
+    ("61ABCD 6020 1A 00", 0x0), #PUSH2 0xABCD #PUSH1 32 #BYTE #STOP
+
+    ## SIGNEXTEND ##
+    ("60FF 6000 0B 00", 0xffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffff), #PUSH1 0xFF #PUSH1 0x00 #SIGNEXTEND #STOP
+    ("617F7F 6000 0B 00", 0x7F), #PUSH2 0x7F7F #PUSH1 0x00 #SIGNEXTEND #STOP
+
+    ## SDIV / SMOD ##
+    ("6002 7FFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFF8 05 00", 0xfffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffc), #PUSH1 2 #PUSH32 -8 #SDIV #STOP
+    ("6003 7FFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFF8 07 00", 0xfffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffe), #PUSH1 3 #PUSH32 -8 #SMOD #STOP
+    ("6000 6008 05 00", 0x0), #PUSH1 0 #PUSH1 8 #SDIV #STOP (division by zero)
+    ("6000 6008 04 00", 0x0), #PUSH1 0 #PUSH1 8 #DIV #STOP (division by zero)
+
+    ## EXP ##
+    ("61FFFF 6002 0A 00", 0x0), #PUSH2 0xFFFF #PUSH1 2 #EXP #STOP (wraps modulo 2**256)
 
     ## ADD ##
     ("7Fbc1c7dbabce9e9a36f2acceef73fc799d544e557e0c8073d80f3b9ca484dddf67Fbc1c7dbabce9e9a36f2acceef73fc799d544e557e0c8073d80f3b9ca484dddf60100", 0x7838fb7579d3d346de5599ddee7f8f33aa89caafc1900e7b01e77394909bbbec),
@@ -336,6 +353,8 @@ def test_jump_conditional_1():
     ("6001 6002 11 00", 1),
 
     # SGT (0x13) #
+    ("6001 7FFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFF 13 00", 0),
+    ("7FFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFF 6001 13 00", 1),
 
     # # EQ (0x14) #
     ("6012 6012 14 00", 1),
@@ -346,6 +365,8 @@ def test_jump_conditional_1():
     ("6001 6002 11 00", 1),
 
     # SLT (0x12) #
+    ("6001 7FFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFF 12 00", 1),
+    ("7FFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFF 6001 12 00", 0),
 
     # ISZERO (0x15) #
     ("6000 15 00", 1),
@@ -363,17 +384,17 @@ def test_conditionals(bytecode, expected):
 
 @pytest.mark.parametrize("bytecode,expected_code,callvalue,calldata", [
     # taken from https://github.com/fvictorio/evm-puzzles
-    ("3456FDFDFDFDFDFD5B00", rc.STOPPED, 0x08, 0x0), 
-    ("34380356FDFD5B00FDFD", rc.STOPPED, 0x04, 0x0),
-    ("3656FDFD5B00", rc.STOPPED, 0x0, 0x11111111),
-    ("34381856FDFDFDFDFDFD5B00", rc.STOPPED, 0x06, 0x0),
-    ("34800261010014600C57FDFD5B00FDFD", rc.STOPPED, 0x10, 0x0),
-    ("60003556FDFDFDFDFDFD5B00", rc.STOPPED, 0x0, 0x000000000000000000000000000000000000000000000000000000000000000A),
+    ("3456FDFDFDFDFDFD5B00", rc.STOPPED, 0x08, ""), 
+    ("34380356FDFD5B00FDFD", rc.STOPPED, 0x04, ""),
+    ("3656FDFD5B00", rc.STOPPED, 0x0, "11111111"),
+    ("34381856FDFDFDFDFDFD5B00", rc.STOPPED, 0x06, ""),
+    ("34800261010014600C57FDFD5B00FDFD", rc.STOPPED, 0x10, ""),
+    ("60003556FDFDFDFDFDFD5B00", rc.STOPPED, 0x0, "000000000000000000000000000000000000000000000000000000000000000A"),
     ])
 def test_evm_puzzles(bytecode, expected_code, callvalue, calldata):
     result = bytearray.fromhex(bytecode)
 
-    contract = Contract(result, bytearray(calldata), callvalue)
+    contract = Contract(result, bytes.fromhex(calldata), callvalue)
     interpreter = EVMInterpreter()
 
     ce = interpreter.run(contract)
@@ -381,3 +402,174 @@ def test_evm_puzzles(bytecode, expected_code, callvalue, calldata):
 
     assert expected_code == actual_code
 
+
+@pytest.mark.parametrize("bytecode,expected_code", [
+    ("6001 0C 00", rc.INVALID), # PUSH1 0x01 #UNASSIGNED(0x0C) #STOP
+    ("6001 FE 00", rc.INVALID), # PUSH1 0x01 #INVALID #STOP
+    ("6001 42 00", rc.INVALID), # PUSH1 0x01 #TIMESTAMP (unsupported) #STOP
+    ("6000 6000 FD", rc.REVERTED), # PUSH1 0x00 #PUSH1 0x00 #REVERT
+    ("6001", rc.STOPPED), # PUSH1 0x01 #(implicit STOP)
+    ])
+def test_halting(bytecode, expected_code):
+    result = bytearray.fromhex(bytecode)
+
+    contract = Contract(result, None)
+    interpreter = EVMInterpreter()
+    ce = interpreter.run(contract)
+
+    assert expected_code == ce.code
+
+def test_tracer_opt_in(capsys):
+    class RecordingTracer(Tracer):
+        def __init__(self):
+            self.steps, self.result = [], None
+
+        def capture_state(self, pc, op, ctx):
+            self.steps.append((pc, op))
+
+        def capture_end(self, result):
+            self.result = result
+
+    result = bytearray.fromhex("6003 6004 01 00")
+
+    EVMInterpreter().run(Contract(result, None))
+    assert capsys.readouterr().out == ""; "Ensuring untraced execution performs no I/O"
+
+    tracer = RecordingTracer()
+    EVMInterpreter(tracer=tracer).run(Contract(result, None))
+
+    assert tracer.steps == [(0, 0x60), (2, 0x60), (4, 0x01), (5, 0x00)]
+    assert tracer.result.code == rc.STOPPED
+
+@pytest.mark.parametrize("bytecode,expected_stack", [
+    ("6001 6002 90 00", [1,2]), # SWAP1
+    ("6001 6002 6003 91 00", [1,2,3]), # SWAP2
+    ("6001 6002 6003 6004 6005 6006 6007 6008 6009 600A 600B 600C 600D 600E 600F 6010 6011 9F 00", [1,16,15,14,13,12,11,10,9,8,7,6,5,4,3,2,17]), # SWAP16
+    ("6001 6002 50 00", [1]), # POP
+    ])
+def test_swaps(bytecode, expected_stack: list):
+    result = bytearray.fromhex(bytecode)
+
+    contract = Contract(result, None)
+    interpreter = EVMInterpreter()
+    interpreter.run(contract)
+
+    while interpreter.scope_ctx.stack.count != 0:
+        assert expected_stack.pop(0) == interpreter.scope_ctx.stack.pop()
+
+@pytest.mark.parametrize("bytecode,expected", [
+    ("6042 6020 52 6020 51 00", 0x42), # PUSH1 0x42 #PUSH1 0x20 #MSTORE #PUSH1 0x20 #MLOAD #STOP
+    ("60FF 6001 53 6000 51 00", 0xFF << 240), # PUSH1 0xFF #PUSH1 0x01 #MSTORE8 #PUSH1 0x00 #MLOAD #STOP
+    ("6001 6040 52 59 00", 0x60), # PUSH1 0x01 #PUSH1 0x40 #MSTORE #MSIZE #STOP
+    ("59 00", 0x0), # MSIZE #STOP
+    ("6000 6000 20 00", 0xc5d2460186f7233c927e7db2dcc703c0e500b653ca82273b7bfad8045d85a470), # PUSH1 0x00 #PUSH1 0x00 #SHA3 #STOP
+    ])
+def test_memory_ops(bytecode, expected):
+    result = bytearray.fromhex(bytecode)
+
+    contract = Contract(result, None)
+    interpreter = EVMInterpreter()
+    interpreter.run(contract)
+
+    assert interpreter.scope_ctx.stack.pop() == expected
+
+def test_return_data():
+    """
+    ASSEMBLY VIEW:
+    #0  PUSH2 0xBEEF
+    #3  PUSH1 0x00
+    #5  MSTORE
+    #6  PUSH1 0x02
+    #8  PUSH1 0x1E
+    #10 RETURN
+    """
+    result = bytearray.fromhex("61BEEF 6000 52 6002 601E F3")
+
+    ce = EVMInterpreter().run(Contract(result, None))
+
+    assert ce.code == rc.STOPPED
+    assert ce.data == b"\xbe\xef"
+
+def test_calldatacopy():
+    """
+    ASSEMBLY VIEW:
+    #0 PUSH1 0x04
+    #2 PUSH1 0x02
+    #4 PUSH1 0x00
+    #6 CALLDATACOPY
+    #7 PUSH1 0x00
+    #9 MLOAD
+    #10 STOP
+    """
+    result = bytearray.fromhex("6004 6002 6000 37 6000 51 00")
+
+    interpreter = EVMInterpreter()
+    interpreter.run(Contract(result, bytes.fromhex("AABBCCDD")))
+
+    assert interpreter.scope_ctx.stack.pop() == 0xCCDD0000 << 224
+
+@pytest.mark.parametrize("bytecode,calldata,expected", [
+    ("36 00", "AABBCCDD", 4), # CALLDATASIZE
+    ("36 00", "", 0), # CALLDATASIZE of empty calldata
+    ("6000 35 00", "AABBCCDD", 0xAABBCCDD << 224), # CALLDATALOAD zero padded
+    ("6002 35 00", "AABBCCDD", 0xCCDD << 240), # CALLDATALOAD at an offset
+    ("7FFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFF 35 00", "AABBCCDD", 0), # CALLDATALOAD past the end
+    ])
+def test_calldata(bytecode, calldata, expected):
+    interpreter = EVMInterpreter()
+    interpreter.run(Contract(bytearray.fromhex(bytecode), bytes.fromhex(calldata)))
+
+    assert interpreter.scope_ctx.stack.pop() == expected
+
+def test_calldatacopy_overwrites_with_padding():
+    """ MSTORE 0xFF.. at 0, then CALLDATACOPY 4 bytes from offset 2 (2 real bytes, 2 zero bytes) into 0 """
+    result = bytearray.fromhex("7F" + "FF" * 32 + " 6000 52 6004 6002 6000 37 6000 51 00")
+
+    interpreter = EVMInterpreter()
+    interpreter.run(Contract(result, bytes.fromhex("AABBCCDD")))
+
+    assert interpreter.scope_ctx.stack.pop() == (0xCCDD0000 << 224) | ((1 << 224) - 1)
+
+@pytest.mark.parametrize("bytecode,expected_code", [
+    ("6004 56 605B 00", rc.INVALID_JUMP), # PUSH1 0x04 #JUMP #PUSH1 0x5B #STOP (destination is PUSH data)
+    ("6001 6007 57 00", rc.INVALID_JUMP), # PUSH1 0x01 #PUSH1 0x07 #JUMPI #STOP (destination out of bounds)
+    ("6000 6007 57 00", rc.STOPPED), # PUSH1 0x00 #PUSH1 0x07 #JUMPI #STOP (branch not taken)
+    ("6003 56 5B 00", rc.STOPPED), # PUSH1 0x03 #JUMP #JUMPDEST #STOP
+    ])
+def test_jump_validation(bytecode, expected_code):
+    result = bytearray.fromhex(bytecode)
+
+    ce = EVMInterpreter().run(Contract(result, None))
+
+    assert expected_code == ce.code
+
+def test_jumpdest_analysis_cached():
+    code = bytearray.fromhex("6003 56 5B 00")
+
+    first, second = Contract(code, None), Contract(bytearray(code), None)
+
+    assert first.analyse() is second.analyse()
+    assert second.valid_jumpdest(3) and not second.valid_jumpdest(2)
+
+def test_decoded_stream():
+    """
+    ASSEMBLY VIEW:
+    #0 PUSH2 0x0102
+    #3 JUMPDEST
+    #4 PUSH1 (truncated)
+    """
+    contract = Contract(bytearray.fromhex("610102 5B 60"), None)
+    stream = decoded(contract)
+
+    assert len(stream) == 6
+    assert stream[0][1:] == (0x0102, 3)
+    assert stream[3][2] == 4
+    assert stream[4][1:] == (0x0, 5)
+
+    assert decoded(Contract(bytearray(contract.code), None)) is stream
+
+def test_interpreter_import_without_numpy():
+    import subprocess, sys
+
+    script = "import sys, vm.interpreter; sys.exit('numpy' in sys.modules)"
+    assert subprocess.run([sys.executable, "-c", script]).returncode == 0
@@ -0,0 +1,52 @@
+from vm.interpreter import EVMInterpreter
+from vm.contract import Contract
+from vm import keccak
+
+import pytest
+
+Vectors = [
+    (b"", "c5d2460186f7233c927e7db2dcc703c0e500b653ca82273b7bfad8045d85a470"),
+    (b"abc", "4e03657aea45a94fc7d47ba826c8d667c0d1e6e33a64a036ec44f58fa12d6c45"),
+    (bytes(32), "290decd9548b62a8d60345a988386fc84ba6bc95484008f6362f93160ef3e563"),
+]
+
+def available_backends() -> list:
+    backends = []
+    for name in ("pycryptodome", "pysha3", "python"):
+        try:
+            backends.append(keccak.load_backend(name))
+        except ImportError:
+            pass
+
+    return backends
+
+@pytest.mark.parametrize("backend", available_backends())
+@pytest.mark.parametrize("data,digest", Vectors)
+def test_backends(backend, data, digest):
+    assert backend(data).hex() == digest
+
+@pytest.mark.parametrize("size", [0, 1, 32, 64, 135, 136, 137, 300])
+def test_python_backend_matches_selected(size):
+    data = bytes(range(256)) * 2
+
+    assert keccak.python_keccak256(data[:size]) == keccak.keccak256(data[:size])
+
+def test_memoized_sizes():
+    keccak.memoized_keccak256.cache_clear()
+
+    word = memoryview(bytearray(64))
+    assert keccak.keccak256(word[:32]).hex() == Vectors[2][1]
+    keccak.keccak256(bytes(32))
+    keccak.keccak256(word)
+    keccak.keccak256(b"abc")
+
+    info = keccak.memoized_keccak256.cache_info()
+    assert (info.hits, info.misses) == (1, 2)
+
+def test_sha3_opcode():
+    ## MSTORE8 0x61 ('a') at 0, then SHA3 over memory[0:1]
+    contract = Contract(bytearray.fromhex("6061 6000 53 6001 6000 20 00"), None)
+    interpreter = EVMInterpreter()
+    interpreter.run(contract)
+
+    assert interpreter.scope_ctx.stack.pop() == int.from_bytes(keccak.keccak256(b"a"), "big")
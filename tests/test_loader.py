@@ -0,0 +1,99 @@
+import io
+import tarfile
+import zipfile
+
+from vm.interpreter import EVMInterpreter
+from vm.contract import Contract
+from vm.loader import load_contract, load_contracts, load_bytes, map_file, MMAP_THRESHOLD
+from vm.constants import ReturnCode as rc
+
+import pytest
+
+## returns CALLDATALOAD(0) + 1 as a word
+ADD_ONE = bytes.fromhex("6000 35 6001 01 6000 52 6020 6000 F3".replace(" ", ""))
+WORD = (41).to_bytes(32, "big")
+
+def returned(contract: Contract, **mode) -> int:
+    result = EVMInterpreter(**mode).run(contract)
+    assert result.code == rc.STOPPED
+    return int.from_bytes(bytes(result.data), "big")
+
+@pytest.mark.parametrize("mode", [dict(), dict(fuse=False), dict(compile_blocks=True)])
+def test_mapped_code_and_calldata(tmp_path, mode):
+    (tmp_path / "code.bin").write_bytes(ADD_ONE)
+    (tmp_path / "input.calldata").write_bytes(WORD)
+
+    contract = Contract(map_file(str(tmp_path / "code.bin")), map_file(str(tmp_path / "input.calldata")))
+
+    ## read-only views are used as they are, not copied
+    assert isinstance(contract.data, memoryview)
+    assert returned(contract, **mode) == 42
+
+def test_hex_files(tmp_path):
+    (tmp_path / "code.hex").write_text("0x" + ADD_ONE.hex() + "\n")
+    (tmp_path / "input.hex").write_text(WORD.hex()[:32] + "\n" + WORD.hex()[32:] + "\n")
+
+    assert load_bytes(str(tmp_path / "code.hex")) == ADD_ONE
+    assert returned(load_contract(str(tmp_path / "code.hex"), str(tmp_path / "input.hex"))) == 42
+
+def test_large_files_are_mapped(tmp_path):
+    (tmp_path / "big.bin").write_bytes(ADD_ONE + bytes(MMAP_THRESHOLD))
+    (tmp_path / "small.bin").write_bytes(ADD_ONE)
+
+    assert isinstance(load_bytes(str(tmp_path / "big.bin")), memoryview)
+    assert isinstance(load_bytes(str(tmp_path / "small.bin")), bytes)
+
+def test_directory(tmp_path):
+    (tmp_path / "a.bin").write_bytes(ADD_ONE)
+    (tmp_path / "a.calldata").write_bytes(WORD)
+    (tmp_path / "b.hex").write_text(ADD_ONE.hex())
+
+    contracts = load_contracts(str(tmp_path), gas=100000)
+
+    assert sorted(contracts) == ["a", "b"]
+    assert returned(contracts["a"]) == 42
+    assert returned(contracts["b"]) == 1
+    assert contracts["b"].gas == 100000
+
+def test_tar_members_view_the_archive(tmp_path):
+    path = tmp_path / "contracts.tar"
+    with tarfile.open(path, "w") as tar:
+        for name, data in (("x/a.bin", ADD_ONE), ("x/a.calldata", WORD), ("x/b.bin", ADD_ONE.hex().encode())):
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            tar.addfile(info, io.BytesIO(data))
+
+    contracts = load_contracts(str(path))
+
+    assert isinstance(contracts["a"].code, memoryview)
+    assert returned(contracts["a"]) == 42
+    assert returned(contracts["b"]) == 1
+
+@pytest.mark.parametrize("compression", ["gz", "bz2", "xz"])
+def test_rejects_compressed_tar(tmp_path, compression):
+    path = tmp_path / f"contracts.tar.{compression}"
+    with tarfile.open(path, f"w:{compression}") as tar:
+        info = tarfile.TarInfo("a.bin")
+        info.size = len(ADD_ONE)
+        tar.addfile(info, io.BytesIO(ADD_ONE))
+
+    with pytest.raises(ValueError, match="compressed tar"):
+        load_contracts(str(path))
+
+@pytest.mark.parametrize("compression", [zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED])
+def test_zip(tmp_path, compression):
+    path = tmp_path / "contracts.zip"
+    with zipfile.ZipFile(path, "w", compression=compression) as zf:
+        zf.writestr("a.bin", ADD_ONE)
+        zf.writestr("a.calldata", WORD)
+
+    contract = load_contracts(str(path))["a"]
+
+    assert isinstance(contract.code, memoryview) == (compression == zipfile.ZIP_STORED)
+    assert returned(contract) == 42
+
+def test_rejects_other_files(tmp_path):
+    (tmp_path / "plain.txt").write_text("not an archive")
+
+    with pytest.raises(ValueError):
+        load_contracts(str(tmp_path / "plain.txt"))
@@ -2,12 +2,33 @@ from vm.memory import Memory
 
 def test_memory():
     mem = Memory()
-    test_vals = [[0, 0b10101], [4356, 0b10101001010010101100101010], [5, 0b10101010]]
+    test_vals = [[0, 0b10101], [4356, 0b10101001010010101100101010], [96, 0b10101010]]
 
     for val in test_vals:
-        mem.set(val[0], val[1])
+        mem.set32(val[0], val[1])
 
     for val in test_vals:
-        mem_val = mem.get(val[0])
+        mem_val = mem.get32(val[0])
 
-        assert mem_val == val[1]
\ No newline at end of file
+        assert mem_val == val[1]
+
+def test_memory_expansion():
+    mem = Memory()
+    assert len(mem) == 0
+
+    assert mem.expand(0, 0) == 0; "Ensuring zero sized accesses do not expand memory"
+    assert mem.expand(10, 1) == 1
+    assert mem.expand(31, 2) == 1
+    assert len(mem) == 64 and mem.words() == 2
+
+    mem.set8(63, 0x1FF)
+    assert mem.get(60, 4) == b"\x00\x00\x00\xff"
+
+def test_memory_overlapping_writes():
+    mem = Memory()
+
+    mem.set(0, b"\x11" * 32)
+    mem.set(5, b"\x22\x33")
+
+    with mem.view(4, 4) as v:
+        assert bytes(v) == b"\x11\x22\x33\x11"
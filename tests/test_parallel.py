@@ -0,0 +1,52 @@
+from vm.interpreter import EVMInterpreter
+from vm.contract import Contract
+from vm.parallel import run_many
+from vm.constants import ReturnCode as rc
+
+import pytest
+
+ADD_ONE = bytearray.fromhex("6000 35 6001 01 6000 52 6020 6000 F3") # returns calldata word + 1
+REVERTS = bytearray.fromhex("6000 6000 FD")
+
+def calls() -> list:
+    items = [(ADD_ONE, i.to_bytes(32, "big")) for i in range(20)]
+    items.append((REVERTS, b"", 0, 100))
+    items.append(Contract(ADD_ONE, (7).to_bytes(32, "big"), gas=5))
+    return items
+
+@pytest.mark.parametrize("workers", [1, 2])
+@pytest.mark.parametrize("options", [{}, {"compile_blocks": True}])
+def test_run_many_matches_interpreter(workers, options):
+    results = run_many(calls(), workers=workers, chunksize=3, **options)
+
+    for item, result in zip(calls(), results):
+        contract = item if isinstance(item, Contract) else Contract(*item)
+        expected = EVMInterpreter(**options).run(contract)
+
+        assert (expected.code, expected.data, expected.gas_left) == (result.code, result.data, result.gas_left)
+
+    assert results[3].data == (4).to_bytes(32, "big")
+    assert results[20].code == rc.REVERTED
+    assert results[21].code == rc.OUT_OF_GAS
+
+## ADDRESS #MSTORE #CALLER #MSTORE #SSTORE (refunded) #LOG0 #RETURN
+CONTEXT = bytearray.fromhex("30 6000 52 33 6020 52 6001 6000 55 6000 6000 55 6020 6000 A0 6040 6000 F3")
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_run_many_keeps_call_context(workers):
+    calls = [Contract(CONTEXT, None, address=0xAA, caller=0xBB), (CONTEXT, None, 0, 100000, 0xCC, 0xDD)]
+
+    results = run_many(calls, workers=workers)
+
+    for item, result in zip(calls, results):
+        contract = item if isinstance(item, Contract) else Contract(*item)
+        expected = EVMInterpreter().run(contract)
+
+        assert (expected.code, expected.data, expected.gas_left) == (result.code, result.data, result.gas_left)
+        assert (expected.gas_refund, expected.logs) == (result.gas_refund, result.logs)
+
+    assert results[1].data == (0xCC).to_bytes(32, "big") + (0xDD).to_bytes(32, "big")
+    assert results[0].gas_refund > 0 and len(results[0].logs) == 1
+
+def test_run_many_empty():
+    assert run_many([], workers=2) == []
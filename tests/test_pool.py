@@ -0,0 +1,67 @@
+from vm.interpreter import EVMInterpreter
+from vm.contract import Contract
+from vm.stack import StackError
+from vm.pool import ContextPool
+from vm.storage import MemoryStorage
+from vm.state import Account
+from vm.constants import ReturnCode as rc
+
+import pytest
+
+def test_pool_reuses_contexts():
+    pool = ContextPool()
+    contract = Contract(bytearray.fromhex("00"), None)
+
+    ctx = pool.acquire(contract, 100)
+    ctx.stack.push(1)
+    ctx.mem.set32(0, 2)
+    ctx.return_data = b"\x01"
+    pool.release(ctx)
+
+    reused = pool.acquire(contract, 50, depth=3, static=True)
+    assert reused is ctx
+    assert reused.stack.count == 0 and len(reused.mem) == 0 and reused.return_data == b""
+    assert (reused.gas, reused.depth, reused.static, reused.state) == (50, 3, True, None)
+    assert pool.allocations == 1
+
+def test_steady_state_runs_allocate_no_contexts():
+    interpreter = EVMInterpreter()
+    code = bytearray.fromhex("6001 6000 52 6020 6000 F3")
+
+    for i in range(100):
+        result = interpreter.run(Contract(code, None))
+        assert result.data == (1).to_bytes(32, "big")
+
+    assert interpreter.pool.allocations == 1
+
+def test_failed_run_leaves_no_state_behind():
+    interpreter = EVMInterpreter()
+
+    with pytest.raises(StackError):
+        interpreter.run(Contract(bytearray.fromhex("602A 6000 55 01"), None)) # SSTORE then ADD on an empty stack
+
+    result = interpreter.run(Contract(bytearray.fromhex("6000 54 00"), None)) # SLOAD
+    assert result.code == rc.STOPPED
+    assert interpreter.scope_ctx.stack.pop() == 0
+    assert interpreter.pool.allocations == 1
+
+class FailingStorage(MemoryStorage):
+    def get(self, address: int, slot: int) -> int:
+        if slot == 7:
+            raise RuntimeError("backend unavailable")
+        return super().get(address, slot)
+
+def test_raising_run_leaves_no_state_behind():
+    callee = bytearray.fromhex("602A 6000 55 6007 54 00") # SSTORE then SLOAD of a slot the backend fails on
+    interpreter = EVMInterpreter(storage=FailingStorage(), accounts={0xBB: Account(0, 0, callee)})
+
+    with pytest.raises(RuntimeError):
+        interpreter.run(Contract(bytearray.fromhex("602A 6001 55 6000 6000 6000 6000 6000 60BB 5A F1 00"), None)) # SSTORE #CALL
+
+    ## both the caller's and the callee's contexts are back in the pool
+    assert len(interpreter.pool.free) == interpreter.pool.allocations == 2
+
+    result = interpreter.run(Contract(bytearray.fromhex("6001 54 00"), None)) # SLOAD
+    assert result.code == rc.STOPPED
+    assert interpreter.scope_ctx.stack.pop() == 0
+    assert len(interpreter.storage) == 0
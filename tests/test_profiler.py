@@ -0,0 +1,76 @@
+from vm.interpreter import EVMInterpreter
+from vm.contract import Contract
+from vm.profiler import Profiler, contract_name
+from vm.state import Account
+from vm.keccak import keccak256
+from vm.constants import ReturnCode as rc
+
+def name(bytecode: str, address: int=0) -> str:
+    return contract_name(address, keccak256(bytes.fromhex(bytecode.replace(" ", ""))))
+
+def execute(bytecode: str, accounts: dict=None, address: int=0):
+    profiler = Profiler()
+    interpreter = EVMInterpreter(profiler=profiler, accounts=accounts)
+
+    result = interpreter.run(Contract(bytearray.fromhex(bytecode), None, address=address))
+    return result, profiler
+
+def test_counts_and_gas_per_pc():
+    ## counting loop from 3 down to 0
+    result, profiler = execute("6003 5B 6001 90 03 80 6002 57 00")
+    assert result.code == rc.STOPPED
+
+    counts = {pc: stats.count for (_, pc), stats in profiler.pcs.items()}
+    assert counts == {0: 1, 2: 3, 3: 3, 5: 3, 6: 3, 7: 3, 8: 3, 10: 3, 11: 1}
+
+    assert profiler.opcodes()["JUMPI"] == (3, profiler.opcodes()["JUMPI"][1], 30)
+    assert sum(stats.gas for stats in profiler.pcs.values()) == 30000000 - result.gas_left
+
+def test_dynamic_gas_is_attributed():
+    ## MSTORE at 0x40 expands memory to 3 words: 3 static + 9 memory gas
+    _, profiler = execute("6001 6040 52 00")
+    assert profiler.pcs[(name("6001 6040 52 00"), 4)].gas == 12
+
+def test_collapsed_stacks_follow_calls():
+    ## CALL 0xCC, which runs PUSH1 PUSH1 ADD STOP
+    caller, callee = "6000 6000 6000 6000 6000 60CC 5A F1 00", "6001600101 00"
+    accounts = {0xCC: Account(code=bytes.fromhex(callee.replace(" ", "")))}
+    _, profiler = execute(caller, accounts, address=0xAA)
+
+    caller, callee = name(caller, 0xAA), name(callee, 0xCC)
+    stacks = [line.rsplit(" ", 1)[0] for line in profiler.collapsed().splitlines()]
+    assert f"{caller};CALL" in stacks
+    assert f"{caller};{callee};ADD" in stacks
+    assert all(int(line.rsplit(" ", 1)[1]) >= 0 for line in profiler.collapsed().splitlines())
+
+    report = profiler.report()
+    assert f"contract {caller}" in report
+    assert f"contract {callee}" in report
+
+def test_code_at_one_address_is_kept_apart():
+    ## two different programs, both run at the default address 0
+    profiler = Profiler()
+    interpreter = EVMInterpreter(profiler=profiler)
+
+    for bytecode in ["6001 6002 01 00", "6001 6002 02 00"]: # ADD, then MUL at the same pc
+        interpreter.run(Contract(bytearray.fromhex(bytecode), None))
+
+    hot_spots = profiler.hot_spots()
+    assert len(hot_spots) == 2
+    assert profiler.pcs[(name("6001 6002 01 00"), 4)].count == 1
+    assert profiler.opcodes()["ADD"][0] == profiler.opcodes()["MUL"][0] == 1
+
+def test_hot_spots_are_ranked(tmp_path):
+    _, profiler = execute("6003 5B 6001 90 03 80 6002 57 00")
+
+    rows = profiler.hot_spots(limit=3)[name("6003 5B 6001 90 03 80 6002 57 00")]
+    assert len(rows) == 3
+    assert rows[0][1].ns >= rows[1][1].ns >= rows[2][1].ns
+
+    path = tmp_path / "evm.folded"
+    profiler.write_collapsed(str(path))
+    assert path.read_text() == profiler.collapsed()
+
+def test_disabled_by_default():
+    interpreter = EVMInterpreter()
+    assert interpreter.profiler is None
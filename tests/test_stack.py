@@ -62,4 +62,35 @@ def test_max_stack_size_exception():
         assert "Maximum number of elements" in str(se)
         return
 
-    assert False; "Exception not raised"
\ No newline at end of file
+    assert False; "Exception not raised"
+
+
+def test_stack_dup_swap_peek():
+    s = stack.Stack()
+
+    for num in range(1, 5, 1):
+        s.push(num)
+
+    assert s.peek() == 4
+    assert s.peek(3) == 1
+
+    s.dup(4)
+    assert s.peak() == 1 and s.count == 5
+
+    s.swap(3)
+    assert s.pop() == 2
+    assert s.pop() == 4
+    assert s.peek(2) == 1
+
+def test_stack_out_of_range_word():
+    s = stack.Stack()
+
+    for word in [-1, 2**256]:
+        try:
+            s.push(word)
+
+        except stack.StackError as se:
+            assert "Item size exceeds word size limit" in str(se)
+            continue
+
+        assert False; "Exception not raised"
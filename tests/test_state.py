@@ -0,0 +1,72 @@
+from vm.interpreter import EVMInterpreter
+from vm.contract import Contract
+from vm.tracer import Tracer
+from vm.storage import MemoryStorage
+from vm.state import Account, JournaledState, Log
+from vm.constants import ReturnCode as rc
+
+import pytest
+
+Modes = [
+    dict(),
+    dict(fuse=False),
+    dict(compile_blocks=True),
+    dict(tracer=Tracer()),
+    ]
+
+def test_snapshot_revert():
+    backend = MemoryStorage()
+    backend.put_many([((1, 0), 5)])
+    state = JournaledState(backend, {1: Account(balance=100)})
+
+    state.store(1, 0, 6)
+    outer = state.snapshot()
+
+    state.store(1, 0, 7)
+    state.store(1, 1, 8)
+    assert state.transfer(1, 2, 40)
+    state.log(1, (0xAA,), b"\x01")
+    state.add_refund(15000)
+
+    inner = state.snapshot()
+    state.store(1, 1, 9)
+    state.revert(inner)
+    assert state.load(1, 1) == 8
+
+    state.revert(outer)
+    assert state.load(1, 0) == 6 and state.load(1, 1) == 0
+    assert state.balance(1) == 100 and state.balance(2) == 0
+    assert state.logs == [] and state.refund == 0
+    assert state.original_value(1, 0) == 5
+
+    state.commit()
+    assert backend.get(1, 0) == 6 and len(backend) == 1
+    assert state.snapshot() == 0
+
+def test_transfer_insufficient_funds():
+    accounts = {1: Account(balance=10)}
+    state = JournaledState(MemoryStorage(), accounts)
+
+    assert not state.transfer(1, 2, 11)
+    assert state.transfer(1, 2, 10)
+    assert accounts == {1: Account(balance=10)}; "Ensuring balances are written back only on commit"
+
+    state.commit()
+    assert accounts == {1: Account(balance=0), 2: Account(balance=10)}
+
+@pytest.mark.parametrize("mode", Modes)
+def test_log(mode):
+    ## MSTORE 1 at 0, LOG1 the word with topic 0xAA
+    code = bytearray.fromhex("6001 6000 52 60AA 6020 6000 A1 00")
+    result = EVMInterpreter(**mode).run(Contract(code, None, gas=2000, address=3))
+
+    assert result.code == rc.STOPPED
+    assert result.gas_left == 2000 - (12 + 9 + 750 + 8 * 32)
+    assert result.logs == [Log(3, (0xAA,), (1).to_bytes(32, "big"))]
+
+@pytest.mark.parametrize("mode", Modes)
+def test_reverted_logs_dropped(mode):
+    result = EVMInterpreter(**mode).run(Contract(bytearray.fromhex("6000 6000 A0 6000 6000 FD"), None))
+
+    assert result.code == rc.REVERTED
+    assert result.logs is None
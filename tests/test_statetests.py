@@ -0,0 +1,96 @@
+import json
+
+from vm.state import Account
+from statetests.trie import trie_root, state_root
+from statetests.runner import private_key_address
+from statetests.__main__ import main, run_all, fixture_files
+
+import pytest
+
+"""
+NOTE: The fixtures below are hand written in the official formats; the trie is
+checked against the reference vectors from ethereum/tests
+"""
+
+SENDER = 0xA94F5374FCE5EDBC8E2A8697C15331677E6EBF0B
+SECRET = "0x45a915e4d060149eb4365960e6a7a45f334393093061116b197e3240065ff2d8"
+TO = 0x095E7BAEA6A6C7C4C2DFEB977EFAC326AF552D87
+COINBASE = 0x2ADC25665018AA1FE0E6BC666DAC8FC2697FF9BA
+EMPTY_LOGS = "0x1dcc4de8dec75d7aab85b567b6ccd41ad312451b948a7413f0a142fd40d49347"
+
+def account(balance: int=0, nonce: int=0, code: str="0x", storage: dict=None) -> dict:
+    return {"balance": hex(balance), "nonce": hex(nonce), "code": code, "storage": storage or {}}
+
+def vm_test(code: str, out: str, gas_left: int, storage: dict) -> dict:
+    return {
+        "exec": {"address": hex(TO), "caller": hex(SENDER), "origin": hex(SENDER), "code": code, "data": "0x", "gas": hex(100000), "gasPrice": "0x01", "value": "0x00"},
+        "pre": {hex(TO): account(code=code)},
+        "post": {hex(TO): account(code=code, storage=storage)},
+        "gas": hex(gas_left),
+        "out": out,
+    }
+
+def state_test() -> dict:
+    ## the transaction stores 1 at slot 0 of TO: 21000 intrinsic + 20006 execution gas at a price of 10
+    gas_used = 41006
+    post = state_root(
+        {SENDER: Account(10**18 - 10 * gas_used, 1), TO: Account(0, 0, bytes.fromhex("600160005500")), COINBASE: Account(10 * gas_used)},
+        {TO: {0: 1}},
+    )
+
+    return {
+        "env": {"currentCoinbase": hex(COINBASE), "currentGasLimit": hex(10**7), "currentNumber": "0x01", "currentTimestamp": "0x03e8"},
+        "pre": {hex(SENDER): account(10**18), hex(TO): account(code="0x600160005500")},
+        "transaction": {"data": ["0x"], "gasLimit": [hex(100000), hex(21000)], "value": ["0x00"], "gasPrice": "0x0a", "nonce": "0x00", "secretKey": SECRET, "to": hex(TO)},
+        "post": {"Istanbul": [
+            {"hash": "0x" + post.hex(), "logs": EMPTY_LOGS, "indexes": {"data": 0, "gas": 0, "value": 0}},
+            {"hash": "0x" + post.hex(), "logs": EMPTY_LOGS, "indexes": {"data": 0, "gas": 1, "value": 0}},
+        ]},
+    }
+
+def test_trie_reference_vectors():
+    assert trie_root({}).hex() == "56e81f171bcc55a6ff8345e692c0f86e5b48e01b996cadc001622fb5e363b421"
+    assert trie_root({b"do": b"verb", b"dog": b"puppy", b"doge": b"coin", b"horse": b"stallion"}).hex() == "5991bb8c6514148a29db676a14ac506cd2cd5775ace63c30a4fe457715e9ac84"
+
+def test_sender_from_secret_key():
+    assert private_key_address(int(SECRET, 16)) == SENDER
+
+@pytest.fixture
+def fixtures(tmp_path):
+    (tmp_path / "VMTests").mkdir()
+    (tmp_path / "VMTests" / "add.json").write_text(json.dumps({
+        "add": vm_test("0x6003600401600055", "0x", 100000 - 20012, {"0x00": "0x07"}),
+        "wrongGas": vm_test("0x6003600401600055", "0x", 1, {"0x00": "0x07"}),
+    }))
+    (tmp_path / "stExample").mkdir()
+    (tmp_path / "stExample" / "sstore.json").write_text(json.dumps({"sstore": state_test()}))
+
+    return tmp_path
+
+def test_records_per_case(fixtures):
+    records = {(r["name"], r["index"]): r for r in run_all(fixture_files(str(fixtures)), workers=1)}
+
+    assert records[("add", 0)]["passed"]
+    assert records[("add", 0)]["opcodes"] == ["ADD", "PUSH1", "SSTORE"]
+    assert "gas left" in records[("wrongGas", 0)]["error"]
+
+    ## the second post entry's gas limit only covers the intrinsic gas, so execution runs out of gas
+    assert records[("sstore", 0)]["passed"], records[("sstore", 0)]["error"]
+    assert not records[("sstore", 1)]["passed"]
+    assert all(record["ns"] > 0 for record in records.values())
+
+def test_fork_filter_and_workers(fixtures):
+    serial = run_all(fixture_files(str(fixtures)), {"Istanbul"}, workers=1)
+    parallel = run_all(fixture_files(str(fixtures)), {"Istanbul"}, workers=2)
+
+    assert [r["fork"] for r in serial] == ["Istanbul", "Istanbul"]
+    assert [(r["name"], r["passed"]) for r in serial] == [(r["name"], r["passed"]) for r in parallel]
+
+def test_main_reports_failures(fixtures, tmp_path, capsys):
+    output = tmp_path / "results.json"
+
+    assert main([str(fixtures / "VMTests"), "--workers", "1", "--output", str(output)]) == 1
+    assert "1 passed, 1 failed" in capsys.readouterr().out
+    assert len(json.loads(output.read_text())) == 2
+
+    assert main([str(fixtures / "stExample"), "--workers", "1", "--fork", "Istanbul"]) == 1
@@ -0,0 +1,105 @@
+from vm.interpreter import EVMInterpreter
+from vm.contract import Contract
+from vm.tracer import Tracer
+from vm.storage import MemoryStorage, SQLiteStorage, StorageCache
+from vm.constants import ReturnCode as rc
+
+import pytest
+
+Modes = [
+    dict(),
+    dict(fuse=False),
+    dict(compile_blocks=True),
+    dict(tracer=Tracer()),
+    ]
+
+@pytest.fixture(params=["memory", "sqlite"])
+def backend(request, tmp_path):
+    if request.param == "memory":
+        return MemoryStorage()
+
+    return SQLiteStorage(str(tmp_path / "state.db"))
+
+def test_backend_reads_writes(backend):
+    assert backend.get(1, 2) == 0
+
+    backend.put_many([((1, 2), 5), ((3, 2**256 - 1), 7), ((2**160 - 1, 0), 2**256 - 1)])
+    assert backend.get(1, 2) == 5
+    assert backend.get(3, 2**256 - 1) == 7
+    assert backend.get(2**160 - 1, 0) == 2**256 - 1
+    assert len(backend) == 3
+
+    backend.put_many([((1, 2), 0)]) ## zero deletes the slot
+    assert backend.get(1, 2) == 0
+    assert len(backend) == 2
+
+def test_sqlite_persists(tmp_path):
+    path = str(tmp_path / "state.db")
+
+    store = SQLiteStorage(path)
+    store.put_many([((1, 1), 42)])
+    store.close()
+
+    assert SQLiteStorage(path).get(1, 1) == 42
+
+def test_cache_commits_changed_slots_once():
+    class CountingStorage(MemoryStorage):
+        writes = []
+
+        def put_many(self, items):
+            self.writes.append(list(items))
+            super().put_many(items)
+
+    backend = CountingStorage()
+    backend.put_many([((0, 1), 9)])
+    backend.writes.clear()
+
+    cache = StorageCache(backend)
+    cache.store(0, 1, 10)
+    cache.store(0, 1, 9) ## back to its original value
+    cache.store(0, 2, 3)
+    cache.store(0, 2, 4)
+    cache.load(0, 3)
+
+    assert cache.original_value(0, 2) == 0
+    cache.commit()
+
+    assert backend.writes == [[((0, 2), 4)]]
+    assert backend.get(0, 2) == 4 and backend.get(0, 1) == 9
+
+@pytest.mark.parametrize("mode", Modes)
+def test_sstore_sload(mode, backend):
+    interpreter = EVMInterpreter(storage=backend, **mode)
+
+    ## SSTORE 0x2A at slot 1, then SLOAD it back
+    code = bytearray.fromhex("602A 6001 55 6001 54 00")
+    result = interpreter.run(Contract(code, None, gas=100000, address=7))
+
+    assert result.code == rc.STOPPED
+    assert interpreter.scope_ctx.stack.pop() == 0x2A
+    assert result.gas_left == 100000 - (3 + 3 + 20000 + 3 + 800)
+    assert backend.get(7, 1) == 0x2A
+
+    ## clearing the slot refunds gas
+    result = interpreter.run(Contract(bytearray.fromhex("6000 6001 55 00"), None, gas=100000, address=7))
+    assert result.gas_left == 100000 - (3 + 3 + 5000)
+    assert result.gas_refund == 15000
+    assert backend.get(7, 1) == 0
+
+@pytest.mark.parametrize("mode", Modes)
+def test_reverted_writes_discarded(mode):
+    backend = MemoryStorage()
+    interpreter = EVMInterpreter(storage=backend, **mode)
+
+    result = interpreter.run(Contract(bytearray.fromhex("602A 6001 55 6000 6000 FD"), None)) ## SSTORE #REVERT
+    assert result.code == rc.REVERTED
+    assert result.gas_refund == 0
+    assert len(backend) == 0
+
+@pytest.mark.parametrize("mode", Modes)
+def test_sstore_sentry(mode):
+    backend = MemoryStorage()
+    result = EVMInterpreter(storage=backend, **mode).run(Contract(bytearray.fromhex("602A 6001 55 00"), None, gas=2306))
+
+    assert result.code == rc.OUT_OF_GAS
+    assert len(backend) == 0
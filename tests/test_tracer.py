@@ -0,0 +1,58 @@
+import io
+import json
+
+from vm.interpreter import EVMInterpreter
+from vm.contract import Contract
+from vm.state import Account
+from vm.tracer import JSONTracer, TraceWriter
+
+def trace(bytecode: str, accounts: dict=None, **options) -> list:
+    out = io.StringIO()
+    interpreter = EVMInterpreter(tracer=JSONTracer(out, **options), accounts=accounts)
+    interpreter.run(Contract(bytearray.fromhex(bytecode), None, gas=100000))
+
+    return [json.loads(line) for line in out.getvalue().splitlines()]
+
+def test_eip3155_steps_and_summary():
+    lines = trace("6003 6004 01 00")
+
+    assert lines[0] == {"pc": 0, "op": 0x60, "gas": "0x186a0", "gasCost": "0x3", "memSize": 0, "depth": 1, "refund": 0, "opName": "PUSH1", "stack": []}
+    assert lines[2]["stack"] == ["0x3", "0x4"]
+    assert lines[2]["opName"] == "ADD"
+    assert lines[3]["stack"] == ["0x7"]
+
+    assert lines[-1] == {"output": "", "gasUsed": "0x9", "pass": True}
+
+def test_failure_summary():
+    lines = trace("6001 56")
+    assert lines[-1]["pass"] is False
+    assert lines[-1]["error"] == "INVALID_JUMP"
+
+def test_stack_truncation_and_memory():
+    lines = trace("6001 6002 6003 6042 6000 52 00", stack_limit=2, memory=True, memory_limit=4)
+
+    assert lines[3]["stack"] == ["0x2", "0x3"]
+    assert lines[6]["memSize"] == 32
+    assert lines[6]["memory"] == "0x00000000"
+
+    assert "stack" not in trace("6001 00", stack_limit=0)[1]
+
+def test_depth_follows_calls():
+    accounts = {0xCC: Account(code=bytes.fromhex("600100"))}
+    lines = trace("6000 6000 6000 6000 6000 60CC 5A F1 00", accounts)
+
+    assert [line["depth"] for line in lines[:-1]] == [1] * 8 + [2, 2, 1]
+
+def test_writer_streams_in_chunks():
+    out = io.StringIO()
+    writer = TraceWriter(out, buffer_lines=2)
+
+    writer.write("a")
+    assert out.getvalue() == ""
+
+    writer.write("b")
+    writer.write("c")
+    assert out.getvalue() == "a\nb\n"
+
+    writer.flush()
+    assert out.getvalue() == "a\nb\nc\n"
@@ -0,0 +1,106 @@
+from vm.interpreter import EVMInterpreter
+from vm.tracer import Tracer
+from vm.contract import Contract
+from vm.pc import ProgramCounter
+from vm.pool import ContextPool
+from vm.state import JournaledState
+from vm.storage import MemoryStorage
+from vm.stack import StackError
+from vm.opcode import Opcode
+from vm.instructions import ReferenceTable, UncheckedTable, DispatchTable
+from vm.decoder import block_stack_bounds, metered
+from vm.analysis import basic_blocks
+from vm.frames import Message
+from vm.constants import ReturnCode as rc
+
+import pytest
+
+"""
+NOTE: The unchecked handlers are validated differentially against the checked ones
+"""
+
+Halting = {Opcode.STOP, Opcode.RETURN, Opcode.REVERT, Opcode.INVALID}
+
+def context(items: list):
+    contract = Contract(bytearray.fromhex("5B00"), bytes(range(40)))
+    contract.analyse()
+
+    ctx = ContextPool().acquire(contract, 10**7, state=JournaledState(MemoryStorage()))
+    for item in items:
+        ctx.stack.push(item)
+
+    return ctx
+
+@pytest.mark.parametrize("op", [op for op in ReferenceTable if op not in Halting])
+def test_declared_stack_effects(op):
+    instr = ReferenceTable[op]
+    ctx = context([0] * 20)
+
+    result = instr.execute(ProgramCounter(1), None, ctx)
+
+    ## calls and creates push their outcome when the callee returns
+    pushed = 0 if isinstance(result, Message) else instr.pushes
+    assert ctx.stack.count == 20 - instr.pops + pushed
+
+    ## one item fewer than declared underflows
+    if instr.pops and op != Opcode.JUMPDEST:
+        with pytest.raises(StackError):
+            instr.execute(ProgramCounter(1), None, context([0] * (instr.pops - 1)))
+
+@pytest.mark.parametrize("op", list(UncheckedTable))
+def test_unchecked_matches_checked(op):
+    items = [3, 1 << 255, 0, 7, 2**256 - 1, 5, 255, 31, 1] + list(range(10, 30))
+
+    expected, actual = context(items), context(items)
+    expected_pc, actual_pc = ProgramCounter(1), ProgramCounter(1)
+
+    expected_result = DispatchTable[op](expected_pc, None, expected)
+    actual_result = UncheckedTable[op](actual_pc, None, actual)
+
+    assert expected.stack.stack[:expected.stack.count] == actual.stack.stack[:actual.stack.count]
+    assert expected_pc.pc == actual_pc.pc
+    assert (expected_result is None) == (actual_result is None)
+    assert bytes(expected.mem.store) == bytes(actual.mem.store)
+    assert expected.gas == actual.gas
+
+@pytest.mark.parametrize("bytecode,bounds", [
+    ("6001 6002 01 00", [(0, 2)]), # PUSH PUSH ADD STOP
+    ("01 50 00", [(2, 0)]), # ADD POP needs 2 items
+    ("80 80 80 91 50 00", [(1, 3)]), # DUP1 x3 needs 1 and adds 3 at most
+    ("6003 56 5B 90 00", [(0, 1), (2, 0)]), # second block SWAP1 needs 2
+    ])
+def test_block_stack_bounds(bytecode, bounds):
+    code = bytes.fromhex(bytecode.replace(" ", ""))
+    assert block_stack_bounds(code, basic_blocks(code)) == bounds
+
+def execute(bytecode: str, **mode):
+    interpreter = EVMInterpreter(**mode)
+    contract = Contract(bytearray.fromhex(bytecode), None, gas=100000)
+
+    try:
+        result = interpreter.run(contract)
+    except StackError:
+        return "StackError", None
+
+    stack = interpreter.scope_ctx.stack
+    return result.code, stack.stack[:stack.count], result.gas_left
+
+@pytest.mark.parametrize("bytecode", [
+    "6001 6002 01 6003 02 00", # verified block
+    "6001 01 00", # underflow inside the block
+    "6001 6000 52 50 50 00", # MSTORE then underflow
+    "60FF 6000 51 60 00", # MLOAD then truncated PUSH1 falls off the end
+    "7FFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFF 51 50 50 00", # MLOAD out of gas before the underflow
+    "6005 5B 80 6001 90 03 80 6003 57 00", # DUP in a loop, re-verified on every entry
+    "5B" + "6000" * 64 + "6000 56", # overflows on the 17th pass through the loop
+    ])
+@pytest.mark.parametrize("fuse", [True, False])
+def test_verified_blocks_match_traced(bytecode, fuse):
+    assert execute(bytecode, fuse=fuse) == execute(bytecode, tracer=Tracer())
+
+def test_unchecked_stream():
+    contract = Contract(bytearray.fromhex("6001 6002 01 00"), None)
+    stream = metered(contract, fusion=False)
+
+    assert stream[2][0] is not DispatchTable[Opcode.PUSH1]
+    assert stream[4][0] is UncheckedTable[Opcode.ADD]
@@ -0,0 +1,193 @@
+from collections import OrderedDict
+
+from vm.opcode import Opcode
+
+"""
+Static analysis performed over contract bytecode before execution.
+
+Analysis results only depend on the code itself, so they are cached by code
+hash and shared between every `Contract` that carries the same bytecode. The
+cache is a bounded LRU, optionally backed by a persistent store (see
+`vm.codestore`) so a restarted process does not analyse every contract again.
+"""
+
+def jumpdest_bitmap(code: bytes) -> bytearray:
+    """
+    Single pass over the bytecode producing one bit per code byte, set when the
+    byte is a JUMPDEST instruction (i.e. not part of a PUSH1-PUSH32 immediate).
+    """
+    bitmap = bytearray((len(code) + 7) // 8)
+    push1, push32, jumpdest = Opcode.PUSH1, Opcode.PUSH32, Opcode.JUMPDEST
+
+    i, size = 0, len(code)
+    while i < size:
+        op = code[i]
+
+        if op == jumpdest:
+            bitmap[i >> 3] |= 1 << (i & 7)
+
+        elif push1 <= op <= push32:
+            i += op - push1 + 1 ## skip immediate bytes
+
+        i += 1
+
+    return bitmap
+
+
+## instructions after which control never falls through to the next byte
+BlockTerminators = frozenset([
+    Opcode.STOP,
+    Opcode.JUMP,
+    Opcode.JUMPI,
+    Opcode.RETURN,
+    Opcode.REVERT,
+    Opcode.INVALID,
+    Opcode.SELFDESTRUCT,
+])
+
+## instructions that observe the remaining gas; ending a block right after them
+## keeps per-block static gas charges from running ahead of what they see
+GasObservers = frozenset([
+    Opcode.GAS,
+    Opcode.SSTORE,
+    Opcode.CALL,
+    Opcode.CALLCODE,
+    Opcode.DELEGATECALL,
+    Opcode.STATICCALL,
+    Opcode.CREATE,
+    Opcode.CREATE2,
+])
+
+def basic_blocks(code: bytes) -> list:
+    """
+    Splits bytecode into basic blocks, returned as (start, end) pc ranges.
+    A block starts at pc 0, at every JUMPDEST and after every terminator;
+    it ends after a terminator, a gas observer or an unassigned opcode, or
+    right before a JUMPDEST.
+    """
+    blocks: list = []
+    push1, push32, jumpdest = Opcode.PUSH1, Opcode.PUSH32, Opcode.JUMPDEST
+    assigned = Opcode._value2member_map_
+
+    start, i, size = 0, 0, len(code)
+    while i < size:
+        op = code[i]
+
+        if op == jumpdest and i != start:
+            blocks.append((start, i))
+            start = i
+
+        if push1 <= op <= push32:
+            i += op - push1 + 1
+
+        i = min(i + 1, size)
+
+        if op in BlockTerminators or op in GasObservers or op not in assigned:
+            blocks.append((start, i))
+            start = i
+
+    if start < size:
+        blocks.append((start, size))
+
+    return blocks
+
+
+class CodeAnalysis():
+    __slots__ = ("code_hash", "code_size", "jumpdests", "instructions", "blocks", "block_gas", "block_stack", "executable")
+
+    def __init__(self, code_hash: bytes, code: bytes):
+        self.code_hash = code_hash
+        self.code_size = len(code)
+        self.jumpdests = jumpdest_bitmap(code)
+
+        self.blocks = basic_blocks(code)
+
+        ## filled in lazily by vm.decoder and vm.compiler
+        self.instructions = None
+        self.block_gas = None
+        self.block_stack = None
+        self.executable = {}
+
+    @classmethod
+    def restore(cls, code_hash: bytes, code_size: int, jumpdests, blocks: list, block_gas: list):
+        """ Rebuilds an analysis from previously computed results """
+        analysis = cls.__new__(cls)
+        analysis.code_hash = code_hash
+        analysis.code_size = code_size
+        analysis.jumpdests = jumpdests
+        analysis.blocks = blocks
+        analysis.block_gas = block_gas
+        analysis.block_stack = None
+        analysis.instructions = None
+        analysis.executable = {}
+
+        return analysis
+
+    def valid_jumpdest(self, dest: int) -> bool:
+        if dest >= self.code_size:
+            return False
+
+        return (self.jumpdests[dest >> 3] >> (dest & 7)) & 1 == 1
+
+
+class CodeCache():
+    """
+    Analyses (and the decoded streams hanging off them) keyed by code hash,
+    keeping the `capacity` most recently used. A `store` with
+    `load(code_hash, code)` and `save(analysis, code)` is consulted on a miss
+    before analysing and is handed every fresh analysis.
+    """
+
+    def __init__(self, capacity: int=4096, store=None):
+        self.capacity = capacity
+        self.store = store
+        self.entries: OrderedDict = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __contains__(self, code_hash: bytes) -> bool:
+        return code_hash in self.entries
+
+    def get(self, code_hash: bytes, code: bytes) -> CodeAnalysis:
+        entries = self.entries
+
+        analysis = entries.get(code_hash)
+        if analysis is not None:
+            self.hits += 1
+            entries.move_to_end(code_hash)
+            return analysis
+
+        self.misses += 1
+
+        if self.store is not None:
+            analysis = self.store.load(code_hash, code)
+
+        if analysis is None:
+            analysis = CodeAnalysis(code_hash, code)
+            if self.store is not None:
+                self.store.save(analysis, code)
+
+        entries[code_hash] = analysis
+        if len(entries) > self.capacity:
+            entries.popitem(last=False)
+
+        return analysis
+
+    def clear(self):
+        self.entries.clear()
+
+
+AnalysisCache: CodeCache = CodeCache()
+
+def use_code_cache(cache: CodeCache):
+    """ Replaces the process wide analysis cache """
+    global AnalysisCache
+    AnalysisCache = cache
+
+def analyse(code_hash: bytes, code: bytes) -> CodeAnalysis:
+    """ Returns the cached analysis for code_hash, analysing the code on first use """
+    return AnalysisCache.get(code_hash, code)
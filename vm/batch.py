@@ -0,0 +1,557 @@
+import numpy as np
+
+from vm.opcode import Opcode
+from vm.contract import Contract
+from vm.memory import Memory, WORD_SIZE, to_word_size
+from vm.stack import Stack
+from vm.machine_ctx import MachineContext
+from vm.decoder import block_rest, decoded, static_block_gas
+from vm.gas import OutOfGasError, memory_gas
+from vm.constants import (
+    CompletedExecution,
+    ReturnCode,
+)
+
+"""
+Lockstep batch execution of one contract over many calldata inputs.
+
+All inputs (lanes) of a batch start in a single group that shares a program
+counter, gas counter and stack height. Every stack slot of a group is one
+numpy array of shape (lanes, 8) holding a 256-bit word per lane as eight 32-bit
+limbs (least significant first) stored in uint64, so limb products and carries
+never overflow. Supported instructions are applied to all lanes of a group at
+once.
+
+A group splits when a JUMPI condition differs between its lanes: each side
+keeps running vectorized while it has at least `min_lanes` lanes and is handed
+to the scalar `EVMInterpreter` otherwise. Instructions without a vector
+implementation, and operands that are not uniform across lanes where one value
+is needed (jump targets, memory offsets), also hand the group over to the
+scalar interpreter, which resumes each lane from its current pc, stack, memory
+and gas.
+
+Lanes are independent calls against the same prestate: a lane resumed on the
+scalar interpreter runs on the wrapped interpreter's state and its state
+changes are discarded when it halts, so no lane observes another lane's
+writes whatever order the groups run in.
+
+numpy is an optional dependency and is only imported by this module.
+"""
+
+LIMBS = 8
+LIMB_BITS = 32
+LIMB_MASK = (1 << LIMB_BITS) - 1
+
+## control flow signals returned by vector handlers ##
+FALLBACK = object()
+HALTED = object()
+
+
+def int_to_limbs(value: int) -> np.ndarray:
+    return np.array([(value >> (LIMB_BITS * i)) & LIMB_MASK for i in range(LIMBS)], dtype=np.uint64)
+
+def bytes_to_limbs(data: np.ndarray) -> np.ndarray:
+    """ Converts a (lanes, 32) uint8 array of big endian words to limbs """
+    words = np.ascontiguousarray(data).view(">u4")
+    return words[:, ::-1].astype(np.uint64)
+
+def limbs_to_bytes(value: np.ndarray) -> np.ndarray:
+    """ Converts limbs to a (lanes, 32) uint8 array of big endian words """
+    return np.ascontiguousarray(value[:, ::-1]).astype(">u4").view(np.uint8)
+
+def limbs_to_ints(value: np.ndarray) -> list:
+    return [int.from_bytes(row.tobytes(), "big") for row in limbs_to_bytes(value)]
+
+def bool_to_limbs(mask: np.ndarray) -> np.ndarray:
+    out = np.zeros((len(mask), LIMBS), dtype=np.uint64)
+    out[:, 0] = mask
+    return out
+
+def uniform(value: np.ndarray):
+    """ Returns the int held by every lane, or None when lanes disagree """
+    if not (value == value[0]).all():
+        return None
+
+    return int.from_bytes(limbs_to_bytes(value[:1]).tobytes(), "big")
+
+
+##                         ##
+#   256-bit limb arithmetic  #
+##                         ##
+
+def carry(columns: np.ndarray) -> np.ndarray:
+    """ Normalises column sums back to 32-bit limbs, dropping the final carry (mod 2**256) """
+    c = np.zeros(len(columns), dtype=np.uint64)
+    for i in range(LIMBS):
+        columns[:, i] += c
+        c = columns[:, i] >> LIMB_BITS
+        columns[:, i] &= LIMB_MASK
+
+    return columns
+
+def add(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    return carry(a + b)
+
+def sub(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    ## a - b == a + ~b + 1
+    columns = a + (LIMB_MASK - b)
+    columns[:, 0] += 1
+    return carry(columns)
+
+def mul(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    columns = np.zeros_like(a)
+    for i in range(LIMBS):
+        for j in range(LIMBS - i):
+            product = a[:, i] * b[:, j]
+            columns[:, i + j] += product & LIMB_MASK
+            if i + j + 1 < LIMBS:
+                columns[:, i + j + 1] += product >> LIMB_BITS
+
+    return carry(columns)
+
+def lt(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    less = np.zeros(len(a), dtype=bool)
+    equal = np.ones(len(a), dtype=bool)
+    for i in reversed(range(LIMBS)):
+        less |= equal & (a[:, i] < b[:, i])
+        equal &= a[:, i] == b[:, i]
+
+    return less
+
+def shift_right(value: np.ndarray, shift: int) -> np.ndarray:
+    out = np.zeros_like(value)
+    if shift >= 256:
+        return out
+
+    words, bits = divmod(shift, LIMB_BITS)
+    for i in range(LIMBS - words):
+        out[:, i] = value[:, i + words] >> bits
+        if bits and i + words + 1 < LIMBS:
+            out[:, i] |= (value[:, i + words + 1] << (LIMB_BITS - bits)) & LIMB_MASK
+
+    return out
+
+def shift_left(value: np.ndarray, shift: int) -> np.ndarray:
+    out = np.zeros_like(value)
+    if shift >= 256:
+        return out
+
+    words, bits = divmod(shift, LIMB_BITS)
+    for i in range(words, LIMBS):
+        out[:, i] = (value[:, i - words] << bits) & LIMB_MASK
+        if bits and i - words - 1 >= 0:
+            out[:, i] |= value[:, i - words - 1] >> (LIMB_BITS - bits)
+
+    return out
+
+
+class LaneGroup():
+    """ Lanes that share a program counter and therefore execute in lockstep """
+    __slots__ = ("lanes", "pc", "stack", "mem", "gas")
+
+    def __init__(self, lanes: np.ndarray, pc: int, stack: list, mem: np.ndarray, gas: int):
+        self.lanes = lanes
+        self.pc = pc
+        self.stack = stack
+        self.mem = mem
+        self.gas = gas
+
+    def take(self, mask: np.ndarray, pc: int):
+        return LaneGroup(self.lanes[mask], pc, [word[mask] for word in self.stack], self.mem[mask], self.gas)
+
+
+##                 ##
+#   vector handlers  #
+##                 ##
+"""
+Handlers take (batch, group, imm) and return None to continue, FALLBACK to
+hand the group to the scalar interpreter (before touching any state) or
+HALTED once every lane of the group has a result.
+"""
+
+def needs(group: LaneGroup, pops: int, pushes: int) -> bool:
+    height = len(group.stack)
+    return height >= pops and height - pops + pushes <= 1024
+
+def makeBinaryOp(fn):
+    def vecBinary(batch, group: LaneGroup, imm):
+        if not needs(group, 2, 1):
+            return FALLBACK
+
+        a, b = group.stack.pop(), group.stack.pop()
+        group.stack.append(fn(a, b))
+
+    return vecBinary
+
+def makeCompareOp(fn):
+    return makeBinaryOp(lambda a, b: bool_to_limbs(fn(a, b)))
+
+def vecNot(batch, group: LaneGroup, imm):
+    if not needs(group, 1, 1):
+        return FALLBACK
+
+    group.stack.append(LIMB_MASK - group.stack.pop())
+
+def vecIsZero(batch, group: LaneGroup, imm):
+    if not needs(group, 1, 1):
+        return FALLBACK
+
+    group.stack.append(bool_to_limbs((group.stack.pop() == 0).all(axis=1)))
+
+def makeShiftOp(fn):
+    def vecShift(batch, group: LaneGroup, imm):
+        if not needs(group, 2, 1):
+            return FALLBACK
+
+        shift = uniform(group.stack[-1])
+        if shift is None:
+            return FALLBACK
+
+        group.stack.pop()
+        group.stack.append(fn(group.stack.pop(), shift))
+
+    return vecShift
+
+def vecPush(batch, group: LaneGroup, imm):
+    if not needs(group, 0, 1):
+        return FALLBACK
+
+    group.stack.append(np.tile(int_to_limbs(imm), (len(group.lanes), 1)))
+
+def makeDupOp(n: int):
+    def vecDup(batch, group: LaneGroup, imm):
+        if not needs(group, n, n + 1):
+            return FALLBACK
+
+        ## words are never modified in place, so sharing the array is safe
+        group.stack.append(group.stack[-n])
+
+    return vecDup
+
+def makeSwapOp(n: int):
+    def vecSwap(batch, group: LaneGroup, imm):
+        if not needs(group, n + 1, n + 1):
+            return FALLBACK
+
+        s = group.stack
+        s[-1], s[-1 - n] = s[-1 - n], s[-1]
+
+    return vecSwap
+
+def vecPop(batch, group: LaneGroup, imm):
+    if not needs(group, 1, 0):
+        return FALLBACK
+
+    group.stack.pop()
+
+def vecJumpDest(batch, group: LaneGroup, imm):
+    pass
+
+def vecJump(batch, group: LaneGroup, imm):
+    if not needs(group, 1, 0):
+        return FALLBACK
+
+    dest = uniform(group.stack[-1])
+    if dest is None:
+        return FALLBACK
+
+    group.stack.pop()
+    if not batch.analysis.valid_jumpdest(dest):
+        return batch.halt(group, CompletedExecution(code=ReturnCode.INVALID_JUMP, data=None))
+
+    group.pc = dest
+
+def vecJumpI(batch, group: LaneGroup, imm):
+    if not needs(group, 2, 0):
+        return FALLBACK
+
+    dest = uniform(group.stack[-1])
+    if dest is None:
+        return FALLBACK
+
+    group.stack.pop()
+    taken = (group.stack.pop() != 0).any(axis=1)
+
+    if taken.all():
+        if not batch.analysis.valid_jumpdest(dest):
+            return batch.halt(group, CompletedExecution(code=ReturnCode.INVALID_JUMP, data=None))
+        group.pc = dest
+        return
+
+    if not taken.any():
+        return
+
+    ## control flow diverges: split the group at the jump
+    fallthrough = group.take(~taken, group.pc)
+    jumped = group.take(taken, dest)
+
+    if batch.analysis.valid_jumpdest(dest):
+        batch.schedule(jumped)
+    else:
+        batch.halt(jumped, CompletedExecution(code=ReturnCode.INVALID_JUMP, data=None))
+
+    batch.schedule(fallthrough)
+    return HALTED
+
+def expand(group: LaneGroup, offset: int, size: int):
+    """ Memory is kept the same size on every lane, so expansion is charged once per group """
+    if size == 0:
+        return
+
+    words, current = to_word_size(offset + size), group.mem.shape[1] // WORD_SIZE
+    if words > current:
+        cost = memory_gas(words) - memory_gas(current)
+        if cost > group.gas:
+            raise OutOfGasError(f"Out of gas: {cost} required, {group.gas} available")
+
+        group.gas -= cost
+        grown = np.zeros((len(group.lanes), words * WORD_SIZE), dtype=np.uint8)
+        grown[:, :group.mem.shape[1]] = group.mem
+        group.mem = grown
+
+def vecMload(batch, group: LaneGroup, imm):
+    if not needs(group, 1, 1):
+        return FALLBACK
+
+    offset = uniform(group.stack[-1])
+    if offset is None:
+        return FALLBACK
+
+    expand(group, offset, 32)
+    group.stack.pop()
+    group.stack.append(bytes_to_limbs(group.mem[:, offset : offset + 32]))
+
+def vecMstore(batch, group: LaneGroup, imm):
+    if not needs(group, 2, 0):
+        return FALLBACK
+
+    offset = uniform(group.stack[-1])
+    if offset is None:
+        return FALLBACK
+
+    expand(group, offset, 32)
+    group.stack.pop()
+    group.mem[:, offset : offset + 32] = limbs_to_bytes(group.stack.pop())
+
+def vecMstore8(batch, group: LaneGroup, imm):
+    if not needs(group, 2, 0):
+        return FALLBACK
+
+    offset = uniform(group.stack[-1])
+    if offset is None:
+        return FALLBACK
+
+    expand(group, offset, 1)
+    group.stack.pop()
+    group.mem[:, offset] = group.stack.pop()[:, 0] & 0xFF
+
+def vecMsize(batch, group: LaneGroup, imm):
+    return vecPush(batch, group, group.mem.shape[1])
+
+def vecPc(batch, group: LaneGroup, imm):
+    return vecPush(batch, group, batch.current_pc)
+
+def vecGas(batch, group: LaneGroup, imm):
+    return vecPush(batch, group, group.gas)
+
+def vecCallValue(batch, group: LaneGroup, imm):
+    return vecPush(batch, group, batch.contract.value)
+
+def vecCodeSize(batch, group: LaneGroup, imm):
+    return vecPush(batch, group, len(batch.contract.code))
+
+def vecCallDataSize(batch, group: LaneGroup, imm):
+    if not needs(group, 0, 1):
+        return FALLBACK
+
+    group.stack.append(bool_to_limbs(batch.sizes[group.lanes]))
+
+def vecCallDataLoad(batch, group: LaneGroup, imm):
+    if not needs(group, 1, 1):
+        return FALLBACK
+
+    offset = uniform(group.stack[-1])
+    if offset is None:
+        return FALLBACK
+
+    group.stack.pop()
+    if offset >= batch.calldata.shape[1] - 32:
+        group.stack.append(np.zeros((len(group.lanes), LIMBS), dtype=np.uint64))
+    else:
+        group.stack.append(bytes_to_limbs(batch.calldata[group.lanes, offset : offset + 32]))
+
+def makeReturnOp(code: ReturnCode):
+    def vecReturn(batch, group: LaneGroup, imm):
+        if not needs(group, 2, 0):
+            return FALLBACK
+
+        offset, size = uniform(group.stack[-1]), uniform(group.stack[-2])
+        if offset is None or size is None:
+            return FALLBACK
+
+        expand(group, offset, size)
+        for lane, row in zip(group.lanes, group.mem):
+            data = row[offset : offset + size].tobytes()
+            batch.results[lane] = CompletedExecution(code=code, data=data, gas_left=group.gas)
+
+        return HALTED
+
+    return vecReturn
+
+def vecStop(batch, group: LaneGroup, imm):
+    return batch.halt(group, CompletedExecution(code=ReturnCode.STOPPED, data=None, gas_left=group.gas))
+
+
+VectorTable: list = [None] * 256
+
+for op, fn in {
+    Opcode.ADD: add,
+    Opcode.SUB: sub,
+    Opcode.MUL: mul,
+    Opcode.AND: np.bitwise_and,
+    Opcode.OR: np.bitwise_or,
+    Opcode.XOR: np.bitwise_xor,
+}.items():
+    VectorTable[op] = makeBinaryOp(fn)
+
+VectorTable[Opcode.LT] = makeCompareOp(lt)
+VectorTable[Opcode.GT] = makeCompareOp(lambda a, b: lt(b, a))
+VectorTable[Opcode.EQ] = makeCompareOp(lambda a, b: (a == b).all(axis=1))
+VectorTable[Opcode.ISZERO] = vecIsZero
+VectorTable[Opcode.NOT] = vecNot
+VectorTable[Opcode.SHL] = makeShiftOp(shift_left)
+VectorTable[Opcode.SHR] = makeShiftOp(shift_right)
+
+for i in range(32):
+    VectorTable[Opcode.PUSH1 + i] = vecPush
+for i in range(16):
+    VectorTable[Opcode.DUP1 + i] = makeDupOp(i + 1)
+    VectorTable[Opcode.SWAP1 + i] = makeSwapOp(i + 1)
+
+VectorTable[Opcode.POP] = vecPop
+VectorTable[Opcode.JUMP] = vecJump
+VectorTable[Opcode.JUMPI] = vecJumpI
+VectorTable[Opcode.JUMPDEST] = vecJumpDest
+VectorTable[Opcode.MLOAD] = vecMload
+VectorTable[Opcode.MSTORE] = vecMstore
+VectorTable[Opcode.MSTORE8] = vecMstore8
+VectorTable[Opcode.MSIZE] = vecMsize
+VectorTable[Opcode.PC] = vecPc
+VectorTable[Opcode.GAS] = vecGas
+VectorTable[Opcode.CALLVALUE] = vecCallValue
+VectorTable[Opcode.CODESIZE] = vecCodeSize
+VectorTable[Opcode.CALLDATASIZE] = vecCallDataSize
+VectorTable[Opcode.CALLDATALOAD] = vecCallDataLoad
+VectorTable[Opcode.STOP] = vecStop
+VectorTable[Opcode.RETURN] = makeReturnOp(ReturnCode.STOPPED)
+VectorTable[Opcode.REVERT] = makeReturnOp(ReturnCode.REVERTED)
+
+
+class BatchInterpreter:
+    """ Runs one contract against many calldata inputs, vectorizing lanes that agree on control flow """
+
+    def __init__(self, interpreter=None, min_lanes: int=8):
+        if interpreter is None:
+            from vm.interpreter import EVMInterpreter
+            interpreter = EVMInterpreter()
+
+        self.interpreter = interpreter
+        self.min_lanes = min_lanes
+
+    def run(self, contract: Contract, calldata: list) -> list:
+        """ Returns one `CompletedExecution` per calldata input, in input order """
+        self.contract = contract
+        self.analysis = contract.analyse()
+        self.inputs = [bytes(data) if data is not None else b"" for data in calldata]
+        self.results: list = [None] * len(self.inputs)
+
+        ## calldata of every lane, zero padded so any in-range 32 byte load is a plain slice
+        width = max((len(data) for data in self.inputs), default=0)
+        self.calldata = np.zeros((len(self.inputs), width + 32), dtype=np.uint8)
+        for lane, data in enumerate(self.inputs):
+            self.calldata[lane, :len(data)] = np.frombuffer(data, dtype=np.uint8)
+        self.sizes = np.array([len(data) for data in self.inputs], dtype=np.uint64)
+
+        self.leaders = {start: cost for (start, _), cost in zip(self.analysis.blocks, static_block_gas(contract))}
+        self.stream = decoded(contract)
+
+        self.pending: list = []
+        if self.inputs:
+            lanes = np.arange(len(self.inputs))
+            empty = np.zeros((len(lanes), 0), dtype=np.uint8)
+            self.pending.append(LaneGroup(lanes, 0, [], empty, contract.gas))
+
+        while self.pending:
+            self.step(self.pending.pop())
+
+        return self.results
+
+    def schedule(self, group: LaneGroup):
+        if len(group.lanes) >= self.min_lanes:
+            self.pending.append(group)
+        else:
+            self.fallback(group)
+
+    def halt(self, group: LaneGroup, result: CompletedExecution):
+        for lane in group.lanes:
+            self.results[lane] = CompletedExecution(code=result.code, data=result.data, gas_left=result.gas_left)
+
+        return HALTED
+
+    def step(self, group: LaneGroup):
+        """ Executes a group in lockstep until it halts, splits or needs the scalar interpreter """
+        code, stream, leaders = self.contract.code, self.stream, self.leaders
+        size = len(code)
+
+        while True:
+            pc = group.pc
+            op = code[pc] if pc < size else Opcode.STOP
+            handler = VectorTable[op]
+            if handler is None:
+                return self.fallback(group)
+
+            ## static gas is charged per basic block, exactly like the metered stream
+            charged = leaders.get(pc, 0)
+            if charged > group.gas:
+                return self.halt(group, CompletedExecution(code=ReturnCode.OUT_OF_GAS, data=None))
+            group.gas -= charged
+
+            _, imm, group.pc = stream[pc]
+            self.current_pc = pc
+
+            try:
+                signal = handler(self, group, imm)
+            except OutOfGasError:
+                return self.halt(group, CompletedExecution(code=ReturnCode.OUT_OF_GAS, data=None))
+
+            if signal is HALTED:
+                return
+            if signal is FALLBACK:
+                group.pc = pc
+                group.gas += charged
+                return self.fallback(group)
+
+    def fallback(self, group: LaneGroup):
+        """ Resumes every lane of the group on the scalar interpreter """
+        words = [limbs_to_ints(word) for word in group.stack]
+
+        ## the whole block was charged at its leader, the resumed run charges the rest of it again
+        rest = block_rest(self.contract, group.pc)
+        gas = group.gas + rest[1] if rest is not None else group.gas
+
+        base, state = self.contract, self.interpreter.state
+
+        for i, lane in enumerate(group.lanes):
+            contract = Contract(base.code, self.inputs[lane], value=base.value, gas=base.gas, address=base.address, caller=base.caller)
+            contract.code_hash, contract.analysis = self.analysis.code_hash, self.analysis
+
+            stack, mem = Stack(), Memory()
+            for word in words:
+                stack.push(word[i])
+            mem.store[:] = group.mem[i].tobytes()
+
+            ctx = MachineContext(contract, mem, stack, gas=gas, state=state, origin=base.caller)
+            try:
+                self.results[lane] = self.interpreter.execute(ctx, group.pc)
+            finally:
+                state.discard()
@@ -0,0 +1,174 @@
+import fcntl
+import mmap
+import os
+import struct
+from array import array
+from contextlib import contextmanager
+
+from vm.analysis import CodeAnalysis
+from vm.decoder import block_gas
+
+"""
+On-disk store of code analyses.
+
+A single append-only file of records, one per code hash:
+
+    header    code hash, code size, bitmap length, block count, gas count
+    bitmap    JUMPDEST bitmap, one bit per code byte
+    blocks    2 * block count uint32 (start, end) pcs
+    gas       gas count uint64 static gas per block
+
+Numbers are stored in native byte order, so a store is local to the machine
+that wrote it. The file is memory mapped and indexed by code hash when opened.
+Restored JUMPDEST bitmaps are views into the mapping, so loading an analysis
+does not copy it. Decoded instruction streams hold Python closures and are not stored;
+they are rebuilt from the code on first execution, which is cheap next to
+the analysis passes the store saves.
+
+Records are appended with one write on an O_APPEND descriptor while holding
+an exclusive `flock`, so worker processes sharing a store never interleave
+records; a code saved by several workers just appears more than once. A
+partial last record seen without the lock is a peer's append in progress and
+is left for a later scan. One still there once the lock is held was left by a
+writer that died mid-append, and opening the store drops it.
+
+Records appended after the store was opened, by this process or another, are
+mapped and indexed lazily when a lookup misses.
+"""
+
+MAGIC = b"EVMCODE1"
+Header = struct.Struct("<32sIIII")
+
+
+class CodeStore():
+    def __init__(self, path: str):
+        self.path = path
+
+        self.fd = os.open(path, os.O_RDWR | os.O_CREAT | os.O_APPEND, 0o644)
+
+        self.map = None
+        self.mapped = 0
+
+        ## code hash -> record offset, and where the last indexed record ends
+        self.index: dict = {}
+        self.end = len(MAGIC)
+
+        with self.locked():
+            if self.size() == 0:
+                os.write(self.fd, MAGIC)
+
+            self.remap()
+            if self.map[:len(MAGIC)] != MAGIC:
+                raise ValueError(f"{path} is not a code store")
+
+            ## appends hold the lock, so a partial last record here belongs to a dead writer
+            self.end = self.scan(self.end)
+            if self.end < self.mapped:
+                os.ftruncate(self.fd, self.end)
+                self.remap()
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def __contains__(self, code_hash: bytes) -> bool:
+        return code_hash in self.index
+
+    def size(self) -> int:
+        return os.fstat(self.fd).st_size
+
+    @contextmanager
+    def locked(self):
+        fcntl.flock(self.fd, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(self.fd, fcntl.LOCK_UN)
+
+    def remap(self):
+        ## earlier maps stay alive for as long as restored bitmaps still view them
+        self.map = mmap.mmap(self.fd, 0, access=mmap.ACCESS_READ)
+        self.mapped = len(self.map)
+
+    def scan(self, offset: int):
+        """ Indexes every complete record from `offset` on, returns where the last one ends """
+        data = self.map
+        while offset + Header.size <= self.mapped:
+            code_hash, _, bitmap_size, block_count, gas_count = Header.unpack_from(data, offset)
+
+            end = offset + Header.size + bitmap_size + 8 * block_count + 8 * gas_count
+            if end > self.mapped:
+                break
+
+            self.index[code_hash] = offset
+            offset = end
+
+        return offset
+
+    def refresh(self):
+        """ Maps and indexes the complete records appended since the last scan """
+        if self.size() > self.mapped:
+            self.remap()
+
+        self.end = self.scan(self.end)
+
+    def load(self, code_hash: bytes, code: bytes) -> CodeAnalysis:
+        offset = self.index.get(code_hash)
+        if offset is None:
+            self.refresh()
+            offset = self.index.get(code_hash)
+            if offset is None:
+                return None
+
+        elif offset >= self.mapped:
+            ## saved by this process after the file was last mapped
+            self.remap()
+
+        view = memoryview(self.map)
+        _, code_size, bitmap_size, block_count, gas_count = Header.unpack_from(view, offset)
+        if code_size != len(code):
+            return None
+
+        offset += Header.size
+        jumpdests = view[offset : offset + bitmap_size]
+        offset += bitmap_size
+
+        bounds = array("I")
+        bounds.frombytes(view[offset : offset + 8 * block_count])
+        offset += 8 * block_count
+
+        gas = array("Q")
+        gas.frombytes(view[offset : offset + 8 * gas_count])
+
+        blocks = list(zip(bounds[0::2], bounds[1::2]))
+        return CodeAnalysis.restore(code_hash, code_size, jumpdests, blocks, gas.tolist() if gas_count else None)
+
+    def save(self, analysis: CodeAnalysis, code: bytes):
+        """ Appends an analysis, computing its per block static gas first if needed """
+        if analysis.code_hash in self.index:
+            return
+
+        if analysis.block_gas is None:
+            analysis.block_gas = block_gas(code, analysis.blocks)
+
+        bounds = array("I", [pc for block in analysis.blocks for pc in block])
+        gas = array("Q", analysis.block_gas)
+
+        record = b"".join([
+            Header.pack(analysis.code_hash, analysis.code_size, len(analysis.jumpdests), len(analysis.blocks), len(gas)),
+            bytes(analysis.jumpdests),
+            bounds.tobytes(),
+            gas.tobytes(),
+        ])
+
+        ## with O_APPEND the write lands at the end of the file whoever else appended
+        with self.locked():
+            written = os.write(self.fd, record)
+            offset = os.lseek(self.fd, 0, os.SEEK_CUR) - len(record)
+
+        if written != len(record):
+            raise OSError(f"short write to {self.path}")
+
+        self.index[analysis.code_hash] = offset
+
+    def close(self):
+        os.close(self.fd)
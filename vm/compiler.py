@@ -0,0 +1,287 @@
+from vm.opcode import Opcode
+from vm.contract import Contract
+from vm.stack import StackError
+from vm.decoder import decoded, static_block_gas
+from vm.constants import (
+    MAX_UINT_256,
+    CompletedExecution,
+    ReturnCode,
+)
+
+"""
+Ahead-of-time basic block compiler.
+
+Every basic block of a contract is turned into one generated Python function.
+Stack manipulation (PUSH/DUP/SWAP/POP) and simple arithmetic, comparison and
+bitwise instructions are inlined into local variables, so a run of such
+instructions touches the real `Stack` only once when the block (or the run
+before a non-inlined instruction) ends. Stack bounds are checked once per run
+instead of on every push and pop. Instructions that are not inlined call their
+regular handler. The static gas of the whole block is charged on entry.
+
+The compiled stream has the same shape as the decoded stream, with each block
+leader replaced by its compiled block, so the same interpreter loop drives it.
+"""
+
+## pure instructions that pop two words and push one: `a` is the top of the stack
+BinaryTemplates: dict = {
+    Opcode.ADD: "({a} + {b}) & M",
+    Opcode.SUB: "({a} - {b}) & M",
+    Opcode.MUL: "({a} * {b}) & M",
+    Opcode.AND: "{a} & {b}",
+    Opcode.OR: "{a} | {b}",
+    Opcode.XOR: "{a} ^ {b}",
+    Opcode.LT: "1 if {a} < {b} else 0",
+    Opcode.GT: "1 if {a} > {b} else 0",
+    Opcode.EQ: "1 if {a} == {b} else 0",
+}
+
+UnaryTemplates: dict = {
+    Opcode.ISZERO: "1 if {a} == 0 else 0",
+    Opcode.NOT: "M - {a}",
+}
+
+INVALID_JUMP = "return CompletedExecution(code=ReturnCode.INVALID_JUMP, data=None)"
+
+
+class Operand():
+    """ A value on the compile-time stack: a literal, a local or an untouched real stack slot """
+    __slots__ = ("text", "const", "depth")
+
+    def __init__(self, text: str, const: int=None, depth: int=None):
+        self.text = text
+        self.const = const
+        self.depth = depth
+
+
+class BlockBuilder():
+    """ Emits the body of one compiled block while tracking the virtual stack """
+
+    def __init__(self, analysis, start: int, end: int):
+        self.analysis = analysis
+        self.start = start
+        self.end = end
+        self.lines: list = []
+        self.handlers: dict = {}
+        self.locals = 0
+        self.pc_dirty = False
+        self.open_segment()
+
+    ## segment management ##
+
+    def open_segment(self):
+        self.vstack: list = []
+        self.consumed = 0
+        self.max_height = 0
+        self.segment: list = []
+
+    def close_segment(self):
+        """ Writes the virtual stack back and prepends the segment's bound checks """
+        body = self.segment
+
+        for i, operand in enumerate(self.vstack):
+            if operand.depth != self.consumed - i:
+                body.append(f"st[{self.offset(i)}] = {operand.text}")
+
+        if self.consumed or self.vstack:
+            body.append(f"s.count = {self.offset(len(self.vstack))}")
+
+        header: list = []
+        if self.consumed:
+            header.append(f"if n < {self.consumed}: raise StackError('Trying to read from empty stack')")
+        if self.max_height > 0:
+            header.append(f"if n + {self.max_height} > s.size: raise StackError('Maximum number of elements exceeded')")
+        if body or header:
+            header.insert(0, "n = s.count")
+
+        self.lines.extend(header + body)
+        self.open_segment()
+
+    def offset(self, i: int) -> str:
+        """ Source for the real stack index of virtual stack slot i """
+        delta = i - self.consumed
+        if delta == 0:
+            return "n"
+
+        return f"n+{delta}" if delta > 0 else f"n-{-delta}"
+
+    ## virtual stack ##
+
+    def new_local(self) -> str:
+        self.locals += 1
+        return f"v{self.locals}"
+
+    def require(self, count: int):
+        """ Loads real stack words underneath the virtual stack until it holds `count` operands """
+        while len(self.vstack) < count:
+            self.consumed += 1
+            name = self.new_local()
+            self.segment.append(f"{name} = st[n-{self.consumed}]")
+            self.vstack.insert(0, Operand(name, depth=self.consumed))
+
+    def push(self, operand: Operand):
+        self.vstack.append(operand)
+        self.max_height = max(self.max_height, len(self.vstack) - self.consumed)
+
+    def pop(self) -> Operand:
+        self.require(1)
+        return self.vstack.pop()
+
+    def emit_value(self, template: str, *operands) -> Operand:
+        names = dict(zip("ab", (o.text for o in operands)))
+
+        if all(o.const is not None for o in operands):
+            value = eval(template.format(**names), {"M": MAX_UINT_256})
+            return Operand(str(value), const=value)
+
+        name = self.new_local()
+        self.segment.append(f"{name} = {template.format(**names)}")
+        return Operand(name)
+
+    ## instructions ##
+
+    def add(self, pc: int, op: int, handler, imm: int, next_pc: int):
+        if imm is not None:
+            self.push(Operand(str(imm), const=imm))
+
+        elif op in BinaryTemplates:
+            a, b = self.pop(), self.pop()
+            self.push(self.emit_value(BinaryTemplates[op], a, b))
+
+        elif op in UnaryTemplates:
+            self.push(self.emit_value(UnaryTemplates[op], self.pop()))
+
+        elif Opcode.DUP1 <= op <= Opcode.DUP16:
+            n = op - Opcode.DUP1 + 1
+            self.require(n)
+            self.push(self.vstack[-n])
+
+        elif Opcode.SWAP1 <= op <= Opcode.SWAP16:
+            n = op - Opcode.SWAP1 + 1
+            self.require(n + 1)
+            self.vstack[-1], self.vstack[-1 - n] = self.vstack[-1 - n], self.vstack[-1]
+
+        elif op == Opcode.POP:
+            self.pop()
+
+        elif op == Opcode.PC:
+            self.push(Operand(str(pc), const=pc))
+
+        elif op == Opcode.JUMPDEST:
+            pass
+
+        elif op == Opcode.JUMP:
+            dest = self.pop()
+            self.close_segment()
+            self.emit_jump(dest)
+
+            ## an unconditional jump never falls through to the next block
+            self.pc_dirty = False
+
+        elif op == Opcode.JUMPI:
+            dest, cond = self.pop(), self.pop()
+            self.close_segment()
+
+            if cond.const is not None:
+                if cond.const:
+                    self.emit_jump(dest)
+                    self.pc_dirty = False
+                else:
+                    self.emit_fallthrough()
+            else:
+                self.emit_fallthrough()
+                self.lines.append(f"if {cond.text}:")
+                self.emit_jump(dest, indent="    ")
+
+        else:
+            self.close_segment()
+            self.emit_call(op, handler, next_pc)
+
+    def emit_call(self, op: int, handler, next_pc: int):
+        name = f"H{self.start}_{len(self.handlers)}"
+        self.handlers[name] = handler
+
+        self.lines.append(f"pc.pc = {next_pc}")
+        self.lines.append(f"r = {name}(pc, interp, ctx)")
+        self.lines.append("if r is not None: return r")
+        self.pc_dirty = next_pc != self.end
+
+    def emit_jump(self, dest: Operand, indent: str=""):
+        if dest.const is not None:
+            if self.analysis.valid_jumpdest(dest.const):
+                self.lines.append(f"{indent}pc.pc = {dest.const}")
+            else:
+                self.lines.append(f"{indent}{INVALID_JUMP}")
+            return
+
+        self.lines.append(f"{indent}d = {dest.text}")
+        self.lines.append(f"{indent}if d >= SIZE or not (JD[d >> 3] >> (d & 7)) & 1: {INVALID_JUMP}")
+        self.lines.append(f"{indent}pc.pc = d")
+
+    def emit_fallthrough(self):
+        if self.pc_dirty:
+            self.lines.append(f"pc.pc = {self.end}")
+            self.pc_dirty = False
+
+    def finish(self) -> list:
+        self.close_segment()
+        self.emit_fallthrough()
+
+        return self.lines
+
+
+def compile_blocks(contract: Contract) -> list:
+    """ Compiles every basic block of the contract and returns the compiled stream """
+    analysis = contract.analyse()
+    stream: list = decoded(contract)
+    costs: list = static_block_gas(contract)
+
+    namespace: dict = {
+        "M": MAX_UINT_256,
+        "StackError": StackError,
+        "CompletedExecution": CompletedExecution,
+        "ReturnCode": ReturnCode,
+        "JD": analysis.jumpdests,
+        "SIZE": analysis.code_size,
+    }
+    source: list = []
+
+    for (start, end), cost in zip(analysis.blocks, costs):
+        builder = BlockBuilder(analysis, start, end)
+
+        pc = start
+        while pc < end:
+            handler, imm, next_pc = stream[pc]
+            builder.add(pc, contract.code[pc], handler, imm, next_pc)
+            pc = next_pc
+
+        body = builder.finish()
+        namespace.update(builder.handlers)
+
+        source.append(f"def block_{start}(pc, interp, ctx):")
+        if cost:
+            source.append(f"    if ctx.gas < {cost}: return CompletedExecution(code=ReturnCode.OUT_OF_GAS, data=None)")
+            source.append(f"    ctx.gas -= {cost}")
+        source.append("    s = ctx.stack")
+        source.append("    st = s.stack")
+        source.extend("    " + line for line in body)
+
+    exec(compile("\n".join(source), f"<compiled {analysis.code_hash.hex()}>", "exec"), namespace)
+
+    compiled_stream = list(stream)
+    for start, end in analysis.blocks:
+        compiled_stream[start] = (namespace[f"block_{start}"], None, end)
+
+    return compiled_stream
+
+
+def compiled(contract: Contract) -> list:
+    """ Returns the compiled stream for a contract, cached alongside its analysis """
+    analysis = contract.analyse()
+
+    stream = analysis.executable.get("compiled")
+    if stream is None:
+        stream = compile_blocks(contract)
+        analysis.executable["compiled"] = stream
+
+    return stream
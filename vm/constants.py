@@ -11,8 +11,20 @@ MAX_256_HEX: hex = 0xFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFF
 class ReturnCode(IntEnum):
     STOPPED = 0x0
     REVERTED = 0x1
+    INVALID = 0x2
+    INVALID_JUMP = 0x3
+    OUT_OF_GAS = 0x4
+
+## default gas made available to a contract call (mainnet block gas limit)
+DEFAULT_GAS: int = 30000000
+
+MAX_CALL_DEPTH: int = 1024
+MAX_CODE_SIZE: int = 24576 ## EIP-170
 
 @dataclass
 class CompletedExecution:
     code: ReturnCode
     data: bytearray
+    gas_left: int = 0
+    gas_refund: int = 0
+    logs: list = None
@@ -1,19 +1,55 @@
 from vm.pc import ProgramCounter
 from vm.opcode import Opcode
+from vm.analysis import CodeAnalysis, analyse
+from vm.constants import DEFAULT_GAS
+from vm.keccak import keccak256
 
 class Contract:        
-    ## TODO jump destination mapping && analysis logic
     code: bytearray = []
-    data: bytearray = []
+    data: bytes = b""
     value: int = 0
+    gas: int = DEFAULT_GAS
+    address: int = 0
+    caller: int = 0
 
-    def __init__(self, code, data, value=0):
+    def __init__(self, code, data, value=0, gas=DEFAULT_GAS, address=0, caller=0):
         self.code = code
+
+        ## calldata is immutable; CALLDATALOAD/CALLDATACOPY slice the view without copying.
+        ## read-only views (e.g. of a memory mapped file) are kept as they are
+        if data is None:
+            data = b""
+        elif not isinstance(data, bytes) and not (isinstance(data, memoryview) and data.readonly):
+            data = bytes(data)
+
         self.data = data
+        self.calldata = memoryview(self.data)
         self.value = value
+        self.gas = gas
+        self.address = address
+        self.caller = caller
+
+        self.code_hash = None
+        self.analysis = None
+
+    def get_code_hash(self) -> bytes:
+        if self.code_hash is None:
+            self.code_hash = keccak256(self.code)
+
+        return self.code_hash
+
+    def analyse(self) -> CodeAnalysis:
+        """ Attaches the (cached) jump destination analysis for this contract's code """
+        if self.analysis is None:
+            self.analysis = analyse(self.get_code_hash(), self.code)
+
+        return self.analysis
+
+    def valid_jumpdest(self, dest: int) -> bool:
+        return self.analyse().valid_jumpdest(dest)
 
     def get_op(self, pc: ProgramCounter) -> Opcode:
         if pc.get() >= len(self.code): ## attempting execution OUT OF BOUNDS
             return Opcode.STOP
 
-        return Opcode(self.code[pc.get()])
\ No newline at end of file
+        return Opcode(self.code[pc.get()])
@@ -0,0 +1,348 @@
+from bisect import bisect_right
+from collections import Counter
+
+from vm.contract import Contract
+from vm.constants import (
+    BIG_ENDIAN,
+    CompletedExecution,
+    ReturnCode,
+)
+from vm.instructions import (
+    DispatchTable,
+    FusedTable,
+    ReferenceTable,
+    StaticGasTable,
+    StackPops,
+    StackPushes,
+    UncheckedTable,
+    makePushValueOp,
+    makeUncheckedPushValueOp,
+    opInvalid,
+    opStop,
+    opFamily,
+)
+
+"""
+Predecoding of contract bytecode into a flat instruction stream.
+
+The stream holds one `(handler, immediate, next_pc)` entry per code byte so it
+can be indexed directly by program counter (jump destinations included). PUSH
+immediates are converted to ints once, and bytes that belong to PUSH data are
+filled with an INVALID entry that valid control flow never reaches. A trailing
+STOP entry at `len(code)` handles execution falling off the end of the code.
+"""
+
+ImmediateSizes: list = [0] * 256
+for op, instr in ReferenceTable.items():
+    ImmediateSizes[op] = instr.immediate_size
+
+
+def decode(code: bytes) -> list:
+    size = len(code)
+    stream: list = [None] * (size + 1)
+
+    pc = 0
+    while pc < size:
+        op = code[pc]
+        immediate_size = ImmediateSizes[op]
+        next_pc = pc + 1 + immediate_size
+
+        if immediate_size:
+            data = code[pc + 1 : next_pc]
+            imm = int.from_bytes(data, BIG_ENDIAN) << (8 * (immediate_size - len(data)))
+            stream[pc] = (makePushValueOp(imm), imm, min(next_pc, size))
+
+            for i in range(pc + 1, min(next_pc, size)):
+                stream[i] = (opInvalid, None, i + 1)
+        else:
+            stream[pc] = (DispatchTable[op], None, next_pc)
+
+        pc = next_pc
+
+    stream[size] = (opStop, None, size)
+    return stream
+
+
+def decoded(contract: Contract) -> list:
+    """ Returns the decoded instruction stream for a contract, cached alongside its analysis """
+    analysis = contract.analyse()
+
+    if analysis.instructions is None:
+        analysis.instructions = decode(contract.code)
+
+    return analysis.instructions
+
+
+##                                       ##
+#   superinstruction fusion (peephole)     #
+##                                       ##
+"""
+Sequences to fuse, most frequent first. The order reflects opcode family
+n-gram counts over solc output (see `sequence_profile`) and decides which
+pattern wins when several could start at the same instruction.
+"""
+FusionProfile: list = [
+    ("PUSH", "SWAP", "POP"),
+    ("DUP", "ISZERO", "PUSH", "JUMPI"),
+    ("ISZERO", "PUSH", "JUMPI"),
+    ("PUSH", "PUSH", "ADD"),
+    ("PUSH", "JUMPI"),
+    ("PUSH", "JUMP"),
+    ("PUSH", "ADD"),
+    ("SWAP", "POP"),
+]
+
+
+def sequence_profile(codes: list, length: int) -> Counter:
+    """ Counts opcode family n-grams of the given length over a corpus of bytecode """
+    counts: Counter = Counter()
+
+    for code in codes:
+        families, pc = [], 0
+        while pc < len(code):
+            families.append(opFamily(code[pc]))
+            pc += 1 + ImmediateSizes[code[pc]]
+
+        for i in range(len(families) - length + 1):
+            counts[tuple(families[i : i + length])] += 1
+
+    return counts
+
+
+def fuse(code: bytes, stream: list, analysis, profile: list=FusionProfile) -> list:
+    """
+    Returns a copy of the decoded stream where the first entry of every matched
+    sequence is replaced by a fused handler that continues after the sequence.
+    The remaining entries are kept so jumps into them still behave normally.
+    """
+    fused_stream = list(stream)
+    patterns = [seq for seq in profile if seq in FusedTable]
+    size = len(code)
+
+    pc = 0
+    while pc < size:
+        for pattern in patterns:
+            positions, p = [], pc
+            for family in pattern:
+                if p >= size or opFamily(code[p]) != family:
+                    break
+                positions.append(p)
+                p = stream[p][2]
+
+            if len(positions) == len(pattern):
+                imms = [stream[p][1] for p in positions]
+                ops = [code[p] for p in positions]
+
+                handler = FusedTable[pattern](imms, ops, analysis)
+                fused_stream[pc] = (handler, imms[0], p)
+                pc = p
+                break
+        else:
+            pc = stream[pc][2]
+
+    return fused_stream
+
+
+##                                       ##
+#   static gas metering per basic block     #
+##                                       ##
+def block_gas(code: bytes, blocks: list) -> list:
+    """ Sums the static gas of every instruction in each basic block """
+    costs: list = []
+
+    for start, end in blocks:
+        cost, pc = 0, start
+        while pc < end:
+            cost += StaticGasTable[code[pc]]
+            pc += 1 + ImmediateSizes[code[pc]]
+
+        costs.append(cost)
+
+    return costs
+
+
+def static_block_gas(contract: Contract) -> list:
+    analysis = contract.analyse()
+
+    if analysis.block_gas is None:
+        analysis.block_gas = block_gas(contract.code, analysis.blocks)
+
+    return analysis.block_gas
+
+
+##                                        ##
+#   stack height verification per block     #
+##                                        ##
+"""
+Every instruction's stack effect is static, so a basic block needs a fixed
+minimum stack height on entry (`required`) and raises the height by at most a
+fixed amount while it runs (`growth`). Checking both once when the block is
+entered proves that no instruction inside it can underflow or overflow, and
+the block then runs on the unchecked handlers. A block failing the check runs
+on the checked handlers instead, so the stack error (or any halt before it)
+happens at exactly the same instruction as without verification.
+"""
+
+def block_stack_bounds(code: bytes, blocks: list) -> list:
+    """ (required, growth) stack heights of every basic block """
+    bounds: list = []
+
+    for start, end in blocks:
+        height = required = growth = 0
+        pc = start
+        while pc < end:
+            op = code[pc]
+            required = max(required, StackPops[op] - height)
+            height += StackPushes[op] - StackPops[op]
+            growth = max(growth, height)
+            pc += 1 + ImmediateSizes[op]
+
+        bounds.append((required, growth))
+
+    return bounds
+
+
+def static_block_stack(contract: Contract) -> list:
+    analysis = contract.analyse()
+
+    if analysis.block_stack is None:
+        analysis.block_stack = block_stack_bounds(contract.code, analysis.blocks)
+
+    return analysis.block_stack
+
+
+def unchecked(code: bytes, stream: list, blocks: list) -> list:
+    """ Returns a copy of a decoded stream using unchecked handlers wherever one exists """
+    unchecked_stream = list(stream)
+
+    for start, end in blocks:
+        pc = start
+        while pc < end:
+            op = code[pc]
+            handler, imm, next_pc = stream[pc]
+
+            if ImmediateSizes[op]:
+                unchecked_stream[pc] = (makeUncheckedPushValueOp(imm), imm, next_pc)
+            elif op in UncheckedTable:
+                unchecked_stream[pc] = (UncheckedTable[op], imm, next_pc)
+
+            pc = next_pc
+
+    return unchecked_stream
+
+
+def makeCheckedBlock(stream: list, start: int, end: int):
+    """ Runs the block [start, end) on the checked handlers of a decoded stream """
+    def checkedBlock(pc, interp, ctx):
+        handler, _, next_pc = stream[start]
+        pc.pc = next_pc
+        result = handler(pc, interp, ctx)
+
+        ## stop when the block halts, jumps (a jump never lands inside a block) or falls through
+        while result is None and start < pc.pc < end:
+            handler, _, next_pc = stream[pc.pc]
+            pc.pc = next_pc
+            result = handler(pc, interp, ctx)
+
+        return result
+
+    return checkedBlock
+
+
+def block_rest(contract: Contract, pc: int) -> tuple:
+    """ (end, static gas) of the rest of the basic block `pc` lies inside, None when `pc` is a block leader """
+    blocks = contract.analyse().blocks
+
+    i = bisect_right(blocks, (pc, len(contract.code) + 1)) - 1
+    if i < 0 or not blocks[i][0] < pc < blocks[i][1]:
+        return None
+
+    end = blocks[i][1]
+    return end, block_gas(contract.code, [(pc, end)])[0]
+
+
+def resume_entry(contract: Contract, pc: int):
+    """
+    Returns a handler charging the static gas of the rest of the basic block
+    that `pc` lies inside and running it on the checked handlers, or None when
+    `pc` is a block leader. Executable streams only charge gas and verify stack
+    bounds at leaders, so resuming anywhere else must do both itself.
+    """
+    rest = block_rest(contract, pc)
+    if rest is None:
+        return None
+
+    end, gas = rest
+    return makeBlockEntry(makeCheckedBlock(decoded(contract), pc, end), gas)
+
+
+def makeBlockEntry(handler, gas: int):
+    """ Charges the static gas of a whole basic block before running its first instruction """
+    def blockEntry(pc, interp, ctx):
+        if gas > ctx.gas:
+            return CompletedExecution(code=ReturnCode.OUT_OF_GAS, data=None)
+
+        ctx.gas -= gas
+        return handler(pc, interp, ctx)
+
+    return blockEntry
+
+
+def makeVerifiedBlockEntry(handler, gas: int, required: int, growth: int, checked_block):
+    """ Charges a block's static gas and checks its stack bounds before running it unchecked """
+    def verifiedBlockEntry(pc, interp, ctx):
+        if gas > ctx.gas:
+            return CompletedExecution(code=ReturnCode.OUT_OF_GAS, data=None)
+
+        ctx.gas -= gas
+
+        s = ctx.stack
+        if s.count < required or s.count + growth > s.size:
+            return checked_block(pc, interp, ctx)
+
+        return handler(pc, interp, ctx)
+
+    return verifiedBlockEntry
+
+
+def meter(stream: list, blocks: list, costs: list, bounds: list=None, checked: list=None) -> list:
+    """
+    Returns a copy of the stream where every block leader charges its block's
+    static gas. With stack `bounds` the leaders also verify the stack height,
+    running the block on the `checked` decoded stream when it fails.
+    """
+    metered_stream = list(stream)
+
+    for i, ((start, end), cost) in enumerate(zip(blocks, costs)):
+        handler, imm, next_pc = stream[start]
+
+        if bounds is None:
+            entry = makeBlockEntry(handler, cost)
+        else:
+            required, growth = bounds[i]
+            entry = makeVerifiedBlockEntry(handler, cost, required, growth, makeCheckedBlock(checked, start, end))
+
+        metered_stream[start] = (entry, imm, next_pc)
+
+    return metered_stream
+
+
+def metered(contract: Contract, fusion: bool=True) -> list:
+    """
+    Returns the executable (gas metered, stack verified, optionally fused)
+    instruction stream for a contract, cached alongside its analysis.
+    """
+    analysis = contract.analyse()
+    mode = "fused" if fusion else "decoded"
+
+    stream = analysis.executable.get(mode)
+    if stream is None:
+        checked = decoded(contract)
+        stream = unchecked(contract.code, checked, analysis.blocks)
+        if fusion:
+            stream = fuse(contract.code, stream, analysis)
+
+        stream = meter(stream, analysis.blocks, static_block_gas(contract), static_block_stack(contract), checked)
+        analysis.executable[mode] = stream
+
+    return stream
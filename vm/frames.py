@@ -0,0 +1,71 @@
+from dataclasses import dataclass
+
+from vm.opcode import Opcode
+from vm.pc import ProgramCounter
+from vm.machine_ctx import MachineContext
+from vm.keccak import keccak256
+
+"""
+Call frames.
+
+CALL, CALLCODE, DELEGATECALL, STATICCALL, CREATE and CREATE2 handlers never run
+the callee themselves. They charge their own gas and return a `Message`
+describing the sub call; the interpreter then pushes a new `Frame` onto an
+explicit frame stack and keeps running its single loop on the callee. When the
+callee halts its frame is popped and the caller resumes right after the call
+instruction, so nesting depth is bounded by MAX_CALL_DEPTH rather than by
+Python's recursion limit.
+"""
+
+CreateKinds = frozenset([Opcode.CREATE, Opcode.CREATE2])
+
+@dataclass
+class Message:
+    kind: Opcode
+    gas: int
+    caller: int
+    value: int
+    data: bytes
+
+    ## calls: account whose code runs and account whose storage/balance is used
+    code_address: int = 0
+    address: int = 0
+    transfer: bool = True
+    static: bool = False
+    ret_offset: int = 0
+    ret_size: int = 0
+
+    ## creates
+    init_code: bytes = b""
+    salt: int = None
+
+
+class Frame():
+    """ A running call: its machine context, program counter and the message that started it """
+    __slots__ = ("ctx", "pc", "message", "snapshot")
+
+    def __init__(self, ctx: MachineContext, pc: ProgramCounter, message: Message=None, snapshot: int=0):
+        self.ctx = ctx
+        self.pc = pc
+        self.message = message
+        self.snapshot = snapshot
+
+
+def rlp_int(value: int) -> bytes:
+    if value == 0:
+        return b"\x80"
+    if value < 0x80:
+        return bytes([value])
+
+    data = value.to_bytes((value.bit_length() + 7) // 8, "big")
+    return bytes([0x80 + len(data)]) + data
+
+def create_address(sender: int, nonce: int) -> int:
+    """ keccak256(rlp([sender, nonce]))[12:] """
+    payload = b"\x94" + sender.to_bytes(20, "big") + rlp_int(nonce)
+    return int.from_bytes(keccak256(bytes([0xC0 + len(payload)]) + payload)[12:], "big")
+
+def create2_address(sender: int, salt: int, init_code: bytes) -> int:
+    """ keccak256(0xff ++ sender ++ salt ++ keccak256(init_code))[12:] (EIP-1014) """
+    preimage = b"\xff" + sender.to_bytes(20, "big") + salt.to_bytes(32, "big") + keccak256(init_code)
+    return int.from_bytes(keccak256(preimage)[12:], "big")
@@ -0,0 +1,82 @@
+"""
+Gas schedule and dynamic gas cost helpers.
+
+Costs follow the Istanbul fee schedule from the yellow paper appendix G and
+EIP-2200 (net gas metering for SSTORE). Static per-instruction costs live on
+each `EVMInstruction` in `ReferenceTable`; the helpers below cover the parts of
+an instruction's cost that depend on its operands.
+"""
+
+class OutOfGasError(Exception):
+    pass
+
+
+## memory ##
+MEMORY_GAS = 3
+QUAD_COEFF_DIV = 512
+
+## per word / per byte components ##
+COPY_GAS = 3
+SHA3_WORD_GAS = 6
+EXP_BYTE_GAS = 50
+LOG_GAS = 375
+LOG_TOPIC_GAS = 375
+LOG_DATA_GAS = 8
+
+## storage (EIP-2200) ##
+SLOAD_GAS = 800
+SSTORE_SET_GAS = 20000
+SSTORE_RESET_GAS = 5000
+SSTORE_CLEARS_SCHEDULE = 15000
+SSTORE_SENTRY_GAS = 2300
+
+## calls and contract creation (EIP-150) ##
+CALL_VALUE_GAS = 9000
+CALL_NEW_ACCOUNT_GAS = 25000
+CALL_STIPEND = 2300
+CREATE_DATA_GAS = 200
+
+
+def memory_gas(words: int) -> int:
+    """ Total cost of a memory of `words` 32 byte words """
+    return MEMORY_GAS * words + (words * words) // QUAD_COEFF_DIV
+
+def word_count(size: int) -> int:
+    return (size + 31) // 32
+
+def call_gas_limit(available: int, requested: int) -> int:
+    """ Gas forwarded to a sub call: at most all but one 64th of what is left """
+    return min(requested, available - available // 64)
+
+def exp_gas(exponent: int) -> int:
+    """ Dynamic part of EXP, charged per byte of the exponent """
+    return EXP_BYTE_GAS * ((exponent.bit_length() + 7) // 8)
+
+def sstore_gas(original: int, current: int, new: int) -> tuple:
+    """
+    Returns (gas cost, refund delta) for an SSTORE per EIP-2200, where
+    `original` is the slot value at the start of the transaction.
+    """
+    if current == new:
+        return SLOAD_GAS, 0
+
+    if original == current:
+        if original == 0:
+            return SSTORE_SET_GAS, 0
+
+        return SSTORE_RESET_GAS, SSTORE_CLEARS_SCHEDULE if new == 0 else 0
+
+    refund = 0
+    if original != 0:
+        if current == 0:
+            refund -= SSTORE_CLEARS_SCHEDULE
+        elif new == 0:
+            refund += SSTORE_CLEARS_SCHEDULE
+
+    if original == new:
+        if original == 0:
+            refund += SSTORE_SET_GAS - SLOAD_GAS
+        else:
+            refund += SSTORE_RESET_GAS - SLOAD_GAS
+
+    return SLOAD_GAS, refund
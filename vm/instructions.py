@@ -1,15 +1,34 @@
 from dataclasses import dataclass
-import numpy
-import sha3
-import sys
+from functools import lru_cache
 
 from vm.opcode import Opcode
 from vm.pc import ProgramCounter
 from vm.machine_ctx import  MachineContext
+from vm.stack import StackError
+from vm.frames import Message
+from vm.keccak import keccak256
+from vm.gas import (
+    CALL_NEW_ACCOUNT_GAS,
+    CALL_STIPEND,
+    CALL_VALUE_GAS,
+    COPY_GAS,
+    LOG_DATA_GAS,
+    LOG_GAS,
+    LOG_TOPIC_GAS,
+    SHA3_WORD_GAS,
+    SLOAD_GAS,
+    SSTORE_SENTRY_GAS,
+    OutOfGasError,
+    call_gas_limit,
+    exp_gas,
+    sstore_gas,
+    word_count,
+)
 from vm.constants import (
     MAX_UINT_256,
-    MAX_256_HEX,
     BIG_ENDIAN,
+    CompletedExecution,
+    ReturnCode,
     )
 
 """
@@ -20,10 +39,33 @@ Instruction logic taken from pseudocode presented in:
 
 bool_to_bin = lambda b: 0 if b is False else 1
 
+UINT_256_CEILING: int = MAX_UINT_256 + 1
+ADDRESS_MASK: int = (1 << 160) - 1
+SIGN_BIT_256: int = 1 << 255
+
+def to_signed(value: int) -> int:
+    """ Interprets a 256-bit word as a two's complement signed integer """
+    return value - UINT_256_CEILING if value & SIGN_BIT_256 else value
+
 
 ##                                   ##
 #   Instruction defintion functions   #
 ##                                   ##
+def opStop(pc: ProgramCounter, interp, ctx: MachineContext):
+    return CompletedExecution(code=ReturnCode.STOPPED, data=None)
+
+def opRevert(pc: ProgramCounter, interp, ctx: MachineContext):
+    offset, size = ctx.stack.pop(), ctx.stack.pop()
+    ctx.expand_memory(offset, size)
+
+    return CompletedExecution(code=ReturnCode.REVERTED, data=ctx.mem.get(offset, size))
+
+def opInvalid(pc: ProgramCounter, interp, ctx: MachineContext):
+    return CompletedExecution(code=ReturnCode.INVALID, data=None)
+
+def opInvalidJump(pc: ProgramCounter, interp, ctx: MachineContext):
+    return CompletedExecution(code=ReturnCode.INVALID_JUMP, data=None)
+
 def opAdd(pc: ProgramCounter, interp, ctx: MachineContext):
     x, y = ctx.stack.pop(), ctx.stack.pop()
     z: int = (x + y) & MAX_UINT_256
@@ -43,38 +85,76 @@ def opMul(pc: ProgramCounter, interp, ctx: MachineContext):
     ctx.stack.push(z)
 
 def opDiv(pc: ProgramCounter, interp, ctx: MachineContext):
-    # TODO: test more thoroughly 
-    # TODO: Edge case /// divide by zero?
     x, y = ctx.stack.pop(), ctx.stack.pop()
-    z = x / y
+    z: int = x // y if y else 0
 
     ctx.stack.push(z)
 
+def opSdiv(pc: ProgramCounter, interp, ctx: MachineContext):
+    x, y = to_signed(ctx.stack.pop()), to_signed(ctx.stack.pop())
+
+    if y == 0:
+        z = 0
+    else:
+        ## truncate towards zero like the EVM rather than flooring
+        z = abs(x) // abs(y)
+        if (x < 0) != (y < 0):
+            z = -z
+
+    ctx.stack.push(z & MAX_UINT_256)
+
 def opMod(pc: ProgramCounter, interp, ctx: MachineContext):
     x, y = ctx.stack.pop(), ctx.stack.pop()
-    z: int = x % y
+    z: int = x % y if y else 0
 
     ctx.stack.push(z)
 
+def opSmod(pc: ProgramCounter, interp, ctx: MachineContext):
+    x, y = to_signed(ctx.stack.pop()), to_signed(ctx.stack.pop())
+
+    if y == 0:
+        z = 0
+    else:
+        ## result takes the sign of the dividend
+        z = abs(x) % abs(y)
+        if x < 0:
+            z = -z
+
+    ctx.stack.push(z & MAX_UINT_256)
+
 def opAddMod(pc: ProgramCounter, interp, ctx: MachineContext):
     x, y, n = ctx.stack.pop(), ctx.stack.pop(), ctx.stack.pop()
-    z: int = (x+y) % n
+    z: int = (x+y) % n if n else 0
     ctx.stack.push(z)
 
 def opMulMod(pc: ProgramCounter, interp, ctx: MachineContext):
     x, y, n = ctx.stack.pop(), ctx.stack.pop(), ctx.stack.pop()
-    z: int = (x*y) % n
+    z: int = (x*y) % n if n else 0
     ctx.stack.push(z)
 
 def opExp(pc: ProgramCounter, interp, ctx: MachineContext):
     x, y = ctx.stack.pop(), ctx.stack.pop()
-    z: int = x ** y
+    ctx.use_gas(exp_gas(y))
+    z: int = pow(x, y, UINT_256_CEILING)
 
     ctx.stack.push(z)
 
+def opSignExtend(pc: ProgramCounter, interp, ctx: MachineContext):
+    b, x = ctx.stack.pop(), ctx.stack.pop()
+
+    if b < 31:
+        sign_bit = 1 << (b * 8 + 7)
+        low_bits = x & ((sign_bit << 1) - 1)
+        x = low_bits | (MAX_UINT_256 ^ ((sign_bit << 1) - 1)) if low_bits & sign_bit else low_bits
+
+    ctx.stack.push(x)
+
 def opJump(pc: ProgramCounter, interp, ctx: MachineContext):
     dest = ctx.stack.pop()
-    print("Jumping to ", dest)
+
+    if not ctx.contract.analysis.valid_jumpdest(dest):
+        return CompletedExecution(code=ReturnCode.INVALID_JUMP, data=None)
+
     pc.set(dest)
 
 def opJumpDest(pc: ProgramCounter, interp, ctx: MachineContext):
@@ -84,6 +164,9 @@ def opJumpI(pc: ProgramCounter, interp, ctx: MachineContext):
     dest, cond = ctx.stack.pop(), ctx.stack.pop()
 
     if cond:
+        if not ctx.contract.analysis.valid_jumpdest(dest):
+            return CompletedExecution(code=ReturnCode.INVALID_JUMP, data=None)
+
         pc.set(dest)
 
 
@@ -94,12 +177,16 @@ def opLt(pc: ProgramCounter, interp, ctx: MachineContext):
     ctx.stack.push(c)
 
 def opSgt(pc: ProgramCounter, interp, ctx: MachineContext):
-    # TODO: implement 
-    pass
+    a, b = to_signed(ctx.stack.pop()), to_signed(ctx.stack.pop())
+    c: int = bool_to_bin((a > b))
+
+    ctx.stack.push(c)
 
 def opSlt(pc: ProgramCounter, interp, ctx: MachineContext):
-    # TODO: implement 
-    pass
+    a, b = to_signed(ctx.stack.pop()), to_signed(ctx.stack.pop())
+    c: int = bool_to_bin((a < b))
+
+    ctx.stack.push(c)
 
 def opGt(pc: ProgramCounter, interp, ctx: MachineContext):
     a, b = ctx.stack.pop(), ctx.stack.pop()
@@ -144,62 +231,131 @@ def opNot(pc: ProgramCounter, interp, ctx: MachineContext):
     ctx.stack.push(c)
 
 def opByte(pc: ProgramCounter, interp, ctx: MachineContext):
-    #TODO: Test me
     i, x = ctx.stack.pop(), ctx.stack.pop()
-    y = (x >> (248 - i * 8)) & 0xFF
+    y = (x >> (248 - i * 8)) & 0xFF if i < 32 else 0
 
     ctx.stack.push(y)
 
 def opShl(pc: ProgramCounter, interp, ctx: MachineContext):
     shift, value = ctx.stack.pop(), ctx.stack.pop()
     
-    if shift == MAX_256_HEX:
+    if shift >= 256:
         result = 0
     else:
-        result = numpy.left_shift(value, shift) & MAX_UINT_256
+        result = (value << shift) & MAX_UINT_256
 
     ctx.stack.push(result)
 
 def opShr(pc: ProgramCounter, interp, ctx: MachineContext):
     shift, value = ctx.stack.pop(), ctx.stack.pop()
 
-    if shift == MAX_256_HEX:
+    if shift >= 256:
         result = 0
-    
     else:
-        result = numpy.right_shift(value, shift) & MAX_UINT_256
+        result = value >> shift
     
     ctx.stack.push(result)
 
 def opSar(pc: ProgramCounter, interp, ctx: MachineContext):
-    shift, value = ctx.stack.pop(), ctx.stack.pop()
+    shift, value = ctx.stack.pop(), to_signed(ctx.stack.pop())
     
-    shifted_value = value >> shift
-    result = shifted_value & MAX_256_HEX
+    ## arithmetic shift keeps the sign, shifting 256+ bits leaves only the sign
+    shifted_value = value >> min(shift, 256)
+    result = shifted_value & MAX_UINT_256
     ctx.stack.push(result)
 
 def opSha3(pc: ProgramCounter, interp, ctx: MachineContext):
-    #TODO: Test me
-    offset = ctx.stack.pop()
-    value = ctx.mem.get(offset)
+    offset, size = ctx.stack.pop(), ctx.stack.pop()
+    ctx.use_gas(SHA3_WORD_GAS * word_count(size))
+    ctx.expand_memory(offset, size)
 
-    hasher = sha3.keccak_256()
-    hasher.update(value)
-    
-    ctx.push(hasher.hexidigest())
+    with ctx.mem.view(offset, size) as value:
+        digest = keccak256(value)
+
+    ctx.stack.push(int.from_bytes(digest, BIG_ENDIAN))
 
 def opMload(pc: ProgramCounter, interp, ctx: MachineContext):
-    #TODO: Test me
     offset = ctx.stack.pop()
-    val = ctx.mem.get(offset)
+    ctx.expand_memory(offset, 32)
+    val = ctx.mem.get32(offset)
 
     ctx.stack.push(val)
 
 def opMstore(pc: ProgramCounter, interp, ctx: MachineContext):
-    #TODO: Test me
-    value, offset = ctx.stack.pop(), ctx.stack.pop()
+    offset, value = ctx.stack.pop(), ctx.stack.pop()
+    ctx.expand_memory(offset, 32)
+
+    ctx.mem.set32(offset, value)
+
+def opMstore8(pc: ProgramCounter, interp, ctx: MachineContext):
+    offset, value = ctx.stack.pop(), ctx.stack.pop()
+    ctx.expand_memory(offset, 1)
+
+    ctx.mem.set8(offset, value)
+
+def opSload(pc: ProgramCounter, interp, ctx: MachineContext):
+    slot = ctx.stack.pop()
+
+    ctx.stack.push(ctx.state.load(ctx.contract.address, slot))
+
+def opSstore(pc: ProgramCounter, interp, ctx: MachineContext):
+    if ctx.static:
+        return CompletedExecution(code=ReturnCode.INVALID, data=None)
+
+    ## EIP-2200: SSTORE fails unless more than the call stipend is left
+    if ctx.gas <= SSTORE_SENTRY_GAS:
+        raise OutOfGasError(f"Out of gas: SSTORE requires more than {SSTORE_SENTRY_GAS} gas")
+
+    slot, value = ctx.stack.pop(), ctx.stack.pop()
+    state, address = ctx.state, ctx.contract.address
+
+    cost, refund = sstore_gas(state.original_value(address, slot), state.load(address, slot), value)
+    ctx.use_gas(cost)
+
+    state.store(address, slot, value)
+    state.add_refund(refund)
+
+def opMsize(pc: ProgramCounter, interp, ctx: MachineContext):
+    ctx.stack.push(len(ctx.mem))
+
+def opReturn(pc: ProgramCounter, interp, ctx: MachineContext):
+    offset, size = ctx.stack.pop(), ctx.stack.pop()
+    ctx.expand_memory(offset, size)
+
+    return CompletedExecution(code=ReturnCode.STOPPED, data=ctx.mem.get(offset, size))
+
+def copyToMemory(ctx: MachineContext, source: bytes, mem_offset: int, source_offset: int, size: int):
+    """ Copies source[source_offset : source_offset + size] into memory, zero padding past the end """
+    if size == 0:
+        return
+
+    ctx.use_gas(COPY_GAS * word_count(size))
+    ctx.expand_memory(mem_offset, size)
+
+    ## slice assignment copies straight from the source into the memory buffer
+    store = ctx.mem.store
+    copied = max(0, min(size, len(source) - source_offset))
+    if copied:
+        store[mem_offset : mem_offset + copied] = source[source_offset : source_offset + copied]
+    if copied < size:
+        store[mem_offset + copied : mem_offset + size] = bytes(size - copied)
+
+def opCallDataCopy(pc: ProgramCounter, interp, ctx: MachineContext):
+    mem_offset, data_offset, size = ctx.stack.pop(), ctx.stack.pop(), ctx.stack.pop()
+
+    copyToMemory(ctx, ctx.contract.calldata, mem_offset, data_offset, size)
+
+def opCodeCopy(pc: ProgramCounter, interp, ctx: MachineContext):
+    mem_offset, code_offset, size = ctx.stack.pop(), ctx.stack.pop(), ctx.stack.pop()
 
-    ctx.mem.store(offset, value)
+    copyToMemory(ctx, memoryview(ctx.contract.code), mem_offset, code_offset, size)
+
+def opGas(pc: ProgramCounter, interp, ctx: MachineContext):
+    ctx.stack.push(ctx.gas)
+
+def opPc(pc: ProgramCounter, interp, ctx: MachineContext):
+    ## the program counter has already been advanced past this instruction
+    ctx.stack.push(pc.get() - 1)
 
 def opCallValue(pc: ProgramCounter, interp, ctx: MachineContext):
     call_value: int = ctx.contract.value & MAX_UINT_256
@@ -212,34 +368,173 @@ def opCodeSize(pc: ProgramCounter, interp, ctx: MachineContext):
     ctx.stack.push(size)
 
 def opCallDataSize(pc: ProgramCounter, interp, ctx: MachineContext):
-    size: int = sys.getsizeof(ctx.contract.data)
-
-    ctx.stack.push(size)
+    ctx.stack.push(len(ctx.contract.data))
 
 def opCallDataLoad(pc: ProgramCounter, interp, ctx: MachineContext):
-    first_32_bytes = ctx.contract.code[0 : 32]
-    value = int.from_bytes(first_32_bytes, byteorder=BIG_ENDIAN)
+    offset = ctx.stack.pop()
+
+    ## a view slice clamps to the end of the calldata, the missing tail reads as zeros
+    word = ctx.contract.calldata[offset : offset + 32]
+    value = int.from_bytes(word, byteorder=BIG_ENDIAN) << (8 * (32 - len(word)))
 
     ctx.stack.push(value)
 
+def opAddress(pc: ProgramCounter, interp, ctx: MachineContext):
+    ctx.stack.push(ctx.contract.address)
+
+def opCaller(pc: ProgramCounter, interp, ctx: MachineContext):
+    ctx.stack.push(ctx.contract.caller)
+
+def opOrigin(pc: ProgramCounter, interp, ctx: MachineContext):
+    ctx.stack.push(ctx.origin)
+
+def opBalance(pc: ProgramCounter, interp, ctx: MachineContext):
+    address = ctx.stack.pop() & ADDRESS_MASK
+
+    ctx.stack.push(ctx.state.balance(address))
+
+def opSelfBalance(pc: ProgramCounter, interp, ctx: MachineContext):
+    ctx.stack.push(ctx.state.balance(ctx.contract.address))
+
+def opReturnDataSize(pc: ProgramCounter, interp, ctx: MachineContext):
+    ctx.stack.push(len(ctx.return_data))
+
+def opReturnDataCopy(pc: ProgramCounter, interp, ctx: MachineContext):
+    mem_offset, data_offset, size = ctx.stack.pop(), ctx.stack.pop(), ctx.stack.pop()
+
+    ## EIP-211: reading past the end of the return data is an exceptional halt
+    if data_offset + size > len(ctx.return_data):
+        return CompletedExecution(code=ReturnCode.INVALID, data=None)
+
+    copyToMemory(ctx, ctx.return_data, mem_offset, data_offset, size)
+
+def makeCallOp(kind: Opcode):
+    """ CALL, CALLCODE, DELEGATECALL and STATICCALL: charge gas and hand a `Message` to the interpreter """
+    takes_value = kind == Opcode.CALL or kind == Opcode.CALLCODE
+
+    def callN(pc: ProgramCounter, interp, ctx: MachineContext):
+        s = ctx.stack
+        gas, address = s.pop(), s.pop() & ADDRESS_MASK
+        value = s.pop() if takes_value else 0
+        in_offset, in_size, out_offset, out_size = s.pop(), s.pop(), s.pop(), s.pop()
+
+        if kind == Opcode.CALL and value and ctx.static:
+            return CompletedExecution(code=ReturnCode.INVALID, data=None)
+
+        ctx.expand_memory(in_offset, in_size)
+        ctx.expand_memory(out_offset, out_size)
+
+        if value:
+            new_account = kind == Opcode.CALL and not ctx.state.exists(address)
+            ctx.use_gas(CALL_VALUE_GAS + (CALL_NEW_ACCOUNT_GAS if new_account else 0))
+
+        gas = call_gas_limit(ctx.gas, gas)
+        ctx.use_gas(gas)
+        if value:
+            gas += CALL_STIPEND
+
+        contract = ctx.contract
+        message = Message(
+            kind=kind,
+            gas=gas,
+            caller=contract.address,
+            value=value,
+            data=ctx.mem.get(in_offset, in_size),
+            code_address=address,
+            address=address,
+            static=ctx.static or kind == Opcode.STATICCALL,
+            ret_offset=out_offset,
+            ret_size=out_size,
+        )
+
+        ## CALLCODE and DELEGATECALL run the callee's code against the caller's account
+        if kind == Opcode.CALLCODE:
+            message.address = contract.address
+        elif kind == Opcode.DELEGATECALL:
+            message.address, message.caller, message.value = contract.address, contract.caller, contract.value
+            message.transfer = False
+
+        return message
+
+    return callN
+
+def makeCreateOp(kind: Opcode):
+    def createN(pc: ProgramCounter, interp, ctx: MachineContext):
+        if ctx.static:
+            return CompletedExecution(code=ReturnCode.INVALID, data=None)
+
+        value, offset, size = ctx.stack.pop(), ctx.stack.pop(), ctx.stack.pop()
+        salt = ctx.stack.pop() if kind == Opcode.CREATE2 else None
+
+        ctx.expand_memory(offset, size)
+        if salt is not None:
+            ctx.use_gas(SHA3_WORD_GAS * word_count(size))
+
+        gas = call_gas_limit(ctx.gas, ctx.gas)
+        ctx.use_gas(gas)
+
+        return Message(
+            kind=kind,
+            gas=gas,
+            caller=ctx.contract.address,
+            value=value,
+            data=b"",
+            init_code=ctx.mem.get(offset, size),
+            salt=salt,
+        )
+
+    return createN
+
 def makePushOp(offset_bytes: int):
     def pushN(pc: ProgramCounter, interp, ctx: MachineContext):
-        pc.increment()
         byte_val = ctx.contract.code[pc.get() : pc.get() + offset_bytes]
         int_val = int.from_bytes(byte_val, BIG_ENDIAN) #Big Endian ordering 
+        int_val <<= 8 * (offset_bytes - len(byte_val)) #code past the end reads as zero
         
-        pc.increment(offset_bytes-1)
+        pc.increment(offset_bytes)
         ctx.stack.push(int_val)
 
 
     return pushN
 
+@lru_cache(maxsize=4096)
+def makePushValueOp(value: int):
+    """ PUSH with its immediate already decoded, used by predecoded instruction streams """
+    def pushValue(pc: ProgramCounter, interp, ctx: MachineContext):
+        ctx.stack.push(value)
+
+    return pushValue
+
 def makeDupOp(position: int):
     def dupN(pc: ProgramCounter, interp, ctx: MachineContext):
-        ctx.stack.duplicate(position-1)
+        ctx.stack.dup(position)
 
     return dupN
 
+def makeSwapOp(position: int):
+    def swapN(pc: ProgramCounter, interp, ctx: MachineContext):
+        ctx.stack.swap(position)
+
+    return swapN
+
+def makeLogOp(topic_count: int):
+    def logN(pc: ProgramCounter, interp, ctx: MachineContext):
+        if ctx.static:
+            return CompletedExecution(code=ReturnCode.INVALID, data=None)
+
+        offset, size = ctx.stack.pop(), ctx.stack.pop()
+        topics = tuple(ctx.stack.pop() for _ in range(topic_count))
+
+        ctx.use_gas(LOG_DATA_GAS * size)
+        ctx.expand_memory(offset, size)
+
+        ctx.state.log(ctx.contract.address, topics, ctx.mem.get(offset, size))
+
+    return logN
+
+def opPop(pc: ProgramCounter, interp, ctx: MachineContext):
+    ctx.stack.pop()
+
 @dataclass
 class EVMInstruction:
     gas_cost: int
@@ -248,493 +543,1401 @@ class EVMInstruction:
     immediate_value: bool=False
     immediate_size: int=0
 
+    ## stack items the instruction reads (delta) and leaves (alpha) per the yellow paper,
+    ## so DUPn pops n and pushes n + 1 and SWAPn pops and pushes n + 1
+    pops: int=0
+    pushes: int=0
+
 ##                                             ##
 #   mapping for easy reference during execution #
 ##                                             ##
 ReferenceTable: dict = {
 
+    Opcode.STOP : EVMInstruction(
+        gas_cost=0,
+        execute=opStop,
+        pops=0,
+        pushes=0,
+    ),
+
+    Opcode.REVERT : EVMInstruction(
+        gas_cost=0,
+        execute=opRevert,
+        pops=2,
+        pushes=0,
+    ),
+
+    Opcode.INVALID : EVMInstruction(
+        gas_cost=0,
+        execute=opInvalid,
+        pops=0,
+        pushes=0,
+    ),
+
     Opcode.PUSH1 : EVMInstruction(
         immediate_value=True,
         immediate_size=1,
-        gas_cost=0,
+        gas_cost=3,
         execute=makePushOp(1),
+        pops=0,
+        pushes=1,
     ),
 
     Opcode.PUSH2 : EVMInstruction(
         immediate_value=True,
-        immediate_size=1,
-        gas_cost=0,
+        immediate_size=2,
+        gas_cost=3,
         execute=makePushOp(2),
+        pops=0,
+        pushes=1,
     ), 
 
     Opcode.PUSH3 : EVMInstruction(
         immediate_value=True,
-        immediate_size=1,
-        gas_cost=0,
+        immediate_size=3,
+        gas_cost=3,
         execute=makePushOp(3),
+        pops=0,
+        pushes=1,
     ), 
 
     Opcode.PUSH4 : EVMInstruction(
         immediate_value=True,
-        immediate_size=1,
-        gas_cost=0,
+        immediate_size=4,
+        gas_cost=3,
         execute=makePushOp(4),
+        pops=0,
+        pushes=1,
     ), 
 
     Opcode.PUSH5 : EVMInstruction(
         immediate_value=True,
-        immediate_size=1,
-        gas_cost=0,
+        immediate_size=5,
+        gas_cost=3,
         execute=makePushOp(5),
+        pops=0,
+        pushes=1,
     ), 
 
     Opcode.PUSH6 : EVMInstruction(
         immediate_value=True,
-        immediate_size=1,
-        gas_cost=0,
+        immediate_size=6,
+        gas_cost=3,
         execute=makePushOp(6),
+        pops=0,
+        pushes=1,
+    ), 
+
+    Opcode.PUSH7 : EVMInstruction(
+        immediate_value=True,
+        immediate_size=7,
+        gas_cost=3,
+        execute=makePushOp(7),
+        pops=0,
+        pushes=1,
     ), 
 
     Opcode.PUSH8 : EVMInstruction(
         immediate_value=True,
-        immediate_size=1,
-        gas_cost=0,
+        immediate_size=8,
+        gas_cost=3,
         execute=makePushOp(8),
+        pops=0,
+        pushes=1,
     ), 
 
     Opcode.PUSH9 : EVMInstruction(
         immediate_value=True,
-        immediate_size=1,
-        gas_cost=0,
+        immediate_size=9,
+        gas_cost=3,
         execute=makePushOp(9),
+        pops=0,
+        pushes=1,
     ), 
 
     Opcode.PUSH10 : EVMInstruction(
         immediate_value=True,
-        immediate_size=1,
-        gas_cost=0,
+        immediate_size=10,
+        gas_cost=3,
         execute=makePushOp(10),
+        pops=0,
+        pushes=1,
     ), 
 
     Opcode.PUSH11 : EVMInstruction(
         immediate_value=True,
-        immediate_size=1,
-        gas_cost=0,
+        immediate_size=11,
+        gas_cost=3,
         execute=makePushOp(11),
+        pops=0,
+        pushes=1,
     ), 
 
     Opcode.PUSH12 : EVMInstruction(
         immediate_value=True,
-        immediate_size=1,
-        gas_cost=0,
+        immediate_size=12,
+        gas_cost=3,
         execute=makePushOp(12),
+        pops=0,
+        pushes=1,
     ),
 
     Opcode.PUSH13 : EVMInstruction(
         immediate_value=True,
-        immediate_size=1,
-        gas_cost=0,
+        immediate_size=13,
+        gas_cost=3,
         execute=makePushOp(13),
+        pops=0,
+        pushes=1,
     ), 
 
     Opcode.PUSH14 : EVMInstruction(
         immediate_value=True,
-        immediate_size=1,
-        gas_cost=0,
+        immediate_size=14,
+        gas_cost=3,
         execute=makePushOp(14),
+        pops=0,
+        pushes=1,
     ), 
 
     Opcode.PUSH15 : EVMInstruction(
         immediate_value=True,
-        immediate_size=1,
-        gas_cost=0,
+        immediate_size=15,
+        gas_cost=3,
         execute=makePushOp(15),
+        pops=0,
+        pushes=1,
     ), 
 
     Opcode.PUSH16 : EVMInstruction(
         immediate_value=True,
-        immediate_size=1,
-        gas_cost=0,
+        immediate_size=16,
+        gas_cost=3,
         execute=makePushOp(16),
+        pops=0,
+        pushes=1,
     ), 
 
     Opcode.PUSH17 : EVMInstruction(
         immediate_value=True,
-        immediate_size=1,
-        gas_cost=0,
+        immediate_size=17,
+        gas_cost=3,
         execute=makePushOp(17),
+        pops=0,
+        pushes=1,
     ), 
 
     Opcode.PUSH18 : EVMInstruction(
         immediate_value=True,
-        immediate_size=1,
-        gas_cost=0,
+        immediate_size=18,
+        gas_cost=3,
         execute=makePushOp(18),
+        pops=0,
+        pushes=1,
     ), 
 
     Opcode.PUSH19 : EVMInstruction(
         immediate_value=True,
-        immediate_size=1,
-        gas_cost=0,
+        immediate_size=19,
+        gas_cost=3,
         execute=makePushOp(19),
+        pops=0,
+        pushes=1,
     ), 
 
     Opcode.PUSH20 : EVMInstruction(
         immediate_value=True,
-        immediate_size=1,
-        gas_cost=0,
+        immediate_size=20,
+        gas_cost=3,
         execute=makePushOp(20),
+        pops=0,
+        pushes=1,
     ), 
 
     Opcode.PUSH21 : EVMInstruction(
         immediate_value=True,
-        immediate_size=1,
-        gas_cost=0,
+        immediate_size=21,
+        gas_cost=3,
         execute=makePushOp(21),
+        pops=0,
+        pushes=1,
     ), 
 
     Opcode.PUSH22 : EVMInstruction(
         immediate_value=True,
-        immediate_size=1,
-        gas_cost=0,
+        immediate_size=22,
+        gas_cost=3,
         execute=makePushOp(22),
+        pops=0,
+        pushes=1,
     ), 
 
     Opcode.PUSH23 : EVMInstruction(
         immediate_value=True,
-        immediate_size=1,
-        gas_cost=0,
+        immediate_size=23,
+        gas_cost=3,
         execute=makePushOp(23),
+        pops=0,
+        pushes=1,
     ), 
 
     Opcode.PUSH24 : EVMInstruction(
         immediate_value=True,
-        immediate_size=1,
-        gas_cost=0,
+        immediate_size=24,
+        gas_cost=3,
         execute=makePushOp(24),
+        pops=0,
+        pushes=1,
     ), 
 
     Opcode.PUSH25 : EVMInstruction(
         immediate_value=True,
-        immediate_size=1,
-        gas_cost=0,
-        execute=makePushOp(25),
-    ), 
-
-    Opcode.PUSH25 : EVMInstruction(
-        immediate_value=True,
-        immediate_size=1,
-        gas_cost=0,
+        immediate_size=25,
+        gas_cost=3,
         execute=makePushOp(25),
+        pops=0,
+        pushes=1,
     ), 
     
     Opcode.PUSH26 : EVMInstruction(
         immediate_value=True,
-        immediate_size=1,
-        gas_cost=0,
+        immediate_size=26,
+        gas_cost=3,
         execute=makePushOp(26),
+        pops=0,
+        pushes=1,
     ),
 
     Opcode.PUSH27 : EVMInstruction(
         immediate_value=True,
-        immediate_size=1,
-        gas_cost=0,
+        immediate_size=27,
+        gas_cost=3,
         execute=makePushOp(27),
+        pops=0,
+        pushes=1,
     ), 
 
     Opcode.PUSH28 : EVMInstruction(
         immediate_value=True,
-        immediate_size=1,
-        gas_cost=0,
+        immediate_size=28,
+        gas_cost=3,
         execute=makePushOp(28),
+        pops=0,
+        pushes=1,
     ), 
     
     Opcode.PUSH29 : EVMInstruction(
         immediate_value=True,
-        immediate_size=1,
-        gas_cost=0,
+        immediate_size=29,
+        gas_cost=3,
         execute=makePushOp(29),
+        pops=0,
+        pushes=1,
     ),  
 
     Opcode.PUSH30 : EVMInstruction(
         immediate_value=True,
-        immediate_size=1,
-        gas_cost=0,
+        immediate_size=30,
+        gas_cost=3,
         execute=makePushOp(30),
+        pops=0,
+        pushes=1,
     ), 
     
     Opcode.PUSH31 : EVMInstruction(
         immediate_value=True,
-        immediate_size=1,
-        gas_cost=0,
+        immediate_size=31,
+        gas_cost=3,
         execute=makePushOp(31),
+        pops=0,
+        pushes=1,
     ),
 
     Opcode.PUSH32 : EVMInstruction(
         immediate_value=True,
-        immediate_size=1,
-        gas_cost=0,
+        immediate_size=32,
+        gas_cost=3,
         execute=makePushOp(32),
+        pops=0,
+        pushes=1,
     ),
 
     Opcode.DUP1 : EVMInstruction(
-        immediate_value=True,
-        immediate_size=1,
-        gas_cost=0,
+        gas_cost=3,
         execute=makeDupOp(1),
+        pops=1,
+        pushes=2,
     ),
 
     Opcode.DUP2 : EVMInstruction(
-        immediate_value=True,
-        immediate_size=1,
-        gas_cost=0,
+        gas_cost=3,
         execute=makeDupOp(2),
+        pops=2,
+        pushes=3,
     ), 
 
     Opcode.DUP3 : EVMInstruction(
-        immediate_value=True,
-        immediate_size=1,
-        gas_cost=0,
+        gas_cost=3,
         execute=makeDupOp(3),
+        pops=3,
+        pushes=4,
     ), 
 
     Opcode.DUP4 : EVMInstruction(
-        immediate_value=True,
-        immediate_size=1,
-        gas_cost=0,
+        gas_cost=3,
         execute=makeDupOp(4),
+        pops=4,
+        pushes=5,
     ), 
 
     Opcode.DUP5 : EVMInstruction(
-        immediate_value=True,
-        immediate_size=1,
-        gas_cost=0,
+        gas_cost=3,
         execute=makeDupOp(5),
+        pops=5,
+        pushes=6,
     ), 
 
     Opcode.DUP6 : EVMInstruction(
-        immediate_value=True,
-        immediate_size=1,
-        gas_cost=0,
+        gas_cost=3,
         execute=makeDupOp(6),
+        pops=6,
+        pushes=7,
     ), 
 
 
     Opcode.DUP7 : EVMInstruction(
-        immediate_value=True,
-        immediate_size=1,
-        gas_cost=0,
+        gas_cost=3,
         execute=makeDupOp(7),
+        pops=7,
+        pushes=8,
     ), 
 
     Opcode.DUP8 : EVMInstruction(
-        immediate_value=True,
-        immediate_size=1,
-        gas_cost=0,
+        gas_cost=3,
         execute=makeDupOp(8),
+        pops=8,
+        pushes=9,
     ), 
 
     Opcode.DUP9 : EVMInstruction(
-        immediate_value=True,
-        immediate_size=1,
-        gas_cost=0,
+        gas_cost=3,
         execute=makeDupOp(9),
+        pops=9,
+        pushes=10,
     ), 
 
     Opcode.DUP10 : EVMInstruction(
-        immediate_value=True,
-        immediate_size=1,
-        gas_cost=0,
+        gas_cost=3,
         execute=makeDupOp(10),
+        pops=10,
+        pushes=11,
     ), 
 
     Opcode.DUP11 : EVMInstruction(
-        immediate_value=True,
-        immediate_size=1,
-        gas_cost=0,
+        gas_cost=3,
         execute=makeDupOp(11),
+        pops=11,
+        pushes=12,
     ), 
 
     Opcode.DUP12 : EVMInstruction(
-        immediate_value=True,
-        immediate_size=1,
-        gas_cost=0,
+        gas_cost=3,
         execute=makeDupOp(12),
+        pops=12,
+        pushes=13,
     ),
 
     Opcode.DUP13 : EVMInstruction(
-        immediate_value=True,
-        immediate_size=1,
-        gas_cost=0,
+        gas_cost=3,
         execute=makeDupOp(13),
+        pops=13,
+        pushes=14,
     ), 
 
     Opcode.DUP14 : EVMInstruction(
-        immediate_value=True,
-        immediate_size=1,
-        gas_cost=0,
+        gas_cost=3,
         execute=makeDupOp(14),
+        pops=14,
+        pushes=15,
     ), 
 
     Opcode.DUP15 : EVMInstruction(
-        immediate_value=True,
-        immediate_size=1,
-        gas_cost=0,
+        gas_cost=3,
         execute=makeDupOp(15),
+        pops=15,
+        pushes=16,
     ), 
 
     Opcode.DUP16 : EVMInstruction(
-        immediate_value=True,
-        immediate_size=1,
-        gas_cost=0,
+        gas_cost=3,
         execute=makeDupOp(16),
+        pops=16,
+        pushes=17,
     ), 
 
 
+    Opcode.SWAP1 : EVMInstruction(
+        gas_cost=3,
+        execute=makeSwapOp(1),
+        pops=2,
+        pushes=2,
+    ),
+
+    Opcode.SWAP2 : EVMInstruction(
+        gas_cost=3,
+        execute=makeSwapOp(2),
+        pops=3,
+        pushes=3,
+    ),
+
+    Opcode.SWAP3 : EVMInstruction(
+        gas_cost=3,
+        execute=makeSwapOp(3),
+        pops=4,
+        pushes=4,
+    ),
+
+    Opcode.SWAP4 : EVMInstruction(
+        gas_cost=3,
+        execute=makeSwapOp(4),
+        pops=5,
+        pushes=5,
+    ),
+
+    Opcode.SWAP5 : EVMInstruction(
+        gas_cost=3,
+        execute=makeSwapOp(5),
+        pops=6,
+        pushes=6,
+    ),
+
+    Opcode.SWAP6 : EVMInstruction(
+        gas_cost=3,
+        execute=makeSwapOp(6),
+        pops=7,
+        pushes=7,
+    ),
+
+    Opcode.SWAP7 : EVMInstruction(
+        gas_cost=3,
+        execute=makeSwapOp(7),
+        pops=8,
+        pushes=8,
+    ),
+
+    Opcode.SWAP8 : EVMInstruction(
+        gas_cost=3,
+        execute=makeSwapOp(8),
+        pops=9,
+        pushes=9,
+    ),
+
+    Opcode.SWAP9 : EVMInstruction(
+        gas_cost=3,
+        execute=makeSwapOp(9),
+        pops=10,
+        pushes=10,
+    ),
+
+    Opcode.SWAP10 : EVMInstruction(
+        gas_cost=3,
+        execute=makeSwapOp(10),
+        pops=11,
+        pushes=11,
+    ),
+
+    Opcode.SWAP11 : EVMInstruction(
+        gas_cost=3,
+        execute=makeSwapOp(11),
+        pops=12,
+        pushes=12,
+    ),
+
+    Opcode.SWAP12 : EVMInstruction(
+        gas_cost=3,
+        execute=makeSwapOp(12),
+        pops=13,
+        pushes=13,
+    ),
+
+    Opcode.SWAP13 : EVMInstruction(
+        gas_cost=3,
+        execute=makeSwapOp(13),
+        pops=14,
+        pushes=14,
+    ),
+
+    Opcode.SWAP14 : EVMInstruction(
+        gas_cost=3,
+        execute=makeSwapOp(14),
+        pops=15,
+        pushes=15,
+    ),
+
+    Opcode.SWAP15 : EVMInstruction(
+        gas_cost=3,
+        execute=makeSwapOp(15),
+        pops=16,
+        pushes=16,
+    ),
+
+    Opcode.SWAP16 : EVMInstruction(
+        gas_cost=3,
+        execute=makeSwapOp(16),
+        pops=17,
+        pushes=17,
+    ),
+
+    Opcode.POP : EVMInstruction(
+        gas_cost=2,
+        execute=opPop,
+        pops=1,
+        pushes=0,
+    ),
+
     Opcode.ADD : EVMInstruction(
-        gas_cost=0,
+        gas_cost=3,
         execute=opAdd,
+        pops=2,
+        pushes=1,
     ),
 
     Opcode.MUL : EVMInstruction(
-        gas_cost=0,
+        gas_cost=5,
         execute=opMul,
+        pops=2,
+        pushes=1,
     ),
 
     Opcode.SUB : EVMInstruction(
-        gas_cost=0,
+        gas_cost=3,
         execute=opSub,
+        pops=2,
+        pushes=1,
     ),
 
     Opcode.DIV : EVMInstruction(
-        gas_cost=0,
+        gas_cost=5,
         execute=opDiv,
+        pops=2,
+        pushes=1,
     ),
 
     Opcode.SDIV : EVMInstruction(
-        gas_cost=0,
-        execute=opDiv,
+        gas_cost=5,
+        execute=opSdiv,
+        pops=2,
+        pushes=1,
     ),
 
     Opcode.MOD : EVMInstruction(
-        gas_cost=0,
+        gas_cost=5,
         execute=opMod,
+        pops=2,
+        pushes=1,
     ),
 
     Opcode.SMOD : EVMInstruction(
-        gas_cost=0,
-        execute=opMod,
+        gas_cost=5,
+        execute=opSmod,
+        pops=2,
+        pushes=1,
     ),
 
    Opcode.ADDMOD : EVMInstruction(
-        gas_cost=0,
+        gas_cost=8,
         execute=opAddMod,
+        pops=3,
+        pushes=1,
     ),
 
    Opcode.MULMOD : EVMInstruction(
-        gas_cost=0,
+        gas_cost=8,
         execute=opMulMod,
+        pops=3,
+        pushes=1,
     ),
 
     Opcode.EXP : EVMInstruction(
-        gas_cost=0,
+        gas_cost=10,
         execute=opExp,
+        pops=2,
+        pushes=1,
     ),
 
 
+    Opcode.SIGNEXTEND : EVMInstruction(
+        gas_cost=5,
+        execute=opSignExtend,
+        pops=2,
+        pushes=1,
+    ),
+
     Opcode.JUMP : EVMInstruction(
-        gas_cost=0,
+        gas_cost=8,
         execute=opJump,
+        pops=1,
+        pushes=0,
     ),
 
     Opcode.JUMPI : EVMInstruction(
-        gas_cost=0,
+        gas_cost=10,
         execute=opJumpI,
+        pops=2,
+        pushes=0,
     ),
 
     Opcode.JUMPDEST : EVMInstruction(
-        gas_cost=0,
+        gas_cost=1,
         execute=opJumpDest,
+        pops=0,
+        pushes=0,
     ),
 
     Opcode.LT : EVMInstruction(
-        gas_cost=0,
+        gas_cost=3,
         execute=opLt,
+        pops=2,
+        pushes=1,
+    ),
+
+    Opcode.SLT : EVMInstruction(
+        gas_cost=3,
+        execute=opSlt,
+        pops=2,
+        pushes=1,
+    ),
+
+    Opcode.SGT : EVMInstruction(
+        gas_cost=3,
+        execute=opSgt,
+        pops=2,
+        pushes=1,
     ),
 
     Opcode.GT : EVMInstruction(
-        gas_cost=0,
+        gas_cost=3,
         execute=opGt,
+        pops=2,
+        pushes=1,
     ),
 
     Opcode.EQ : EVMInstruction(
-        gas_cost=0,
+        gas_cost=3,
         execute=opEq,
+        pops=2,
+        pushes=1,
     ),
 
     Opcode.ISZERO : EVMInstruction(
-        gas_cost=0,
+        gas_cost=3,
         execute=opIsZero,
+        pops=1,
+        pushes=1,
     ),
 
     Opcode.AND : EVMInstruction(
-        gas_cost=0,
+        gas_cost=3,
         execute=opAnd,
+        pops=2,
+        pushes=1,
     ),
 
     Opcode.OR : EVMInstruction(
-        gas_cost=0,
+        gas_cost=3,
         execute=opOr,
+        pops=2,
+        pushes=1,
     ),
 
     Opcode.XOR : EVMInstruction(
-        gas_cost=0,
+        gas_cost=3,
         execute=opXor,
+        pops=2,
+        pushes=1,
     ),
 
     Opcode.NOT : EVMInstruction(
-        gas_cost=0,
+        gas_cost=3,
         execute=opNot,
+        pops=1,
+        pushes=1,
     ),
 
     Opcode.BYTE : EVMInstruction(
-        gas_cost=0,
+        gas_cost=3,
         execute=opByte,
+        pops=2,
+        pushes=1,
     ),
 
     Opcode.SHL : EVMInstruction(
-        gas_cost=0,
+        gas_cost=3,
         execute=opShl,
+        pops=2,
+        pushes=1,
     ),
 
     Opcode.SHR : EVMInstruction(
-        gas_cost=0,
+        gas_cost=3,
         execute=opShr,
+        pops=2,
+        pushes=1,
     ),
 
     Opcode.SAR : EVMInstruction(
-        gas_cost=0,
+        gas_cost=3,
         execute=opSar,
+        pops=2,
+        pushes=1,
+    ),
+
+    Opcode.ADDRESS : EVMInstruction(
+        gas_cost=2,
+        execute=opAddress,
+        pops=0,
+        pushes=1,
+    ),
+
+    Opcode.BALANCE : EVMInstruction(
+        gas_cost=700,
+        execute=opBalance,
+        pops=1,
+        pushes=1,
+    ),
+
+    Opcode.ORIGIN : EVMInstruction(
+        gas_cost=2,
+        execute=opOrigin,
+        pops=0,
+        pushes=1,
+    ),
+
+    Opcode.CALLER : EVMInstruction(
+        gas_cost=2,
+        execute=opCaller,
+        pops=0,
+        pushes=1,
+    ),
+
+    Opcode.SELFBALANCE : EVMInstruction(
+        gas_cost=5,
+        execute=opSelfBalance,
+        pops=0,
+        pushes=1,
+    ),
+
+    Opcode.RETURNDATASIZE : EVMInstruction(
+        gas_cost=2,
+        execute=opReturnDataSize,
+        pops=0,
+        pushes=1,
+    ),
+
+    Opcode.RETURNDATACOPY : EVMInstruction(
+        gas_cost=3,
+        execute=opReturnDataCopy,
+        pops=3,
+        pushes=0,
     ),
 
     Opcode.CALLVALUE : EVMInstruction(
-        gas_cost=0,
+        gas_cost=2,
         execute=opCallValue,
+        pops=0,
+        pushes=1,
     ),
 
     Opcode.CODESIZE : EVMInstruction(
-        gas_cost=0,
+        gas_cost=2,
         execute=opCodeSize,
+        pops=0,
+        pushes=1,
     ),
 
     Opcode.CALLDATASIZE : EVMInstruction(
-        gas_cost=0,
+        gas_cost=2,
         execute=opCallDataSize,
+        pops=0,
+        pushes=1,
     ),
 
     Opcode.CALLDATALOAD : EVMInstruction(
-        gas_cost=0,
+        gas_cost=3,
         execute=opCallDataLoad,
-    )
+        pops=1,
+        pushes=1,
+    ),
+
+    Opcode.CALLDATACOPY : EVMInstruction(
+        gas_cost=3,
+        execute=opCallDataCopy,
+        pops=3,
+        pushes=0,
+    ),
+
+    Opcode.CODECOPY : EVMInstruction(
+        gas_cost=3,
+        execute=opCodeCopy,
+        pops=3,
+        pushes=0,
+    ),
+
+    Opcode.SHA3 : EVMInstruction(
+        gas_cost=30,
+        execute=opSha3,
+        pops=2,
+        pushes=1,
+    ),
+
+    Opcode.MLOAD : EVMInstruction(
+        gas_cost=3,
+        execute=opMload,
+        pops=1,
+        pushes=1,
+    ),
+
+    Opcode.MSTORE : EVMInstruction(
+        gas_cost=3,
+        execute=opMstore,
+        pops=2,
+        pushes=0,
+    ),
+
+    Opcode.MSTORE8 : EVMInstruction(
+        gas_cost=3,
+        execute=opMstore8,
+        pops=2,
+        pushes=0,
+    ),
+
+    Opcode.SLOAD : EVMInstruction(
+        gas_cost=SLOAD_GAS,
+        execute=opSload,
+        pops=1,
+        pushes=1,
+    ),
+
+    Opcode.SSTORE : EVMInstruction(
+        gas_cost=0,
+        execute=opSstore,
+        pops=2,
+        pushes=0,
+    ),
+
+    Opcode.GAS : EVMInstruction(
+        gas_cost=2,
+        execute=opGas,
+        pops=0,
+        pushes=1,
+    ),
+
+    Opcode.PC : EVMInstruction(
+        gas_cost=2,
+        execute=opPc,
+        pops=0,
+        pushes=1,
+    ),
+
+    Opcode.MSIZE : EVMInstruction(
+        gas_cost=2,
+        execute=opMsize,
+        pops=0,
+        pushes=1,
+    ),
+
+    Opcode.RETURN : EVMInstruction(
+        gas_cost=0,
+        execute=opReturn,
+        pops=2,
+        pushes=0,
+    ),
+
+    Opcode.LOG0 : EVMInstruction(
+        gas_cost=LOG_GAS,
+        execute=makeLogOp(0),
+        pops=2,
+        pushes=0,
+    ),
+
+    Opcode.LOG1 : EVMInstruction(
+        gas_cost=LOG_GAS + LOG_TOPIC_GAS,
+        execute=makeLogOp(1),
+        pops=3,
+        pushes=0,
+    ),
+
+    Opcode.LOG2 : EVMInstruction(
+        gas_cost=LOG_GAS + 2 * LOG_TOPIC_GAS,
+        execute=makeLogOp(2),
+        pops=4,
+        pushes=0,
+    ),
+
+    Opcode.LOG3 : EVMInstruction(
+        gas_cost=LOG_GAS + 3 * LOG_TOPIC_GAS,
+        execute=makeLogOp(3),
+        pops=5,
+        pushes=0,
+    ),
+
+    Opcode.LOG4 : EVMInstruction(
+        gas_cost=LOG_GAS + 4 * LOG_TOPIC_GAS,
+        execute=makeLogOp(4),
+        pops=6,
+        pushes=0,
+    ),
+
+    Opcode.CREATE : EVMInstruction(
+        gas_cost=32000,
+        execute=makeCreateOp(Opcode.CREATE),
+        pops=3,
+        pushes=1,
+    ),
+
+    Opcode.CALL : EVMInstruction(
+        gas_cost=700,
+        execute=makeCallOp(Opcode.CALL),
+        pops=7,
+        pushes=1,
+    ),
+
+    Opcode.CALLCODE : EVMInstruction(
+        gas_cost=700,
+        execute=makeCallOp(Opcode.CALLCODE),
+        pops=7,
+        pushes=1,
+    ),
+
+    Opcode.DELEGATECALL : EVMInstruction(
+        gas_cost=700,
+        execute=makeCallOp(Opcode.DELEGATECALL),
+        pops=6,
+        pushes=1,
+    ),
+
+    Opcode.CREATE2 : EVMInstruction(
+        gas_cost=32000,
+        execute=makeCreateOp(Opcode.CREATE2),
+        pops=4,
+        pushes=1,
+    ),
+
+    Opcode.STATICCALL : EVMInstruction(
+        gas_cost=700,
+        execute=makeCallOp(Opcode.STATICCALL),
+        pops=6,
+        pushes=1,
+    ),
 }
 
+##                                                  ##
+#   dense dispatch table indexed by raw opcode byte    #
+##                                                  ##
+def buildDispatchTable(table: dict) -> list:
+    """
+    Flattens a ReferenceTable style mapping into a 256 entry list so that the
+    interpreter loop can index handlers directly with the raw code byte.
+
+    Unassigned encodings and the assigned opcodes the table has no instruction
+    logic for (see `UnsupportedOpcodes`) halt exceptionally through `opInvalid`.
+    """
+    dispatch: list = [opInvalid] * 256
+
+    for op, instr in table.items():
+        dispatch[op] = instr.execute
+
+    return dispatch
+
+DispatchTable: list = buildDispatchTable(ReferenceTable)
+
+## assigned opcodes without instruction logic: the block environment (GASPRICE,
+## BLOCKHASH, COINBASE, TIMESTAMP, NUMBER, DIFFICULTY, GASLIMIT, CHAINID,
+## BASEFEE), other accounts' code (EXTCODESIZE, EXTCODECOPY, EXTCODEHASH) and SELFDESTRUCT
+UnsupportedOpcodes = frozenset(op for op in Opcode if op not in ReferenceTable)
+
+## static gas by raw opcode byte, unassigned encodings cost nothing before halting
+StaticGasTable: list = [0] * 256
+for op, instr in ReferenceTable.items():
+    StaticGasTable[op] = instr.gas_cost
+
+
+##                                                  ##
+#   superinstructions for frequent opcode sequences    #
+##                                                  ##
+"""
+Fused handlers replace a whole instruction sequence with one dispatch. Each
+factory receives the immediates of the sequence (None for non-PUSH entries),
+the opcodes themselves and the code analysis, and returns a single handler.
+Sequences are keyed by opcode family, see `opFamily`.
+"""
+
+def opFamily(op: int) -> str:
+    if Opcode.PUSH1 <= op <= Opcode.PUSH32:
+        return "PUSH"
+    if Opcode.DUP1 <= op <= Opcode.DUP16:
+        return "DUP"
+    if Opcode.SWAP1 <= op <= Opcode.SWAP16:
+        return "SWAP"
+    if op in Opcode._value2member_map_:
+        return Opcode(op).name
+
+    return "INVALID"
+
+def checkHeadroom(s, words: int):
+    """ Raises like the unfused sequence would if `words` transient pushes overflow the stack """
+    if s.count + words > s.size:
+        raise StackError(f"Maximum number of elements ({s.size}) exceeded")
+
+def makeFusedPushPushAdd(imms: list, ops: list, analysis):
+    value = (imms[0] + imms[1]) & MAX_UINT_256
+
+    def pushPushAdd(pc: ProgramCounter, interp, ctx: MachineContext):
+        s = ctx.stack
+        checkHeadroom(s, 2)
+
+        s.stack[s.count] = value
+        s.count += 1
+
+    return pushPushAdd
+
+def makeFusedPushAdd(imms: list, ops: list, analysis):
+    x = imms[0]
+
+    def pushAdd(pc: ProgramCounter, interp, ctx: MachineContext):
+        s = ctx.stack
+        checkHeadroom(s, 1)
+        if s.count == 0:
+            raise StackError("Trying to read from empty stack")
+
+        s.stack[s.count - 1] = (x + s.stack[s.count - 1]) & MAX_UINT_256
+
+    return pushAdd
+
+def makeFusedSwapPop(imms: list, ops: list, analysis):
+    n = ops[0] - Opcode.SWAP1 + 1
+
+    def swapPop(pc: ProgramCounter, interp, ctx: MachineContext):
+        s = ctx.stack
+        if s.count <= n:
+            raise StackError("Trying to read from empty stack")
+
+        s.count -= 1
+        s.stack[s.count - n] = s.stack[s.count]
+
+    return swapPop
+
+def makeFusedPushSwapPop(imms: list, ops: list, analysis):
+    x, n = imms[0], ops[1] - Opcode.SWAP1 + 1
+
+    def pushSwapPop(pc: ProgramCounter, interp, ctx: MachineContext):
+        s = ctx.stack
+        checkHeadroom(s, 1)
+        if s.count < n:
+            raise StackError("Trying to read from empty stack")
+
+        s.stack[s.count - n] = x
+
+    return pushSwapPop
+
+def makeFusedPushJump(imms: list, ops: list, analysis):
+    dest = imms[0]
+
+    if not analysis.valid_jumpdest(dest):
+        def pushInvalidJump(pc: ProgramCounter, interp, ctx: MachineContext):
+            checkHeadroom(ctx.stack, 1)
+            return opInvalidJump(pc, interp, ctx)
+
+        return pushInvalidJump
+
+    def pushJump(pc: ProgramCounter, interp, ctx: MachineContext):
+        checkHeadroom(ctx.stack, 1)
+        pc.set(dest)
+
+    return pushJump
+
+def makeConditionalJump(dest: int, analysis, negate: bool):
+    valid = analysis.valid_jumpdest(dest)
+
+    def jumpIf(pc: ProgramCounter, interp, ctx: MachineContext):
+        cond = ctx.stack.pop()
+        checkHeadroom(ctx.stack, 2)
+
+        if (cond == 0) is negate:
+            if not valid:
+                return CompletedExecution(code=ReturnCode.INVALID_JUMP, data=None)
+
+            pc.set(dest)
+
+    return jumpIf
+
+def makeFusedPushJumpI(imms: list, ops: list, analysis):
+    return makeConditionalJump(imms[0], analysis, negate=False)
+
+def makeFusedIsZeroPushJumpI(imms: list, ops: list, analysis):
+    return makeConditionalJump(imms[1], analysis, negate=True)
+
+def makeFusedDupIsZeroPushJumpI(imms: list, ops: list, analysis):
+    n, dest = ops[0] - Opcode.DUP1 + 1, imms[2]
+    valid = analysis.valid_jumpdest(dest)
+
+    def dupIsZeroJumpI(pc: ProgramCounter, interp, ctx: MachineContext):
+        cond = ctx.stack.peek(n - 1)
+        checkHeadroom(ctx.stack, 2)
+
+        if cond == 0:
+            if not valid:
+                return CompletedExecution(code=ReturnCode.INVALID_JUMP, data=None)
+
+            pc.set(dest)
+
+    return dupIsZeroJumpI
+
+FusedTable: dict = {
+    ("PUSH", "PUSH", "ADD") : makeFusedPushPushAdd,
+    ("PUSH", "ADD") : makeFusedPushAdd,
+    ("SWAP", "POP") : makeFusedSwapPop,
+    ("PUSH", "SWAP", "POP") : makeFusedPushSwapPop,
+    ("PUSH", "JUMP") : makeFusedPushJump,
+    ("PUSH", "JUMPI") : makeFusedPushJumpI,
+    ("ISZERO", "PUSH", "JUMPI") : makeFusedIsZeroPushJumpI,
+    ("DUP", "ISZERO", "PUSH", "JUMPI") : makeFusedDupIsZeroPushJumpI,
+}
+
+
+##                                                     ##
+#   unchecked handlers for stack-height verified blocks   #
+##                                                     ##
+"""
+These handlers index the stack's backing list directly and never check for
+underflow or overflow. They are only dispatched inside basic blocks whose
+stack requirements were verified once at block entry (see
+`vm.decoder.block_stack_bounds`), where every access is known to be in range.
+Results are still reduced to 256 bits, exactly as in the checked handlers.
+"""
+
+def uncheckedAdd(pc: ProgramCounter, interp, ctx: MachineContext):
+    s = ctx.stack
+    st, n = s.stack, s.count - 1
+    st[n - 1] = (st[n] + st[n - 1]) & MAX_UINT_256
+    s.count = n
+
+def uncheckedSub(pc: ProgramCounter, interp, ctx: MachineContext):
+    s = ctx.stack
+    st, n = s.stack, s.count - 1
+    st[n - 1] = (st[n] - st[n - 1]) & MAX_UINT_256
+    s.count = n
+
+def uncheckedMul(pc: ProgramCounter, interp, ctx: MachineContext):
+    s = ctx.stack
+    st, n = s.stack, s.count - 1
+    st[n - 1] = (st[n] * st[n - 1]) & MAX_UINT_256
+    s.count = n
+
+def uncheckedDiv(pc: ProgramCounter, interp, ctx: MachineContext):
+    s = ctx.stack
+    st, n = s.stack, s.count - 1
+    y = st[n - 1]
+    st[n - 1] = st[n] // y if y else 0
+    s.count = n
+
+def uncheckedMod(pc: ProgramCounter, interp, ctx: MachineContext):
+    s = ctx.stack
+    st, n = s.stack, s.count - 1
+    y = st[n - 1]
+    st[n - 1] = st[n] % y if y else 0
+    s.count = n
+
+def uncheckedLt(pc: ProgramCounter, interp, ctx: MachineContext):
+    s = ctx.stack
+    st, n = s.stack, s.count - 1
+    st[n - 1] = 1 if st[n] < st[n - 1] else 0
+    s.count = n
+
+def uncheckedGt(pc: ProgramCounter, interp, ctx: MachineContext):
+    s = ctx.stack
+    st, n = s.stack, s.count - 1
+    st[n - 1] = 1 if st[n] > st[n - 1] else 0
+    s.count = n
+
+def uncheckedSlt(pc: ProgramCounter, interp, ctx: MachineContext):
+    s = ctx.stack
+    st, n = s.stack, s.count - 1
+    st[n - 1] = 1 if to_signed(st[n]) < to_signed(st[n - 1]) else 0
+    s.count = n
+
+def uncheckedSgt(pc: ProgramCounter, interp, ctx: MachineContext):
+    s = ctx.stack
+    st, n = s.stack, s.count - 1
+    st[n - 1] = 1 if to_signed(st[n]) > to_signed(st[n - 1]) else 0
+    s.count = n
+
+def uncheckedEq(pc: ProgramCounter, interp, ctx: MachineContext):
+    s = ctx.stack
+    st, n = s.stack, s.count - 1
+    st[n - 1] = 1 if st[n] == st[n - 1] else 0
+    s.count = n
+
+def uncheckedIsZero(pc: ProgramCounter, interp, ctx: MachineContext):
+    s = ctx.stack
+    st, n = s.stack, s.count - 1
+    st[n] = 1 if st[n] == 0 else 0
+
+def uncheckedAnd(pc: ProgramCounter, interp, ctx: MachineContext):
+    s = ctx.stack
+    st, n = s.stack, s.count - 1
+    st[n - 1] = st[n] & st[n - 1]
+    s.count = n
+
+def uncheckedOr(pc: ProgramCounter, interp, ctx: MachineContext):
+    s = ctx.stack
+    st, n = s.stack, s.count - 1
+    st[n - 1] = st[n] | st[n - 1]
+    s.count = n
+
+def uncheckedXor(pc: ProgramCounter, interp, ctx: MachineContext):
+    s = ctx.stack
+    st, n = s.stack, s.count - 1
+    st[n - 1] = st[n] ^ st[n - 1]
+    s.count = n
+
+def uncheckedNot(pc: ProgramCounter, interp, ctx: MachineContext):
+    s = ctx.stack
+    st, n = s.stack, s.count - 1
+    st[n] = MAX_UINT_256 - st[n]
+
+def uncheckedByte(pc: ProgramCounter, interp, ctx: MachineContext):
+    s = ctx.stack
+    st, n = s.stack, s.count - 1
+    i = st[n]
+    st[n - 1] = (st[n - 1] >> (248 - i * 8)) & 0xFF if i < 32 else 0
+    s.count = n
+
+def uncheckedShl(pc: ProgramCounter, interp, ctx: MachineContext):
+    s = ctx.stack
+    st, n = s.stack, s.count - 1
+    shift = st[n]
+    st[n - 1] = (st[n - 1] << shift) & MAX_UINT_256 if shift < 256 else 0
+    s.count = n
+
+def uncheckedShr(pc: ProgramCounter, interp, ctx: MachineContext):
+    s = ctx.stack
+    st, n = s.stack, s.count - 1
+    shift = st[n]
+    st[n - 1] = st[n - 1] >> shift if shift < 256 else 0
+    s.count = n
+
+def uncheckedPop(pc: ProgramCounter, interp, ctx: MachineContext):
+    ctx.stack.count -= 1
+
+def uncheckedJump(pc: ProgramCounter, interp, ctx: MachineContext):
+    s = ctx.stack
+    s.count -= 1
+    dest = s.stack[s.count]
+
+    if not ctx.contract.analysis.valid_jumpdest(dest):
+        return CompletedExecution(code=ReturnCode.INVALID_JUMP, data=None)
+
+    pc.pc = dest
+
+def uncheckedJumpI(pc: ProgramCounter, interp, ctx: MachineContext):
+    s = ctx.stack
+    st, n = s.stack, s.count - 2
+    s.count = n
+
+    if st[n]:
+        dest = st[n + 1]
+        if not ctx.contract.analysis.valid_jumpdest(dest):
+            return CompletedExecution(code=ReturnCode.INVALID_JUMP, data=None)
+
+        pc.pc = dest
+
+def uncheckedMload(pc: ProgramCounter, interp, ctx: MachineContext):
+    s = ctx.stack
+    n = s.count - 1
+    offset = s.stack[n]
+    s.count = n
+
+    ctx.expand_memory(offset, 32)
+    s.stack[n] = ctx.mem.get32(offset)
+    s.count = n + 1
+
+def uncheckedMstore(pc: ProgramCounter, interp, ctx: MachineContext):
+    s = ctx.stack
+    st, n = s.stack, s.count - 2
+    offset, value = st[n + 1], st[n]
+    s.count = n
+
+    ctx.expand_memory(offset, 32)
+    ctx.mem.set32(offset, value)
+
+def uncheckedCallDataLoad(pc: ProgramCounter, interp, ctx: MachineContext):
+    s = ctx.stack
+    n = s.count - 1
+    offset = s.stack[n]
+
+    word = ctx.contract.calldata[offset : offset + 32]
+    s.stack[n] = int.from_bytes(word, byteorder=BIG_ENDIAN) << (8 * (32 - len(word)))
+
+@lru_cache(maxsize=4096)
+def makeUncheckedPushValueOp(value: int):
+    def uncheckedPushValue(pc: ProgramCounter, interp, ctx: MachineContext):
+        s = ctx.stack
+        s.stack[s.count] = value
+        s.count += 1
+
+    return uncheckedPushValue
+
+def makeUncheckedDupOp(position: int):
+    def uncheckedDupN(pc: ProgramCounter, interp, ctx: MachineContext):
+        s = ctx.stack
+        st, n = s.stack, s.count
+        st[n] = st[n - position]
+        s.count = n + 1
+
+    return uncheckedDupN
+
+def makeUncheckedSwapOp(position: int):
+    def uncheckedSwapN(pc: ProgramCounter, interp, ctx: MachineContext):
+        s = ctx.stack
+        st, top = s.stack, s.count - 1
+        st[top], st[top - position] = st[top - position], st[top]
+
+    return uncheckedSwapN
+
+UncheckedTable: dict = {
+    Opcode.ADD : uncheckedAdd,
+    Opcode.SUB : uncheckedSub,
+    Opcode.MUL : uncheckedMul,
+    Opcode.DIV : uncheckedDiv,
+    Opcode.MOD : uncheckedMod,
+    Opcode.LT : uncheckedLt,
+    Opcode.GT : uncheckedGt,
+    Opcode.SLT : uncheckedSlt,
+    Opcode.SGT : uncheckedSgt,
+    Opcode.EQ : uncheckedEq,
+    Opcode.ISZERO : uncheckedIsZero,
+    Opcode.AND : uncheckedAnd,
+    Opcode.OR : uncheckedOr,
+    Opcode.XOR : uncheckedXor,
+    Opcode.NOT : uncheckedNot,
+    Opcode.BYTE : uncheckedByte,
+    Opcode.SHL : uncheckedShl,
+    Opcode.SHR : uncheckedShr,
+    Opcode.POP : uncheckedPop,
+    Opcode.JUMP : uncheckedJump,
+    Opcode.JUMPI : uncheckedJumpI,
+    Opcode.MLOAD : uncheckedMload,
+    Opcode.MSTORE : uncheckedMstore,
+    Opcode.CALLDATALOAD : uncheckedCallDataLoad,
+}
+
+for position in range(1, 17):
+    UncheckedTable[Opcode.DUP1 + position - 1] = makeUncheckedDupOp(position)
+    UncheckedTable[Opcode.SWAP1 + position - 1] = makeUncheckedSwapOp(position)
+
+## stack effect by raw opcode byte
+StackPops: list = [0] * 256
+StackPushes: list = [0] * 256
+for op, instr in ReferenceTable.items():
+    StackPops[op], StackPushes[op] = instr.pops, instr.pushes
@@ -1,11 +1,22 @@
+from time import perf_counter_ns
+
 from vm.contract import Contract
-from vm.memory import Memory
-from vm.stack import Stack
+from vm.stack import StackError
 from vm.pc import ProgramCounter
-from vm.opcode import Opcode
-from vm.instructions import ReferenceTable
+from vm.instructions import DispatchTable, StaticGasTable
+from vm.decoder import metered, resume_entry
+from vm.compiler import compiled
 from vm.machine_ctx import MachineContext
+from vm.tracer import Tracer
+from vm.profiler import Profiler
+from vm.storage import StorageBackend, MemoryStorage
+from vm.state import JournaledState
+from vm.pool import ContextPool
+from vm.frames import Frame, Message, CreateKinds, create_address, create2_address
+from vm.gas import OutOfGasError, CREATE_DATA_GAS
 from vm.constants import (
+    MAX_CALL_DEPTH,
+    MAX_CODE_SIZE,
     CompletedExecution,
     ReturnCode
 )
@@ -14,29 +25,302 @@ from vm.constants import (
 class EVMInterpreter:
     scope_ctx = None
 
+    def __init__(self, tracer: Tracer=None, compile_blocks: bool=False, fuse: bool=True, storage: StorageBackend=None, accounts: dict=None, profiler: Profiler=None):
+        self.tracer = tracer
+        self.profiler = profiler
+        self.compile_blocks = compile_blocks
+        self.fuse = fuse
+        self.storage = storage if storage is not None else MemoryStorage()
+        self.accounts = accounts if accounts is not None else {}
+
+        ## execution contexts and transaction state are reused across runs and frames
+        self.pool = ContextPool()
+        self.state = JournaledState(self.storage, self.accounts)
+
     def run(self, contract: Contract) -> CompletedExecution:
-        
-        stack, mem = Stack(), Memory()
+        ctx = self.pool.acquire(contract, contract.gas, origin=contract.caller)
 
-        ctx = MachineContext(contract, mem, stack)
+        try:
+            return self.execute(ctx)
+        finally:
+            self.pool.release(ctx)
+
+    def execute(self, ctx: MachineContext, pc: int=0) -> CompletedExecution:
+        """
+        Runs a prepared machine context starting at `pc`. Every mode charges
+        the static gas of the instructions it runs from `pc` on, so resuming
+        inside a block charges (and stack checks) just the rest of that block.
+        Without a state on the context the run is its own transaction and
+        commits its state changes only when it succeeds.
+        """
         self.scope_ctx = ctx
+        contract = ctx.contract
+
+        transaction = ctx.state is None
+        if transaction:
+            ctx.state = self.state
+
+        contract.analyse()
+
+        if self.tracer is not None:
+            self.tracer.capture_start(ctx)
+
+        try:
+            result = self._run_frames(Frame(ctx, ProgramCounter(pc)), resume_entry(contract, pc) if pc else None)
+        except BaseException:
+            ## nothing a failed run wrote may reach the next transaction
+            if transaction:
+                ctx.state.discard()
+            raise
+
+        ## exceptional halts consume all remaining gas
+        if result.code == ReturnCode.STOPPED or result.code == ReturnCode.REVERTED:
+            result.gas_left = ctx.gas
+
+        if transaction:
+            if result.code == ReturnCode.STOPPED:
+                result.gas_refund = ctx.state.refund
+                result.logs = ctx.state.logs
+                ctx.state.commit()
+            else:
+                ctx.state.discard()
+
+        if self.tracer is not None:
+            self.tracer.capture_end(result)
+
+        return result
+
+    ##                  ##
+    #   call frames      #
+    ##                  ##
+
+    def _run_frames(self, root: Frame, entry=None) -> CompletedExecution:
+        """
+        Drives the explicit frame stack: calls push a frame, halts pop back to
+        the caller. `entry` runs first when the root frame resumes mid-block.
+        """
+        frames: list = [root]
+        frame = root
+
+        try:
+            while True:
+                result = self._run_frame(frame, frame is root, entry)
+                entry = None
+
+                if isinstance(result, Message):
+                    callee = self._enter(frame, result)
+                    if callee is not None:
+                        frames.append(callee)
+                        frame = callee
+                    continue
+
+                if frame is root:
+                    return result
+
+                frames.pop()
+                self._leave(frames[-1], frame, result)
+                frame = frames[-1]
+
+        except BaseException:
+            ## the root context belongs to the caller, callee contexts go back to the pool
+            for callee in frames[1:]:
+                self.pool.release(callee.ctx)
+            raise
+
+    def _run_frame(self, frame: Frame, root: bool, entry=None):
+        ctx = frame.ctx
+
+        try:
+            if self.profiler is not None:
+                return self._run_profiled(ctx.contract, ctx, self.profiler, frame.pc)
+
+            if self.tracer is None:
+                ## the per instruction loops check every instruction and need no entry
+                if entry is not None:
+                    result = entry(frame.pc, self, ctx)
+                    if result is not None:
+                        return result
+
+                return self._run_fast(self._stream(ctx.contract), ctx, frame.pc)
+
+            return self._run_traced(ctx.contract, ctx, self.tracer, frame.pc)
+
+        except OutOfGasError:
+            return CompletedExecution(code=ReturnCode.OUT_OF_GAS, data=None)
+
+        except StackError:
+            ## stack errors still surface to the caller of `run`, but only fail a sub call
+            if root:
+                raise
+
+            return CompletedExecution(code=ReturnCode.INVALID, data=None)
+
+    def _enter(self, caller: Frame, message: Message) -> Frame:
+        """ Sets up the callee frame, or fails the call straight away and returns None """
+        ctx = caller.ctx
+        state = ctx.state
+
+        if ctx.depth >= MAX_CALL_DEPTH:
+            return self._fail(caller, message)
+
+        ## DELEGATECALL only inherits its value, no wei moves
+        if message.transfer and state.balance(message.caller) < message.value:
+            return self._fail(caller, message)
+
+        if message.kind in CreateKinds:
+            nonce = state.nonce(message.caller)
+            state.set_nonce(message.caller, nonce + 1)
+
+            if message.salt is None:
+                message.address = create_address(message.caller, nonce)
+            else:
+                message.address = create2_address(message.caller, message.salt, message.init_code)
+
+            ## address collision: the call fails and its gas is lost
+            if state.nonce(message.address) or state.code(message.address):
+                message.gas = 0
+                return self._fail(caller, message)
+
+        snapshot = state.snapshot()
 
-        pc = ProgramCounter(0)
+        if message.kind in CreateKinds:
+            state.set_nonce(message.address, 1)
+            code = message.init_code
+        else:
+            code = state.code(message.code_address)
 
-        ## Main execution loop ## 
+        if message.transfer:
+            state.transfer(message.caller, message.address, message.value)
+
+        contract = Contract(code, message.data, value=message.value, gas=message.gas, address=message.address, caller=message.caller)
+        contract.analyse()
+
+        callee = self.pool.acquire(
+            contract,
+            message.gas,
+            state=state,
+            depth=ctx.depth + 1,
+            static=message.static,
+            origin=ctx.origin,
+        )
+
+        return Frame(callee, ProgramCounter(0), message, snapshot)
+
+    def _fail(self, caller: Frame, message: Message):
+        caller.ctx.gas += message.gas
+        caller.ctx.return_data = b""
+        caller.ctx.stack.push(0)
+
+    def _leave(self, caller: Frame, callee: Frame, result: CompletedExecution):
+        """ Hands the callee's outcome back to the caller and recycles the callee's frame """
+        ctx, message = caller.ctx, callee.message
+
+        success = result.code == ReturnCode.STOPPED
+        gas_left = callee.ctx.gas if success or result.code == ReturnCode.REVERTED else 0
+        data = bytes(result.data) if result.data is not None else b""
+
+        if message.kind in CreateKinds:
+            if success:
+                deposit = CREATE_DATA_GAS * len(data)
+
+                if len(data) > MAX_CODE_SIZE or deposit > gas_left:
+                    success, gas_left = False, 0
+                else:
+                    gas_left -= deposit
+                    ctx.state.set_code(message.address, data)
+
+            ctx.stack.push(message.address if success else 0)
+            ctx.return_data = data if result.code == ReturnCode.REVERTED else b""
+
+        else:
+            ctx.stack.push(1 if success else 0)
+            ctx.return_data = data
+
+            size = min(message.ret_size, len(data))
+            if size:
+                ctx.mem.set(message.ret_offset, data[:size])
+
+        if not success:
+            ctx.state.revert(callee.snapshot)
+
+        ctx.gas += gas_left
+
+        self.pool.release(callee.ctx)
+
+    ##                  ##
+    #   execution loops  #
+    ##                  ##
+
+    def _stream(self, contract: Contract) -> list:
+        if self.compile_blocks:
+            return compiled(contract)
+
+        return metered(contract, fusion=self.fuse)
+
+    def _run_fast(self, stream: list, ctx: MachineContext, pc: ProgramCounter):
+        """ Walks a gas metered stream where static gas is charged once per basic block """
+
+        ## Main execution loop ##
 
         while True:
-            op: Opcode = contract.get_op(pc)
-            print(f"PC = {pc.get()}, OP = {repr(op)}")
-            
-            if op == Opcode.STOP:
+            handler, _, next_pc = stream[pc.pc]
+
+            ## move to the next instruction before executing so that jumps
+            ## can overwrite the program counter
+            pc.pc = next_pc
+
+            result = handler(pc, self, ctx)
+            if result is not None:
+                return result
+
+    def _run_traced(self, contract: Contract, ctx: MachineContext, tracer: Tracer, pc: ProgramCounter):
+        """ Steps through raw bytecode charging static gas per instruction """
+        code, dispatch, costs = contract.code, DispatchTable, StaticGasTable
+
+        while True:
+            try:
+                op: int = code[pc.pc]
+            except IndexError:
                 return CompletedExecution(code=ReturnCode.STOPPED, data=None)
 
-            if op == Opcode.REVERT:
-                return CompletedExecution(code=ReturnCode.REVERTED, data=None)
+            tracer.capture_state(pc.pc, op, ctx)
+
+            if costs[op] > ctx.gas:
+                return CompletedExecution(code=ReturnCode.OUT_OF_GAS, data=None)
+
+            ctx.gas -= costs[op]
+            pc.pc += 1
+
+            result = dispatch[op](pc, self, ctx)
+            if result is not None:
+                return result
+
+    def _run_profiled(self, contract: Contract, ctx: MachineContext, profiler: Profiler, pc: ProgramCounter):
+        """ Steps through raw bytecode like `_run_traced`, timing and metering every instruction """
+        code, dispatch, costs = contract.code, DispatchTable, StaticGasTable
+        record, clock = profiler.record, perf_counter_ns
+        path = profiler.enter(ctx)
+
+        while True:
+            at = pc.pc
+
+            try:
+                op: int = code[at]
+            except IndexError:
+                return CompletedExecution(code=ReturnCode.STOPPED, data=None)
+
+            if costs[op] > ctx.gas:
+                return CompletedExecution(code=ReturnCode.OUT_OF_GAS, data=None)
+
+            gas = ctx.gas
+            ctx.gas -= costs[op]
+            pc.pc += 1
 
-            ReferenceTable[op].execute(pc, self, ctx)
-            print(f"Stack -> {ctx.stack}")
+            start = clock()
+            try:
+                result = dispatch[op](pc, self, ctx)
+            finally:
+                record(path, at, op, clock() - start, gas - ctx.gas)
 
-            ## move to next byte in instruction encoding
-            pc.increment(amount=1)
\ No newline at end of file
+            if result is not None:
+                return result
@@ -0,0 +1,132 @@
+import os
+from functools import lru_cache
+
+"""
+Keccak-256 (the pre-standard SHA3 variant used by Ethereum).
+
+The hashing backend is chosen once at import: pycryptodome, then pysha3, then
+a pure Python implementation of Keccak-f[1600] so the interpreter runs without
+any native dependency. Setting `EVM_KECCAK_BACKEND` to "pycryptodome",
+"pysha3" or "python" forces a backend.
+
+Solidity hashes the same 32 and 64 byte inputs over and over (mapping slots
+are keccak(key ++ slot)), so digests of inputs of exactly those sizes are
+memoized in an LRU cache.
+"""
+
+MEMO_SIZE = 65536
+
+##                              ##
+#   pure Python Keccak-f[1600]    #
+##                              ##
+
+RATE = 136 ## bytes absorbed per permutation for a 256-bit digest
+LANE_MASK = (1 << 64) - 1
+
+RoundConstants: tuple = (
+    0x0000000000000001, 0x0000000000008082, 0x800000000000808A, 0x8000000080008000,
+    0x000000000000808B, 0x0000000080000001, 0x8000000080008081, 0x8000000000008009,
+    0x000000000000008A, 0x0000000000000088, 0x0000000080008009, 0x000000008000000A,
+    0x000000008000808B, 0x800000000000008B, 0x8000000000008089, 0x8000000000008003,
+    0x8000000000008002, 0x8000000000000080, 0x000000000000800A, 0x800000008000000A,
+    0x8000000080008081, 0x8000000000008080, 0x0000000080000001, 0x8000000080008008,
+)
+
+def rotation_offsets() -> list:
+    """ rho offsets indexed by lane x + 5 * y """
+    offsets = [0] * 25
+    x, y = 1, 0
+    for t in range(24):
+        offsets[x + 5 * y] = ((t + 1) * (t + 2) // 2) % 64
+        x, y = y, (2 * x + 3 * y) % 5
+
+    return offsets
+
+Rotations: list = rotation_offsets()
+
+## pi: lane (x, y) moves to (y, 2x + 3y)
+PiTargets: list = [y + 5 * ((2 * x + 3 * y) % 5) for y in range(5) for x in range(5)]
+
+def keccak_f(lanes: list) -> list:
+    for rc in RoundConstants:
+        ## theta
+        c = [lanes[x] ^ lanes[x + 5] ^ lanes[x + 10] ^ lanes[x + 15] ^ lanes[x + 20] for x in range(5)]
+        d = [c[(x - 1) % 5] ^ (((c[(x + 1) % 5] << 1) | (c[(x + 1) % 5] >> 63)) & LANE_MASK) for x in range(5)]
+
+        ## rho and pi
+        b = [0] * 25
+        for i in range(25):
+            lane, r = lanes[i] ^ d[i % 5], Rotations[i]
+            b[PiTargets[i]] = ((lane << r) | (lane >> (64 - r))) & LANE_MASK if r else lane
+
+        ## chi
+        lanes = [b[i] ^ (~b[(i + 1) % 5 + i - i % 5] & b[(i + 2) % 5 + i - i % 5]) for i in range(25)]
+
+        ## iota
+        lanes[0] ^= rc
+
+    return lanes
+
+def python_keccak256(data) -> bytes:
+    data = bytes(data)
+
+    ## multi-rate padding with the original Keccak domain byte 0x01
+    padded = bytearray(data)
+    padded.append(0x01)
+    padded.extend(bytes(-len(padded) % RATE))
+    padded[-1] |= 0x80
+
+    lanes = [0] * 25
+    for block in range(0, len(padded), RATE):
+        for i in range(RATE // 8):
+            lanes[i] ^= int.from_bytes(padded[block + 8 * i : block + 8 * i + 8], "little")
+        lanes = keccak_f(lanes)
+
+    return b"".join(lane.to_bytes(8, "little") for lane in lanes[:4])
+
+
+##                  ##
+#   backend choice   #
+##                  ##
+
+def load_backend(name: str):
+    if name == "pycryptodome":
+        from Crypto.Hash import keccak
+        return lambda data: keccak.new(data=data, digest_bits=256).digest()
+
+    if name == "pysha3":
+        import sha3
+        return lambda data: sha3.keccak_256(data).digest()
+
+    if name == "python":
+        return python_keccak256
+
+    raise ValueError(f"Unknown keccak backend {name}")
+
+def select_backend() -> tuple:
+    forced = os.environ.get("EVM_KECCAK_BACKEND")
+    if forced:
+        return forced, load_backend(forced)
+
+    for name in ("pycryptodome", "pysha3"):
+        try:
+            return name, load_backend(name)
+        except ImportError:
+            pass
+
+    return "python", python_keccak256
+
+BACKEND, hash_backend = select_backend()
+
+
+@lru_cache(maxsize=MEMO_SIZE)
+def memoized_keccak256(data: bytes) -> bytes:
+    return hash_backend(data)
+
+def keccak256(data) -> bytes:
+    """ Keccak-256 digest of any bytes-like object (memoryviews are hashed without copying) """
+    size = len(data)
+    if size == 32 or size == 64:
+        return memoized_keccak256(bytes(data))
+
+    return hash_backend(data)
@@ -0,0 +1,173 @@
+import binascii
+import mmap
+import os
+import struct
+import tarfile
+import zipfile
+
+from vm.contract import Contract
+
+"""
+Loading bytecode and calldata from files without copying them.
+
+Raw binary files are memory mapped and handed to `Contract` as read-only
+`memoryview`s, so the code or calldata lives once, in the page cache. Hex
+files are decoded straight from the mapping into a single bytes object (half
+the size of the text) without building an intermediate string.
+
+Contracts can be loaded in bulk from a directory or from a tar or zip
+archive. An archive is mapped once and every member stored uncompressed is a
+view into that one mapping; compressed zip members are inflated into bytes.
+Small loose files are read rather than mapped, since every mapping costs at
+least a page and a file descriptor.
+
+A `<name>.calldata` file next to `<name>.<ext>` becomes that contract's
+calldata.
+"""
+
+## loose files at least this large are mapped instead of read
+MMAP_THRESHOLD = 64 * 1024
+
+HexDigits = frozenset(b"0123456789abcdefABCDEF")
+Whitespace = b" \t\r\n"
+
+CALLDATA_SUFFIX = ".calldata"
+
+## leading bytes of the gzip, bzip2 and xz streams a compressed tarball starts with
+CompressedMagic = (b"\x1f\x8b", b"BZh", b"\xfd7zXZ\x00")
+
+
+def map_file(path: str) -> memoryview:
+    """ Read-only view of a whole file, backed by the page cache """
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return memoryview(b"")
+
+        ## the mapping keeps its own handle on the file
+        return memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+def read_file(path: str):
+    if os.path.getsize(path) >= MMAP_THRESHOLD:
+        return map_file(path)
+
+    with open(path, "rb") as f:
+        return f.read()
+
+def is_hex(data) -> bool:
+    """ Sniffs whether a buffer holds hex text (optionally 0x prefixed) rather than raw bytes """
+    head = bytes(data[:4096]).strip(Whitespace)
+    if head[:2] in (b"0x", b"0X"):
+        head = head[2:]
+
+    return len(head) > 0 and all(c in HexDigits or c in Whitespace for c in head)
+
+def decode(data, hex_text: bool=None):
+    """ Returns raw bytes for a buffer holding raw or hex encoded data, views stay views """
+    if hex_text is None:
+        hex_text = is_hex(data)
+
+    if not hex_text:
+        return data
+
+    view = memoryview(data)
+    start, end = 0, len(view)
+    while start < end and view[start] in Whitespace:
+        start += 1
+    while end > start and view[end - 1] in Whitespace:
+        end -= 1
+
+    if bytes(view[start : start + 2]) in (b"0x", b"0X"):
+        start += 2
+
+    try:
+        return binascii.unhexlify(view[start:end])
+    except binascii.Error:
+        ## hex broken over several lines
+        return bytes.fromhex(bytes(view[start:end]).decode("ascii"))
+
+def load_bytes(path: str, hex_text: bool=None):
+    return decode(read_file(path), hex_text)
+
+def load_contract(code_path: str, data_path: str=None, **fields) -> Contract:
+    """ `fields` (value, gas, address, caller) are passed on to `Contract` """
+    data = load_bytes(data_path) if data_path is not None else None
+    return Contract(load_bytes(code_path), data, **fields)
+
+
+##                  ##
+#   bulk loading     #
+##                  ##
+
+def split_name(name: str) -> tuple:
+    stem, extension = os.path.splitext(os.path.basename(name))
+    return stem, extension == CALLDATA_SUFFIX
+
+def pair(members) -> dict:
+    """ Groups (name, buffer) members into {stem: [code, calldata]} """
+    contracts: dict = {}
+
+    for name, data in members:
+        stem, is_calldata = split_name(name)
+        entry = contracts.setdefault(stem, [None, None])
+        entry[1 if is_calldata else 0] = data
+
+    return contracts
+
+def directory_members(path: str):
+    for name in sorted(os.listdir(path)):
+        full = os.path.join(path, name)
+        if os.path.isfile(full):
+            yield name, read_file(full)
+
+def tar_members(path: str, archive: memoryview):
+    with tarfile.open(path, "r:") as tar:
+        for member in tar.getmembers():
+            if member.isfile():
+                yield member.name, archive[member.offset_data : member.offset_data + member.size]
+
+## local file header: signature, versions/flags/method/time/date, crc, sizes, name and extra lengths
+LocalHeader = struct.Struct("<4s5H3L2H")
+
+def zip_members(path: str, archive: memoryview):
+    with zipfile.ZipFile(path) as zf:
+        for info in zf.infolist():
+            if info.is_dir():
+                continue
+
+            if info.compress_type != zipfile.ZIP_STORED:
+                yield info.filename, zf.read(info)
+                continue
+
+            fields = LocalHeader.unpack_from(archive, info.header_offset)
+            start = info.header_offset + LocalHeader.size + fields[-2] + fields[-1]
+            yield info.filename, archive[start : start + info.file_size]
+
+def load_contracts(path: str, hex_text: bool=None, **fields) -> dict:
+    """
+    Loads every contract in a directory, tar archive (uncompressed) or zip
+    archive and returns {name: Contract}, names being file names without
+    their extension.
+    """
+    if os.path.isdir(path):
+        members = directory_members(path)
+    else:
+        archive = map_file(path)
+
+        if zipfile.is_zipfile(path):
+            members = zip_members(path, archive)
+        elif tarfile.is_tarfile(path):
+            if bytes(archive[:6]).startswith(CompressedMagic):
+                raise ValueError(f"{path} is a compressed tar archive, only uncompressed tar archives can be mapped")
+            members = tar_members(path, archive)
+        else:
+            raise ValueError(f"{path} is not a directory, tar or zip archive")
+
+    contracts: dict = {}
+    for stem, (code, data) in pair(members).items():
+        if code is None:
+            continue
+
+        calldata = decode(data, hex_text) if data is not None else None
+        contracts[stem] = Contract(decode(code, hex_text), calldata, **fields)
+
+    return contracts
@@ -1,11 +1,37 @@
 from dataclasses import dataclass
 
-from vm.memory import Memory
+from vm.memory import Memory, to_word_size
 from vm.stack import Stack
 from vm.contract import Contract
+from vm.state import JournaledState
+from vm.gas import OutOfGasError, memory_gas
 
 @dataclass
 class MachineContext:
     contract: Contract
     mem: Memory
     stack: Stack 
+    gas: int = 0
+    state: JournaledState = None
+
+    ## call frame
+    depth: int = 0
+    static: bool = False
+    origin: int = 0
+    return_data: bytes = b""
+
+    def use_gas(self, amount: int):
+        if amount > self.gas:
+            raise OutOfGasError(f"Out of gas: {amount} required, {self.gas} available")
+
+        self.gas -= amount
+
+    def expand_memory(self, offset: int, size: int):
+        """ Charges memory expansion gas for [offset, offset + size) before growing memory """
+        if size == 0:
+            return
+
+        words, current = to_word_size(offset + size), self.mem.words()
+        if words > current:
+            self.use_gas(memory_gas(words) - memory_gas(current))
+            self.mem.expand(offset, size)
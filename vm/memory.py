@@ -1,28 +1,87 @@
-import sys
-
 """
   YELLOW PAPER:
   * The memory model is a simple word-addressed byte array.
 
   Implementation inspiration taken directly from geth:
   - https://github.com/ethereum/go-ethereum/blob/b1e72f7ea998ad662166bcf23705ca59cf81e925/core/vm/memory.go
+
+  Memory starts empty and grows in 32 byte words when an access touches bytes
+  beyond the active size. Range reads are handed out as `memoryview` slices so
+  that RETURN/SHA3/copy operations never duplicate the underlying buffer.
 """
 
-## TODO: Actually represent memory as a word addressed byte array instead of byte key list
+WORD_SIZE = 32
+
+def to_word_size(size: int) -> int:
+  """ Returns the number of 32 byte words needed to hold `size` bytes """
+  return (size + WORD_SIZE - 1) // WORD_SIZE
+
 
 class Memory():
-  store: list = []
-  limit: int = 1000000
+  __slots__ = ("store",)
 
   def __init__(self):
-    self.store = [None] * self.limit
+    self.store = bytearray()
+
+  def __len__(self) -> int:
+    return len(self.store)
+
+  def words(self) -> int:
+    return len(self.store) // WORD_SIZE
+
+  def reset(self):
+    self.store.clear()
+
+  def expand(self, offset: int, size: int) -> int:
+    """
+    Grows memory so that [offset, offset + size) is addressable and returns
+    the number of words that were added. Zero sized accesses never expand.
+    """
+    if size == 0:
+      return 0
+
+    current = len(self.store)
+    end = offset + size
+    if end <= current:
+      return 0
+
+    new_size = to_word_size(end) * WORD_SIZE
+    self.store.extend(bytes(new_size - current))
+
+    return (new_size - current) // WORD_SIZE
 
   def set(self, offset: int, value: bytes):
-    size = sys.getsizeof(value)
+    """ Writes raw bytes starting at offset, expanding memory if needed """
+    size = len(value)
 
     if size > 0:
-      if offset + size < self.limit:
-        self.store[offset] = value
+      self.expand(offset, size)
+      self.store[offset : offset + size] = value
+
+  def set32(self, offset: int, value: int):
+    self.expand(offset, WORD_SIZE)
+    self.store[offset : offset + WORD_SIZE] = value.to_bytes(WORD_SIZE, "big")
+
+  def set8(self, offset: int, value: int):
+    self.expand(offset, 1)
+    self.store[offset] = value & 0xFF
+
+  def get32(self, offset: int) -> int:
+    self.expand(offset, WORD_SIZE)
+    return int.from_bytes(memoryview(self.store)[offset : offset + WORD_SIZE], "big")
+
+  def view(self, offset: int, size: int) -> memoryview:
+    """
+    Returns a zero-copy view of [offset, offset + size). Views pin the
+    buffer, so they must be released before memory is expanded again.
+    """
+    self.expand(offset, size)
+    return memoryview(self.store)[offset : offset + size]
+
+  def get(self, offset: int, size: int) -> bytes:
+    """ Returns a copy of [offset, offset + size) """
+    if size == 0:
+      return b""
 
-  def get(self, offset: int):
-    return self.store[offset]
\ No newline at end of file
+    with self.view(offset, size) as v:
+      return bytes(v)
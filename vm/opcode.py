@@ -51,7 +51,8 @@ class Opcode(IntEnum):
     EXTCODESIZE = 0x3B
     EXTCODECOPY = 0x3C
     RETURNDATASIZE = 0x3D
-    EXTCODEHASH = 0x3E
+    RETURNDATACOPY = 0x3E
+    EXTCODEHASH = 0x3F
     BLOCKHASH = 0x40
     COINBASE = 0x41
     TIMESTAMP = 0x42
@@ -0,0 +1,116 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from vm.contract import Contract
+from vm.interpreter import EVMInterpreter
+from vm.analysis import CodeCache, use_code_cache
+from vm.codestore import CodeStore
+from vm.constants import (
+    DEFAULT_GAS,
+    CompletedExecution,
+    ReturnCode,
+)
+
+"""
+Parallel execution of independent contract runs over a process pool.
+
+Each distinct bytecode is hashed once in the parent and shipped to every
+worker once, through the pool initializer. Workers analyse, decode and meter
+each code up front and keep the result keyed by code hash, so a task only
+carries its code hash, calldata, value, gas, address and caller. Results
+travel back as (code, data, gas_left, gas_refund, logs) tuples and are
+rebuilt into `CompletedExecution` records in input order.
+"""
+
+## per worker process: code hash -> analysed template contract
+WorkerCodes: dict = {}
+WorkerInterpreter: EVMInterpreter = None
+
+
+def as_call(item) -> tuple:
+    """ Normalises a `Contract` or a (code, data[, value[, gas[, address[, caller]]]]) tuple to a call tuple """
+    if isinstance(item, Contract):
+        return item.code, item.data, item.value, item.gas, item.address, item.caller
+
+    code, data, *rest = item
+    value = rest[0] if len(rest) > 0 else 0
+    gas = rest[1] if len(rest) > 1 else DEFAULT_GAS
+    address = rest[2] if len(rest) > 2 else 0
+    caller = rest[3] if len(rest) > 3 else 0
+    return code, data, value, gas, address, caller
+
+def prepare(code_hash: bytes, code: bytes) -> Contract:
+    template = Contract(code, None)
+    template.code_hash = code_hash
+    template.analyse()
+    return template
+
+def instantiate(template: Contract, data, value: int, gas: int, address: int, caller: int) -> Contract:
+    contract = Contract(template.code, data, value=value, gas=gas, address=address, caller=caller)
+    contract.code_hash, contract.analysis = template.code_hash, template.analysis
+    return contract
+
+def execute(interpreter: EVMInterpreter, template: Contract, data, value: int, gas: int, address: int, caller: int) -> tuple:
+    result = interpreter.run(instantiate(template, data, value, gas, address, caller))
+    data = bytes(result.data) if result.data is not None else None
+    return int(result.code), data, result.gas_left, result.gas_refund, result.logs
+
+
+def initWorker(codes: dict, options: dict, code_store: str=None):
+    global WorkerInterpreter
+    WorkerInterpreter = EVMInterpreter(**options)
+
+    if code_store is not None:
+        use_code_cache(CodeCache(store=CodeStore(code_store)))
+
+    for code_hash, code in codes.items():
+        template = prepare(code_hash, code)
+        WorkerInterpreter._stream(template)
+        WorkerCodes[code_hash] = template
+
+def runChunk(tasks: list) -> list:
+    return [execute(WorkerInterpreter, WorkerCodes[code_hash], *task) for code_hash, *task in tasks]
+
+
+def run_many(calls, workers: int=None, chunksize: int=None, code_store: str=None, **options) -> list:
+    """
+    Runs independent calls across `workers` processes and returns one
+    `CompletedExecution` per call, in order. `calls` holds `Contract`s or
+    (code, data[, value[, gas[, address[, caller]]]]) tuples; `options` are passed to every
+    worker's `EVMInterpreter`. With a single worker the calls run in process.
+    Workers given a `code_store` path warm their analysis cache from it.
+    """
+    workers = workers or os.cpu_count() or 1
+
+    codes: dict = {}
+    hashes: dict = {}
+    tasks: list = []
+
+    for item in calls:
+        code, data, value, gas, address, caller = as_call(item)
+        code = bytes(code)
+
+        code_hash = hashes.get(code)
+        if code_hash is None:
+            code_hash = Contract(code, None).get_code_hash()
+            hashes[code] = code_hash
+            codes[code_hash] = code
+
+        tasks.append((code_hash, bytes(data) if data is not None else None, value, gas, address, caller))
+
+    if workers == 1 or len(tasks) <= 1:
+        interpreter = EVMInterpreter(**options)
+        templates = {code_hash: prepare(code_hash, code) for code_hash, code in codes.items()}
+        records = [execute(interpreter, templates[code_hash], *task) for code_hash, *task in tasks]
+
+    else:
+        chunksize = chunksize or max(1, len(tasks) // (workers * 4))
+        chunks = [tasks[i : i + chunksize] for i in range(0, len(tasks), chunksize)]
+
+        with ProcessPoolExecutor(max_workers=workers, initializer=initWorker, initargs=(codes, options, code_store)) as pool:
+            records = [record for chunk in pool.map(runChunk, chunks) for record in chunk]
+
+    return [
+        CompletedExecution(code=ReturnCode(code), data=data, gas_left=gas_left, gas_refund=gas_refund, logs=logs)
+        for code, data, gas_left, gas_refund, logs in records
+    ]
@@ -0,0 +1,52 @@
+from vm.memory import Memory
+from vm.stack import Stack
+from vm.contract import Contract
+from vm.machine_ctx import MachineContext
+from vm.state import JournaledState
+
+"""
+Reuse of execution contexts.
+
+A `MachineContext` owns a preallocated 1024 word `Stack` and a `Memory`
+buffer. `ContextPool` keeps released contexts and hands them out again, reset
+in place, so a steady stream of runs and sub calls stops allocating them once
+the pool holds as many contexts as the deepest call chain needs.
+
+Contexts are reset when they are acquired rather than when they are released,
+so a finished run's stack and memory stay inspectable until the context is
+handed out again.
+"""
+
+class ContextPool():
+    __slots__ = ("free", "allocations")
+
+    def __init__(self):
+        self.free: list = []
+
+        ## number of contexts ever created by this pool
+        self.allocations = 0
+
+    def __len__(self) -> int:
+        return len(self.free)
+
+    def acquire(self, contract: Contract, gas: int, state: JournaledState=None, depth: int=0, static: bool=False, origin: int=0) -> MachineContext:
+        if not self.free:
+            self.allocations += 1
+            return MachineContext(contract, Memory(), Stack(), gas=gas, state=state, depth=depth, static=static, origin=origin)
+
+        ctx = self.free.pop()
+        ctx.stack.reset()
+        ctx.mem.reset()
+
+        ctx.contract = contract
+        ctx.gas = gas
+        ctx.state = state
+        ctx.depth = depth
+        ctx.static = static
+        ctx.origin = origin
+        ctx.return_data = b""
+
+        return ctx
+
+    def release(self, ctx: MachineContext):
+        self.free.append(ctx)
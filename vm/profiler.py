@@ -0,0 +1,129 @@
+from vm.opcode import Opcode
+from vm.machine_ctx import MachineContext
+
+"""
+Opt-in per-opcode profiling.
+
+Handing a `Profiler` to `EVMInterpreter` makes it run every frame on a
+separate profiled loop that steps through raw bytecode (so each instruction is
+charged and timed on its own) and records, per contract and pc, how often the
+instruction ran, the wall time its handler took (`perf_counter_ns`) and the gas
+it consumed. Without a profiler the interpreter never reaches that loop, so
+the fast loops pay nothing for it.
+
+Contracts are identified by the address they run at and the hash of their
+code, shown as `address@hash prefix`, so different code run at one address
+(say, the default address 0) is kept apart. Gas handed to a sub call
+is attributed to the CALL/CREATE instruction that forwarded it, and the time
+spent inside the callee is attributed to the callee's own instructions.
+"""
+
+def opcode_name(op: int) -> str:
+    return Opcode(op).name if op in Opcode._value2member_map_ else f"{op:#04x}"
+
+def contract_name(address: int, code_hash: bytes) -> str:
+    return f"{address:#x}@{code_hash[:4].hex()}"
+
+
+class PcStats():
+    __slots__ = ("op", "count", "ns", "gas")
+
+    def __init__(self, op: int):
+        self.op = op
+        self.count = 0
+        self.ns = 0
+        self.gas = 0
+
+
+class Profiler():
+    def __init__(self):
+        ## (address, pc) -> PcStats
+        self.pcs: dict = {}
+
+        ## (contract, ..., contract, opcode name) call paths -> ns, for flame graphs
+        self.stacks: dict = {}
+
+        ## contract call path of the frames currently running, indexed by depth
+        self.path: list = []
+
+    def enter(self, ctx: MachineContext) -> tuple:
+        """ Called whenever a frame starts or resumes; returns its call path """
+        del self.path[ctx.depth:]
+        contract = ctx.contract
+        self.path.append(contract_name(contract.address, contract.get_code_hash()))
+
+        return tuple(self.path)
+
+    def record(self, path: tuple, pc: int, op: int, ns: int, gas: int):
+        key = (path[-1], pc)
+
+        stats = self.pcs.get(key)
+        if stats is None:
+            stats = self.pcs[key] = PcStats(op)
+
+        stats.count += 1
+        stats.ns += ns
+        stats.gas += gas
+
+        stack = path + (opcode_name(op),)
+        self.stacks[stack] = self.stacks.get(stack, 0) + ns
+
+    def clear(self):
+        self.pcs.clear()
+        self.stacks.clear()
+        self.path.clear()
+
+    ##              ##
+    #   reporting    #
+    ##              ##
+
+    def opcodes(self) -> dict:
+        """ Totals per opcode name: {name: (count, ns, gas)} """
+        totals: dict = {}
+
+        for stats in self.pcs.values():
+            name = opcode_name(stats.op)
+            count, ns, gas = totals.get(name, (0, 0, 0))
+            totals[name] = (count + stats.count, ns + stats.ns, gas + stats.gas)
+
+        return totals
+
+    def hot_spots(self, limit: int=10) -> dict:
+        """ The `limit` most expensive pcs of every contract: {contract: [(pc, PcStats)]} """
+        contracts: dict = {}
+
+        for (contract, pc), stats in self.pcs.items():
+            contracts.setdefault(contract, []).append((pc, stats))
+
+        return {
+            contract: sorted(rows, key=lambda row: row[1].ns, reverse=True)[:limit]
+            for contract, rows in contracts.items()
+        }
+
+    def report(self, limit: int=10) -> str:
+        lines: list = []
+
+        for contract, rows in self.hot_spots(limit).items():
+            total = sum(stats.ns for (address, _), stats in self.pcs.items() if address == contract)
+
+            lines.append(f"contract {contract}: {total} ns")
+            lines.append(f"{'pc':>8} {'opcode':<16} {'count':>10} {'ns':>12} {'ns/op':>8} {'gas':>10} {'time':>6}")
+
+            for pc, stats in rows:
+                share = 100 * stats.ns / total if total else 0
+                lines.append(
+                    f"{pc:>8} {opcode_name(stats.op):<16} {stats.count:>10} {stats.ns:>12} "
+                    f"{stats.ns // stats.count:>8} {stats.gas:>10} {share:>5.1f}%"
+                )
+
+            lines.append("")
+
+        return "\n".join(lines)
+
+    def collapsed(self) -> str:
+        """ Folded stacks (`contract;callee;OPCODE ns` per line) as read by flamegraph.pl and speedscope """
+        return "".join(f"{';'.join(stack)} {ns}\n" for stack, ns in sorted(self.stacks.items()))
+
+    def write_collapsed(self, path: str):
+        with open(path, "w") as f:
+            f.write(self.collapsed())
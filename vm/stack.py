@@ -1,51 +1,80 @@
-import sys
+from vm.constants import MAX_UINT_256
 
 
 """
 Yellowpaper requirements:
   * The word size of the machine is 256-bit.
   * The stack has a maximum size of 1024.
+
+The stack is a preallocated list of `size` words with the top of the stack at
+index `count - 1`, so push/pop/dup/swap never shift existing elements.
 """
 class StackError(Exception):
     pass
 
 
 class Stack():
-    stack: list = []
-    count: int = 0
+    __slots__ = ("stack", "count", "size")
 
     def __init__(self, size: int=1024):
         self.size = size
+        self.stack = [0] * size
+        self.count = 0
 
     def __str__(self) -> str:
-        return str(self.stack)
+        return str(self.stack[:self.count])
     
     def reset(self):
-        self.stack = []
         self.count = 0
         
-    def push(self, item: bytes):
-        if sys.getsizeof(item) > 256:
+    def push(self, item: int):
+        try:
+            if item < 0 or item > MAX_UINT_256:
+                raise StackError("Item size exceeds word size limit (256 bits)")
+        except TypeError:
             raise StackError("Item size exceeds word size limit (256 bits)")
 
         if self.count == self.size:
             raise StackError(f"Maximum number of elements ({self.size}) exceeded")
         
-        self.stack.insert(0, item)
+        self.stack[self.count] = item
         self.count += 1
-    
-    def duplicate(self, position: int):
-        self.push(self.stack[position])
 
-    def pop(self) -> bytes:
+    def pop(self) -> int:
         if self.count == 0:
             raise StackError("Trying to read from empty stack")
         
         self.count -= 1
-        return self.stack.pop(0)
+        return self.stack[self.count]
 
-    def peak(self) -> bytes:
-        if self.count == 0:
+    def peek(self, n: int=0) -> int:
+        """ Returns the n-th item below the top of the stack (0 is the top) """
+        if n >= self.count:
             raise StackError("Trying to read from empty stack")
-        
-        return self.stack[0]
\ No newline at end of file
+
+        return self.stack[self.count - 1 - n]
+
+    def dup(self, n: int):
+        """ Pushes a copy of the n-th item (1 is the top) onto the stack """
+        if n > self.count:
+            raise StackError("Trying to read from empty stack")
+
+        if self.count == self.size:
+            raise StackError(f"Maximum number of elements ({self.size}) exceeded")
+
+        self.stack[self.count] = self.stack[self.count - n]
+        self.count += 1
+
+    def swap(self, n: int):
+        """ Exchanges the top of the stack with the n-th item below it """
+        if n >= self.count:
+            raise StackError("Trying to read from empty stack")
+
+        stack, top = self.stack, self.count - 1
+        stack[top], stack[top - n] = stack[top - n], stack[top]
+
+    def duplicate(self, position: int):
+        self.dup(position + 1)
+
+    def peak(self) -> int:
+        return self.peek(0)
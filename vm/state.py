@@ -0,0 +1,172 @@
+from dataclasses import dataclass
+
+from vm.storage import StorageBackend, StorageCache
+
+"""
+Journaled transaction state.
+
+`JournaledState` holds everything a transaction may change: storage (through
+a write-back `StorageCache`), account balances, nonces and code, emitted logs
+and the gas refund counter. Every change appends its undo record to a journal
+instead of copying state, so:
+
+    * `snapshot()` is O(1): it is the current length of the journal
+    * `revert(snapshot)` undoes only the changes made since the snapshot,
+      newest first, in time proportional to their number
+
+A nested call takes a snapshot on entry and reverts to it when it fails.
+Nothing reaches the storage backend or the account table until `commit()`.
+"""
+
+@dataclass
+class Account:
+    balance: int = 0
+    nonce: int = 0
+    code: bytes = b""
+
+@dataclass
+class Log:
+    address: int
+    topics: tuple
+    data: bytes
+
+
+## journal entries for changes that are not a (table, key, previous) overwrite ##
+LOG_ADDED = object()
+REFUND_CHANGE = object()
+
+EMPTY_ACCOUNT = Account()
+
+
+class JournaledState():
+    __slots__ = ("storage", "accounts", "balances", "nonces", "codes", "logs", "refund", "journal")
+
+    def __init__(self, backend: StorageBackend, accounts: dict=None):
+        self.storage = StorageCache(backend)
+        self.accounts = accounts if accounts is not None else {}
+
+        ## per-transaction overlays on top of `accounts`
+        self.balances: dict = {}
+        self.nonces: dict = {}
+        self.codes: dict = {}
+
+        self.logs: list = []
+        self.refund = 0
+        self.journal: list = []
+
+    ## snapshots ##
+
+    def snapshot(self) -> int:
+        return len(self.journal)
+
+    def revert(self, snapshot: int):
+        journal = self.journal
+
+        while len(journal) > snapshot:
+            table, key, previous = journal.pop()
+
+            if table is LOG_ADDED:
+                self.logs.pop()
+            elif table is REFUND_CHANGE:
+                self.refund = previous
+            elif previous is None:
+                del table[key]
+            else:
+                table[key] = previous
+
+    def change(self, table: dict, key, value):
+        self.journal.append((table, key, table.get(key)))
+        table[key] = value
+
+    ## storage ##
+
+    def load(self, address: int, slot: int) -> int:
+        return self.storage.load(address, slot)
+
+    def original_value(self, address: int, slot: int) -> int:
+        return self.storage.original_value(address, slot)
+
+    def store(self, address: int, slot: int, value: int):
+        self.storage.load(address, slot)
+        self.change(self.storage.current, (address, slot), value)
+
+    def add_refund(self, amount: int):
+        if amount:
+            self.journal.append((REFUND_CHANGE, None, self.refund))
+            self.refund += amount
+
+    ## accounts ##
+
+    def account(self, address: int) -> Account:
+        return self.accounts.get(address, EMPTY_ACCOUNT)
+
+    def balance(self, address: int) -> int:
+        value = self.balances.get(address)
+        return value if value is not None else self.account(address).balance
+
+    def nonce(self, address: int) -> int:
+        value = self.nonces.get(address)
+        return value if value is not None else self.account(address).nonce
+
+    def code(self, address: int) -> bytes:
+        value = self.codes.get(address)
+        return value if value is not None else self.account(address).code
+
+    def exists(self, address: int) -> bool:
+        """ False for empty accounts (no balance, nonce or code) per EIP-161 """
+        return bool(self.balance(address) or self.nonce(address) or self.code(address))
+
+    def set_balance(self, address: int, value: int):
+        self.change(self.balances, address, value)
+
+    def set_nonce(self, address: int, value: int):
+        self.change(self.nonces, address, value)
+
+    def set_code(self, address: int, code: bytes):
+        self.change(self.codes, address, code)
+
+    def transfer(self, sender: int, recipient: int, value: int) -> bool:
+        """ Moves `value` wei between accounts, returns False when the sender can't cover it """
+        if value == 0:
+            return True
+
+        funds = self.balance(sender)
+        if funds < value:
+            return False
+
+        self.set_balance(sender, funds - value)
+        self.set_balance(recipient, self.balance(recipient) + value)
+        return True
+
+    ## logs ##
+
+    def log(self, address: int, topics: tuple, data: bytes):
+        self.journal.append((LOG_ADDED, None, None))
+        self.logs.append(Log(address, topics, data))
+
+    ## transaction end ##
+
+    def commit(self):
+        """ Writes storage in one bulk write and account changes back to the account table """
+        self.storage.commit()
+
+        for table, field in ((self.balances, "balance"), (self.nonces, "nonce"), (self.codes, "code")):
+            for address, value in table.items():
+                account = self.accounts.get(address)
+                if account is None:
+                    account = self.accounts[address] = Account()
+                setattr(account, field, value)
+
+        self.clear()
+
+    def discard(self):
+        self.storage.discard()
+        self.clear()
+
+    def clear(self):
+        self.balances.clear()
+        self.nonces.clear()
+        self.codes.clear()
+        self.logs = []
+        self.refund = 0
+        self.journal.clear()
@@ -0,0 +1,133 @@
+import sqlite3
+
+"""
+Contract storage.
+
+Persistent word storage is keyed by (address, slot). Backends only need to
+answer point reads and apply a batch of writes; an unset slot reads as zero
+and writing zero deletes the slot.
+
+During execution all SLOAD/SSTORE traffic goes through a `StorageCache`, a
+per-transaction write-back cache. It remembers the value every touched slot
+had when the transaction started (needed by EIP-2200 gas and refund rules)
+and the current value, and flushes only the slots that actually changed in a
+single bulk write when the transaction commits.
+"""
+
+WORD_BYTES = 32
+ADDRESS_BYTES = 20
+
+
+class StorageBackend():
+    def get(self, address: int, slot: int) -> int:
+        raise NotImplementedError
+
+    def put_many(self, items: list):
+        """ Applies [((address, slot), value), ...] as one write """
+        raise NotImplementedError
+
+
+class MemoryStorage(StorageBackend):
+    __slots__ = ("slots",)
+
+    def __init__(self):
+        self.slots: dict = {}
+
+    def __len__(self) -> int:
+        return len(self.slots)
+
+    def get(self, address: int, slot: int) -> int:
+        return self.slots.get((address, slot), 0)
+
+    def put_many(self, items: list):
+        for key, value in items:
+            if value:
+                self.slots[key] = value
+            else:
+                self.slots.pop(key, None)
+
+
+class SQLiteStorage(StorageBackend):
+    """ On-disk storage in a local SQLite database, words kept as 32 byte big endian blobs """
+
+    def __init__(self, path: str=":memory:"):
+        self.db = sqlite3.connect(path)
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS storage ("
+            "address BLOB NOT NULL, slot BLOB NOT NULL, value BLOB NOT NULL, "
+            "PRIMARY KEY (address, slot)) WITHOUT ROWID"
+        )
+        self.db.commit()
+
+    def __len__(self) -> int:
+        return self.db.execute("SELECT COUNT(*) FROM storage").fetchone()[0]
+
+    @staticmethod
+    def key(address: int, slot: int) -> tuple:
+        return address.to_bytes(ADDRESS_BYTES, "big"), slot.to_bytes(WORD_BYTES, "big")
+
+    def get(self, address: int, slot: int) -> int:
+        row = self.db.execute("SELECT value FROM storage WHERE address = ? AND slot = ?", self.key(address, slot)).fetchone()
+
+        return int.from_bytes(row[0], "big") if row else 0
+
+    def put_many(self, items: list):
+        updates, deletes = [], []
+        for (address, slot), value in items:
+            if value:
+                updates.append(self.key(address, slot) + (value.to_bytes(WORD_BYTES, "big"),))
+            else:
+                deletes.append(self.key(address, slot))
+
+        with self.db:
+            self.db.executemany("INSERT OR REPLACE INTO storage (address, slot, value) VALUES (?, ?, ?)", updates)
+            self.db.executemany("DELETE FROM storage WHERE address = ? AND slot = ?", deletes)
+
+    def close(self):
+        self.db.close()
+
+
+class StorageCache():
+    """ Per-transaction write-back cache in front of a `StorageBackend` """
+    __slots__ = ("backend", "original", "current")
+
+    def __init__(self, backend: StorageBackend):
+        self.backend = backend
+        self.original: dict = {}
+        self.current: dict = {}
+
+    def load(self, address: int, slot: int) -> int:
+        key = (address, slot)
+
+        value = self.current.get(key)
+        if value is None:
+            value = self.backend.get(address, slot)
+            self.original[key] = value
+            self.current[key] = value
+
+        return value
+
+    def original_value(self, address: int, slot: int) -> int:
+        """ Value of the slot at the start of the transaction """
+        self.load(address, slot)
+        return self.original[(address, slot)]
+
+    def store(self, address: int, slot: int, value: int):
+        self.load(address, slot)
+        self.current[(address, slot)] = value
+
+    def dirty(self) -> list:
+        original = self.original
+        return [(key, value) for key, value in self.current.items() if value != original[key]]
+
+    def commit(self):
+        """ Writes every changed slot to the backend at once and starts a new transaction """
+        changes = self.dirty()
+        if changes:
+            self.backend.put_many(changes)
+
+        self.discard()
+
+    def discard(self):
+        self.original.clear()
+        self.current.clear()
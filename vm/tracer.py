@@ -0,0 +1,109 @@
+import sys
+
+from vm.opcode import Opcode
+from vm.instructions import StaticGasTable
+from vm.machine_ctx import MachineContext
+from vm.constants import CompletedExecution, ReturnCode
+
+"""
+Opt-in execution tracing. The interpreter only consults a tracer when one is
+handed to it, so untraced runs never pay for per-step formatting or I/O.
+"""
+
+class Tracer():
+    def capture_start(self, ctx: MachineContext):
+        """ Called once before the outermost frame starts """
+        pass
+
+    def capture_state(self, pc: int, op: int, ctx: MachineContext):
+        """ Called before the instruction `op` located at `pc` executes """
+        pass
+
+    def capture_end(self, result: CompletedExecution):
+        """ Called once when execution halts """
+        pass
+
+
+class TraceWriter():
+    """
+    Buffers trace lines and hands them to `out` in chunks of `buffer_lines`,
+    so a trace of any length is streamed in constant memory
+    """
+    __slots__ = ("out", "lines", "buffer_lines")
+
+    def __init__(self, out, buffer_lines: int=4096):
+        self.out = out
+        self.lines: list = []
+        self.buffer_lines = buffer_lines
+
+    def write(self, line: str):
+        lines = self.lines
+        lines.append(line)
+
+        if len(lines) >= self.buffer_lines:
+            self.flush()
+
+    def flush(self):
+        if self.lines:
+            self.lines.append("")
+            self.out.write("\n".join(self.lines))
+            self.lines.clear()
+
+        self.out.flush()
+
+
+def op_name(op: int) -> str:
+    return Opcode(op).name if op in Opcode._value2member_map_ else f"opcode {op:#04x} not defined"
+
+## per opcode constant parts of a step line, formatted once
+OpFields: list = [f'"op":{op},"gasCost":"{hex(StaticGasTable[op])}","opName":"{op_name(op)}"' for op in range(256)]
+
+class JSONTracer(Tracer):
+    """
+    Streams an EIP-3155 trace: one JSON object per executed instruction and a
+    summary object when execution halts.
+
+    Only what is asked for is serialized. The stack is written top `stack_limit`
+    items deep (None for all of it, 0 to leave it out) and memory is left out
+    unless `memory` is set, in which case at most `memory_limit` bytes are
+    written. Every line is formatted directly rather than built as a dict and
+    passed through `json`.
+    """
+
+    def __init__(self, out=None, stack_limit: int=None, memory: bool=False, memory_limit: int=None, buffer_lines: int=4096):
+        self.writer = TraceWriter(out if out is not None else sys.stdout, buffer_lines)
+        self.stack_limit = stack_limit
+        self.memory = memory
+        self.memory_limit = memory_limit
+        self.gas = 0
+
+    def capture_start(self, ctx: MachineContext):
+        self.gas = ctx.gas
+
+    def capture_state(self, pc: int, op: int, ctx: MachineContext):
+        line = (
+            f'{{"pc":{pc},{OpFields[op]},"gas":"{hex(ctx.gas)}","memSize":{len(ctx.mem)},'
+            f'"depth":{ctx.depth + 1},"refund":{ctx.state.refund if ctx.state is not None else 0}'
+        )
+
+        limit = self.stack_limit
+        if limit != 0:
+            stack = ctx.stack
+            items = stack.stack[:stack.count] if limit is None else stack.stack[max(stack.count - limit, 0):stack.count]
+            line += ',"stack":["' + '","'.join(map(hex, items)) + '"]' if items else ',"stack":[]'
+
+        if self.memory:
+            memory = ctx.mem.store if self.memory_limit is None else ctx.mem.store[:self.memory_limit]
+            line += f',"memory":"0x{memory.hex()}"'
+
+        self.writer.write(line + "}")
+
+    def capture_end(self, result: CompletedExecution):
+        output = bytes(result.data).hex() if result.data is not None else ""
+        line = f'{{"output":"{output}","gasUsed":"{hex(self.gas - result.gas_left)}","pass":{"true" if result.code == ReturnCode.STOPPED else "false"}'
+
+        if result.code != ReturnCode.STOPPED:
+            line += f',"error":"{result.code.name}"'
+
+        self.writer.write(line + "}")
+        self.writer.flush()